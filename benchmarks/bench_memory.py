@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark: peak resident set size and (on Python 3) tracemalloc allocations for each stage of each
+summarizer across document sizes. Every measurement runs in a fresh interpreter so that the peak RSS of one run
+does not mask another.
+
+    python -m benchmarks.bench_memory --sizes 100,1000,10000
+    python -m benchmarks.bench_memory --sizes 10000 --max-sentences 1000 --strategy chunk
+"""
+import json
+import subprocess
+import sys
+from optparse import OptionParser, SUPPRESS_HELP
+from .harness import format_table
+
+SUMMARIZERS = ('LsaOzsoy', 'LsaSteinberger', 'TextRankSummarizer', 'RelevanceSummarizer')
+
+
+class _Collector(object):
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def measure(summarizer_name, size, corpus='synthetic', max_sentences=None, max_bytes=None, strategy='truncate',
+            trace=True):
+    """Summarize a single document in the current process and return its per-stage memory statistics."""
+    from pytldr.summarize import instrumentation
+    import pytldr.summarize
+    from .corpus import make_corpus
+
+    text = make_corpus(corpus, size)
+
+    if trace and instrumentation.tracemalloc is not None:
+        instrumentation.tracemalloc.start()
+
+    collector = _Collector()
+    summarizer = getattr(pytldr.summarize, summarizer_name)(
+        hooks=[collector], max_sentences=max_sentences, max_bytes=max_bytes, budget_strategy=strategy
+    )
+    summarizer.timings_class = instrumentation.MemoryTimings
+    summary = summarizer.summarize(text, length=5)
+
+    record = collector.records[0]
+    stages = []
+    for (name, seconds), (_, memory) in zip(record.stages, record.memory):
+        memory['stage'] = name
+        memory['seconds'] = seconds
+        stages.append(memory)
+
+    return {
+        'summarizer': summarizer_name, 'size': size, 'sentences': record.num_sentences,
+        'stages': stages, 'peak_rss': instrumentation.peak_rss(), 'degraded': summary.degraded
+    }
+
+
+def measure_in_subprocess(summarizer_name, size, options):
+    command = [
+        sys.executable, '-W', 'ignore', '-m', 'benchmarks.bench_memory', '--worker', summarizer_name,
+        '--sizes', str(size), '--corpus', options.corpus, '--strategy', options.strategy
+    ]
+    if options.max_sentences:
+        command += ['--max-sentences', str(options.max_sentences)]
+    if options.max_bytes:
+        command += ['--max-bytes', str(options.max_bytes)]
+    output = subprocess.check_output(command)
+    return json.loads(output.splitlines()[-1])
+
+
+def _mb(value):
+    return '-' if value is None else '{0:.1f}'.format(value / 1048576.0)
+
+
+def report(results, out=sys.stdout):
+    rows = []
+    for result in results:
+        for stage in result['stages']:
+            rows.append((
+                result['summarizer'], result['size'], stage['stage'], '{0:.4f}'.format(stage['seconds']),
+                _mb(stage.get('rss')), _mb(stage.get('peak_rss_growth')), _mb(stage.get('traced_peak'))
+            ))
+        rows.append((result['summarizer'], result['size'], 'peak', '', '', _mb(result['peak_rss']), ''))
+    out.write(format_table(
+        rows, ['summarizer', 'sentences', 'stage', 'seconds', 'rss (MB)', 'peak rss growth (MB)',
+               'traced peak (MB)']
+    ) + '\n')
+    for result in results:
+        for degraded in result['degraded']:
+            out.write('{0} at {1} sentences was degraded: {2}\n'.format(
+                result['summarizer'], result['size'], degraded
+            ))
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_memory [options]')
+    parser.add_option('--sizes', default='100,1000,10000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'])
+    parser.add_option('--summarizers', default=','.join(SUMMARIZERS))
+    parser.add_option('--max-sentences', type='int', default=None, help='sentence budget of the summarizers')
+    parser.add_option('--max-bytes', type='int', default=None, help='byte budget of the summarizers')
+    parser.add_option('--strategy', default='truncate', choices=['truncate', 'sample', 'chunk'])
+    parser.add_option('--save', default=None, help='save results as JSON to this path')
+    parser.add_option('--worker', default=None, help=SUPPRESS_HELP)
+    options, _ = parser.parse_args(argv)
+
+    sizes = [int(size) for size in options.sizes.split(',')]
+
+    if options.worker:
+        print json.dumps(measure(options.worker, sizes[0], corpus=options.corpus,
+                                 max_sentences=options.max_sentences, max_bytes=options.max_bytes,
+                                 strategy=options.strategy))
+        return 0
+
+    results = []
+    for size in sizes:
+        for summarizer_name in options.summarizers.split(','):
+            results.append(measure_in_subprocess(summarizer_name, size, options))
+    report(results)
+
+    if options.save:
+        with open(options.save, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of two-stage summarization with paragraph pruning (the prune_paragraphs parameter of the summarizers):
+latency with and without pruning (in total, and of the stages after tokenization, whose cost pruning reduces),
+the number of sentences ranked, and the quality of the pruned summaries relative to the full ones.
+
+    python -m benchmarks.bench_pruning --sizes 1000,5000 --fractions 0.5,0.2,0.1 --corpus bundled
+
+There are no reference summaries, so quality is reported in two ways:
+
+- overlap: the fraction of the sentences of the full summary that the pruned summary also selects
+- coverage: the cosine similarity of the summary's term vector to the document's, relative to that of the full
+  summary (1.0 means the pruned summary covers the content of the document as well as the full one)
+"""
+import sys
+from optparse import OptionParser
+import numpy as np
+from pytldr.nlp import Tokenizer
+from pytldr.summarize import LsaOzsoy, LsaSteinberger, TextRankSummarizer, RelevanceSummarizer
+from pytldr.summarize.baseclass import BaseSummarizer
+from pytldr.summarize.lsa import BaseLsaSummarizer
+from .corpus import make_corpus
+from .harness import summarize_times, format_table
+
+SUMMARIZERS = (LsaOzsoy, LsaSteinberger, TextRankSummarizer, RelevanceSummarizer)
+TOKENIZATION_STAGES = ('parse_input', 'split_sentences', 'sanitize_text')
+
+
+class _Collector(object):
+
+    def __init__(self):
+        self.record = None
+
+    def emit(self, record):
+        self.record = record
+
+
+def measure(summarizer_class, tokenizer, text, length, repeat, **params):
+    """Returns the summary, the p50 latency, the p50 latency after tokenization and the number of ranked rows."""
+    collector = _Collector()
+    summarizer = summarizer_class(tokenizer, hooks=[collector], **params)
+    summary = summarizer.summarize(text, length=length)
+    total, ranking = [], []
+    for _ in range(repeat):
+        summarizer.summarize(text, length=length)
+        record = collector.record
+        total.append(record.total)
+        ranking.append(record.total - sum(seconds for name, seconds in record.stages if name in TOKENIZATION_STAGES))
+    # LSA decomposes the term-sentence matrix, the other summarizers use the sentence-term matrix
+    rows = record.matrix_shape[1 if issubclass(summarizer_class, BaseLsaSummarizer) else 0]
+    return summary, summarize_times(total)['p50'], summarize_times(ranking)['p50'], rows
+
+
+def coverage(summary, text, tokenizer):
+    """Cosine similarity of the term vector of a summary to that of the document it summarizes."""
+    document = tokenizer.tokenize_sentences(text)[0]
+    summary = [tokenizer.sanitize_text(sentence) for sentence in summary]
+    matrix = BaseSummarizer._compute_matrix(document + summary)
+    document_vector = np.asarray(matrix[:len(document)].sum(axis=0)).ravel()
+    summary_vector = np.asarray(matrix[len(document):].sum(axis=0)).ravel()
+    norms = np.linalg.norm(document_vector) * np.linalg.norm(summary_vector)
+    return summary_vector.dot(document_vector) / norms if norms else 0.0
+
+
+def run(sizes, fractions, corpus='synthetic', length=5, repeat=3, out=sys.stdout):
+    tokenizer = Tokenizer('english')
+    rows = []
+    for size in sizes:
+        text = make_corpus(corpus, size)
+        for summarizer_class in SUMMARIZERS:
+            name = summarizer_class.__name__
+            if summarizer_class is TextRankSummarizer and size > 20000:
+                # The similarity graph is quadratic in the number of sentences
+                continue
+
+            full_summary, full_time, full_ranking, full_rows = measure(summarizer_class, tokenizer, text, length,
+                                                                       repeat)
+            full_coverage = coverage(full_summary, text, tokenizer)
+            rows.append((name, size, 'none', full_rows, '{0:.4f}'.format(full_time), '{0:.4f}'.format(full_ranking),
+                         '1.00x', '1.00', '1.00'))
+
+            for fraction in fractions:
+                summary, pruned_time, ranking, ranked_rows = measure(summarizer_class, tokenizer, text, length, repeat,
+                                                                     prune_paragraphs=fraction)
+                overlap = len(set(summary) & set(full_summary)) / float(len(full_summary))
+                relative_coverage = coverage(summary, text, tokenizer) / full_coverage if full_coverage else 0.0
+                rows.append((
+                    name, size, fraction, ranked_rows, '{0:.4f}'.format(pruned_time), '{0:.4f}'.format(ranking),
+                    '{0:.2f}x'.format(full_ranking / ranking), '{0:.2f}'.format(overlap),
+                    '{0:.2f}'.format(relative_coverage)
+                ))
+            out.write('{0:<24} {1:>7} sentences done\n'.format(name, size))
+            out.flush()
+
+    out.write('\n' + format_table(
+        rows, ['summarizer', 'sentences', 'pruning', 'ranked', 'p50 (s)', 'ranking p50 (s)', 'ranking speedup',
+               'overlap', 'coverage']
+    ) + '\n')
+    return rows
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_pruning [options]')
+    parser.add_option('--sizes', default='1000,5000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--fractions', default='0.5,0.2,0.1',
+                      help='comma-separated values of prune_paragraphs [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    parser.add_option('--length', type='int', default=5, help='summary length in sentences [default: %default]')
+    parser.add_option('--repeat', type='int', default=3, help='timed repetitions per benchmark [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    run([int(size) for size in options.sizes.split(',')],
+        [float(fraction) for fraction in options.fractions.split(',')],
+        corpus=options.corpus, length=options.length, repeat=options.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
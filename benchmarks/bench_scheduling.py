@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the schedules of ParallelSummarizer on a mixed workload: many small documents with a few large ones
+among them. It reports the latency (from the start of the call until a summary is received) of small and large
+documents, and the makespan of the whole batch, for each schedule.
+
+    python -m benchmarks.bench_scheduling --small 500 --large 4 --large-size 2000 --processes 2
+
+Large documents are spread evenly through the input, as in a stream of scraped pages.
+"""
+import sys
+from optparse import OptionParser
+import numpy as np
+from pytldr.summarize import ParallelSummarizer, TextRankSummarizer
+from .corpus import make_corpus
+from .harness import format_table
+
+SCHEDULES = (('fifo', {}), ('sjf', {}), ('sjf', {'fairness': 0.1}), ('lanes', {}))
+
+
+def mixed_workload(num_small, num_large, small_size, large_size, corpus='synthetic'):
+    """Returns the documents, and whether each of them is large."""
+    documents = [make_corpus(corpus, small_size, seed=seed) for seed in range(num_small)]
+    is_large = [False] * num_small
+    # Insert from the end, so that the positions of the earlier insertions stay the same
+    for seed, position in reversed(list(enumerate(np.linspace(0, num_small, num_large, endpoint=False).astype(int)))):
+        documents.insert(position, make_corpus(corpus, large_size, seed=num_small + seed))
+        is_large.insert(position, True)
+    return documents, np.array(is_large, dtype=bool)
+
+
+def run(num_small, num_large, small_size=10, large_size=2000, processes=2, batch_size=4, backend='process',
+        corpus='synthetic', out=sys.stdout):
+    documents, is_large = mixed_workload(num_small, num_large, small_size, large_size, corpus)
+    rows = []
+    for schedule, params in SCHEDULES:
+        runner = ParallelSummarizer(TextRankSummarizer(), processes=processes, batch_size=batch_size, backend=backend,
+                                    schedule=schedule, **params)
+        runner.summarize(documents, length=3)
+        latencies = runner.stats.latencies
+
+        name = ' '.join([schedule] + ['{0}={1}'.format(*param) for param in params.items()])
+        rows.append((
+            name, '{0:.3f}'.format(np.percentile(latencies[~is_large], 50)),
+            '{0:.3f}'.format(np.percentile(latencies[~is_large], 99)),
+            '{0:.3f}'.format(latencies[is_large].max() if is_large.any() else float('nan')),
+            '{0:.3f}'.format(runner.stats.makespan)
+        ))
+        out.write('{0:<16} done\n'.format(name))
+        out.flush()
+
+    out.write('\n' + format_table(
+        rows, ['schedule', 'small p50 (s)', 'small p99 (s)', 'large max (s)', 'makespan (s)']
+    ) + '\n')
+    return rows
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_scheduling [options]')
+    parser.add_option('--small', type='int', default=500, help='number of small documents [default: %default]')
+    parser.add_option('--large', type='int', default=4, help='number of large documents [default: %default]')
+    parser.add_option('--small-size', type='int', default=10,
+                      help='sentences per small document [default: %default]')
+    parser.add_option('--large-size', type='int', default=2000,
+                      help='sentences per large document [default: %default]')
+    parser.add_option('--processes', type='int', default=2, help='number of workers [default: %default]')
+    parser.add_option('--batch-size', type='int', default=4, help='documents per task [default: %default]')
+    parser.add_option('--backend', default='process', choices=['process', 'thread'],
+                      help='"process" or "thread" [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    run(options.small, options.large, options.small_size, options.large_size, options.processes,
+        options.batch_size, options.backend, options.corpus)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the sentence cache of Tokenizer (see SentenceCache) on syndicated content: one story republished by
+many outlets, each of which rewrites a fraction of its sentences.
+
+    python -m benchmarks.bench_sentence_cache --sentences 50 --outlets 200 --edits 0.1,0.5
+
+Reports the time to tokenize the whole syndicated corpus with and without a cache, the hit rate of the cache and
+its estimated memory.
+"""
+import sys
+from optparse import OptionParser
+import numpy as np
+from pytldr.nlp import SentenceCache, Tokenizer
+from .corpus import synthetic_text
+from .harness import time_call, summarize_times, format_table
+
+
+def syndicated_corpus(num_sentences, num_outlets, edit_fraction, seed=0):
+    """The versions of a story of num_sentences sentences, each with edit_fraction of its sentences rewritten."""
+    tokenizer = Tokenizer('english', splitter='regex')
+    story = tokenizer.split_sentences(synthetic_text(num_sentences, seed=seed))
+    rewrites = tokenizer.split_sentences(synthetic_text(num_sentences * num_outlets, seed=seed + 1))
+    random_state = np.random.RandomState(seed)
+
+    documents = []
+    for outlet in range(num_outlets):
+        sentences = list(story)
+        edited = random_state.rand(len(sentences)) < edit_fraction
+        for ndx in np.flatnonzero(edited):
+            sentences[ndx] = rewrites[outlet * num_sentences + ndx]
+        documents.append(' '.join(sentences))
+    return documents
+
+
+def run(num_sentences, num_outlets, edit_fractions, repeat=3, out=sys.stdout):
+    rows = []
+    for edit_fraction in edit_fractions:
+        documents = syndicated_corpus(num_sentences, num_outlets, edit_fraction)
+        tokenizer = Tokenizer('english')
+
+        def tokenize():
+            for document in documents:
+                tokenizer.sanitize_sentences(tokenizer.split_sentences(document))
+
+        uncached = summarize_times(time_call(tokenize, repeat=repeat))['p50']
+
+        # Each timed run starts from an empty cache, so that hits are only those within the corpus
+        caches = []
+
+        def tokenize_cached():
+            tokenizer.cache = SentenceCache()
+            caches.append(tokenizer.cache)
+            tokenize()
+
+        cached = summarize_times(time_call(tokenize_cached, repeat=repeat))['p50']
+        stats = caches[-1].stats()
+        rows.append((
+            '{0:.2f}'.format(edit_fraction), num_outlets, '{0:.4f}'.format(uncached), '{0:.4f}'.format(cached),
+            '{0:.2f}x'.format(uncached / cached), '{0:.3f}'.format(stats['hit_rate']), stats['entries'],
+            '{0:.0f}'.format(stats['bytes'] / 1024.0)
+        ))
+        out.write('edit fraction {0:.2f} done\n'.format(edit_fraction))
+        out.flush()
+
+    out.write('\n' + format_table(rows, [
+        'edit fraction', 'documents', 'uncached (s)', 'cached (s)', 'speedup', 'hit rate', 'entries', 'KiB'
+    ]) + '\n')
+    return rows
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_sentence_cache [options]')
+    parser.add_option('--sentences', type='int', default=50, help='sentences per story [default: %default]')
+    parser.add_option('--outlets', type='int', default=200,
+                      help='number of versions of the story [default: %default]')
+    parser.add_option('--edits', default='0.1,0.5',
+                      help='comma-separated fractions of rewritten sentences [default: %default]')
+    parser.add_option('--repeat', type='int', default=3, help='timed repetitions per benchmark [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    run(options.sentences, options.outlets, [float(edit) for edit in options.edits.split(',')],
+        repeat=options.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the sentence splitters of Tokenizer: throughput of the rule-based 'regex' splitter against Punkt, and
+how often the two agree on sentence boundaries.
+
+    python -m benchmarks.bench_splitter --sizes 1000,10000 --corpus bundled
+
+Boundaries are compared as positions in the text with all whitespace removed, ignoring the sentences made of
+punctuation only that Punkt returns after line breaks. Precision is the fraction of the regex splitter's
+boundaries that Punkt also finds, and recall the fraction of Punkt's boundaries that the regex splitter finds.
+"""
+import re
+import sys
+from optparse import OptionParser
+from pytldr.nlp import Tokenizer
+from .corpus import make_corpus
+from .harness import time_call, summarize_times, format_table
+
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_PUNCTUATION_ONLY = re.compile(r'^[^\w]*$')
+
+
+def boundaries(sentences):
+    """Offsets of the ends of sentences in the concatenation of the sentences without whitespace."""
+    offsets = set()
+    position = 0
+    for sentence in sentences:
+        if _RE_PUNCTUATION_ONLY.match(sentence):
+            continue
+        position += len(_RE_WHITESPACE.sub('', sentence))
+        offsets.add(position)
+    return offsets
+
+
+def agreement(reference, candidate):
+    """Returns the precision, recall and F1 score of the candidate sentence boundaries against the reference."""
+    reference, candidate = boundaries(reference), boundaries(candidate)
+    common = len(reference & candidate)
+    precision = common / float(len(candidate)) if candidate else 1.0
+    recall = common / float(len(reference)) if reference else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def run(sizes, corpus='bundled', repeat=5, out=sys.stdout):
+    punkt, regex = Tokenizer('english'), Tokenizer('english', splitter='regex')
+    rows = []
+    for size in sizes:
+        text = make_corpus(corpus, size)
+        punkt_sentences, regex_sentences = punkt.split_sentences(text), regex.split_sentences(text)
+        precision, recall, f1 = agreement(punkt_sentences, regex_sentences)
+
+        for name, function in (('split_sentences', 'split_sentences'), ('tokenize_sentences', 'tokenize_sentences')):
+            punkt_time = summarize_times(time_call(lambda: getattr(punkt, function)(text), repeat=repeat))['p50']
+            regex_time = summarize_times(time_call(lambda: getattr(regex, function)(text), repeat=repeat))['p50']
+            rows.append((
+                name, size, '{0:.0f}'.format(size / punkt_time), '{0:.0f}'.format(size / regex_time),
+                '{0:.2f}x'.format(punkt_time / regex_time), '{0:.4f}'.format(precision), '{0:.4f}'.format(recall),
+                '{0:.4f}'.format(f1)
+            ))
+        out.write('{0:>7} sentences done\n'.format(size))
+        out.flush()
+
+    out.write('\n' + format_table(rows, [
+        'stage', 'sentences', 'punkt sentences/s', 'regex sentences/s', 'speedup', 'precision', 'recall', 'F1'
+    ]) + '\n')
+    return rows
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_splitter [options]')
+    parser.add_option('--sizes', default='1000,10000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--corpus', default='bundled', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    parser.add_option('--repeat', type='int', default=5, help='timed repetitions per benchmark [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    run([int(size) for size in options.sizes.split(',')], corpus=options.corpus, repeat=options.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the tokenizer, matrix construction and all summarizers across document sizes and weightings.
+
+Run from the root of the repository, e.g.:
+
+    python -m benchmarks.bench_summarizers --sizes 10,100,1000,10000 --save baseline.json
+    python -m benchmarks.bench_summarizers --sizes 10,100,1000,10000 --compare baseline.json
+
+Sizes are numbers of sentences (up to 100000). Reports latency percentiles, throughput in sentences per second and
+the scaling exponent of each benchmark (the slope of log latency against log size).
+
+The [per-article] and [batch] benchmarks split each document into short articles (of ARTICLE_PARAGRAPHS
+paragraphs) and summarize them one call at a time or with a single call to summarize_batch.
+"""
+import sys
+from optparse import OptionParser
+from pytldr.nlp import Tokenizer
+from pytldr.summarize import LsaOzsoy, LsaSteinberger, TextRankSummarizer, RelevanceSummarizer
+from pytldr.summarize.baseclass import BaseSummarizer
+from .corpus import make_corpus
+from .harness import (
+    time_call, summarize_times, scaling_exponent, save_results, load_results, compare, format_table
+)
+
+WEIGHTINGS = ('binary', 'frequency', 'tfidf')
+NORMS = (None, 'l1', 'l2')
+ARTICLE_PARAGRAPHS = 2
+
+
+class Document(object):
+    """A benchmark document and its tokenized sentences (tokenized lazily, once per size)."""
+
+    def __init__(self, text, tokenizer):
+        self.text = text
+        self._tokenizer = tokenizer
+        self._sentences = None
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            self._sentences = self._tokenizer.tokenize_sentences(self.text)[0]
+        return self._sentences
+
+    @property
+    def articles(self):
+        paragraphs = self.text.split('\n\n')
+        return ['\n\n'.join(paragraphs[i:i + ARTICLE_PARAGRAPHS])
+                for i in range(0, len(paragraphs), ARTICLE_PARAGRAPHS)]
+
+
+def build_benchmarks(tokenizer):
+    """Returns a list of (name, factory) pairs, where factory(document) returns the callable to be timed."""
+    benchmarks = [
+        ('tokenize_sentences', lambda doc: lambda: tokenizer.tokenize_sentences(doc.text))
+    ]
+
+    for weighting in WEIGHTINGS:
+        for norm in NORMS:
+            name = 'compute_matrix[{0},{1}]'.format(weighting, norm)
+            benchmarks.append((name, (lambda w, n: lambda doc: lambda: BaseSummarizer._compute_matrix(
+                doc.sentences, weighting=w, norm=n
+            ))(weighting, norm)))
+
+    summarizers = [
+        ('LsaOzsoy', LsaOzsoy(tokenizer)),
+        ('LsaSteinberger', LsaSteinberger(tokenizer)),
+        ('TextRankSummarizer', TextRankSummarizer(tokenizer)),
+        ('RelevanceSummarizer', RelevanceSummarizer(tokenizer))
+    ]
+    for name, summarizer in summarizers:
+        benchmarks.append((name, (lambda s: lambda doc: lambda: s.summarize(doc.text, length=5))(summarizer)))
+
+    for name, summarizer in summarizers[2:]:
+        benchmarks.append((name + '[per-article]', (lambda s: lambda doc: (lambda articles: lambda: [
+            s.summarize(article, length=3) for article in articles
+        ])(doc.articles))(summarizer)))
+        benchmarks.append((name + '[batch]', (lambda s: lambda doc: (lambda articles: lambda: s.summarize_batch(
+            articles, length=3
+        ))(doc.articles))(summarizer)))
+
+    return benchmarks
+
+
+def run(sizes, corpus='synthetic', repeat=5, warmup=1, name_filter=None, max_quadratic_size=20000, out=sys.stdout):
+    tokenizer = Tokenizer('english')
+    benchmarks = build_benchmarks(tokenizer)
+    if name_filter:
+        benchmarks = [(name, factory) for name, factory in benchmarks if name_filter in name]
+
+    results = {}
+    for size in sizes:
+        document = Document(make_corpus(corpus, size), tokenizer)
+        for name, factory in benchmarks:
+            if name == 'TextRankSummarizer' and size > max_quadratic_size:
+                # The similarity graph is quadratic in the number of sentences
+                out.write('Skipping {0} at {1} sentences\n'.format(name, size))
+                continue
+            # Fewer repeats for very large documents to keep the run time reasonable
+            size_repeat = repeat if size <= 10000 else max(1, repeat // 5)
+            times = time_call(factory(document), repeat=size_repeat, warmup=warmup if size <= 10000 else 0)
+            results.setdefault(name, {})[str(size)] = summarize_times(times, items=size)
+            out.write('{0:<40} {1:>7} sentences  p50={2:.4f}s\n'.format(
+                name, size, results[name][str(size)]['p50']
+            ))
+            out.flush()
+
+    return results
+
+
+def report(results, out=sys.stdout):
+    rows = []
+    for name in sorted(results):
+        for size in sorted(results[name], key=int):
+            stats = results[name][size]
+            rows.append((
+                name, size, '{0:.2f}'.format(stats['p50'] * 1000), '{0:.2f}'.format(stats['p90'] * 1000),
+                '{0:.2f}'.format(stats['p99'] * 1000), '{0:.0f}'.format(stats['throughput'])
+            ))
+    out.write('\n' + format_table(
+        rows, ['benchmark', 'sentences', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'sentences/s']
+    ) + '\n')
+
+    rows = []
+    for name in sorted(results):
+        sizes = sorted(results[name], key=int)
+        exponent = scaling_exponent([int(s) for s in sizes], [results[name][s]['p50'] for s in sizes])
+        rows.append((name, 'n/a' if exponent is None else '{0:.2f}'.format(exponent)))
+    out.write('\nScaling (latency ~ sentences^k):\n' + format_table(rows, ['benchmark', 'k']) + '\n')
+
+
+def report_comparison(rows, out=sys.stdout):
+    out.write('\nComparison against baseline (p50):\n' + format_table(
+        [(name, size, '{0:.4f}'.format(base), '{0:.4f}'.format(current), '{0:.2f}x'.format(ratio), status)
+         for name, size, base, current, ratio, status in rows],
+        ['benchmark', 'sentences', 'baseline (s)', 'current (s)', 'ratio', 'status']
+    ) + '\n')
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_summarizers [options]')
+    parser.add_option('--sizes', default='10,100,1000,10000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    parser.add_option('--repeat', type='int', default=5, help='timed repetitions per benchmark [default: %default]')
+    parser.add_option('--warmup', type='int', default=1, help='untimed warmup calls [default: %default]')
+    parser.add_option('--filter', dest='name_filter', default=None, help='only run benchmarks containing this string')
+    parser.add_option('--save', default=None, help='save results as JSON to this path')
+    parser.add_option('--compare', default=None, help='compare against a baseline JSON file')
+    parser.add_option('--tolerance', type='float', default=0.1,
+                      help='relative slowdown reported as a regression [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    sizes = [int(size) for size in options.sizes.split(',')]
+    results = run(sizes, corpus=options.corpus, repeat=options.repeat, warmup=options.warmup,
+                  name_filter=options.name_filter)
+    report(results)
+
+    if options.save:
+        save_results(results, options.save)
+
+    if options.compare:
+        rows = compare(results, load_results(options.compare), tolerance=options.tolerance)
+        report_comparison(rows)
+        if any(row[-1] == 'regression' for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
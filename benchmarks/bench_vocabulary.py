@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of vocabulary pruning (the prune_vocabulary parameter of the summarizers): the number of terms left in
+the sentence matrices, the latency of the stages after tokenization (which pruning speeds up by narrowing the
+matrices), and the quality of the pruned summaries relative to the unpruned ones.
+
+    python -m benchmarks.bench_vocabulary --sizes 1000,5000 --corpus bundled
+
+Corpus document frequencies are fitted on --corpus-documents other documents of the same corpus. Quality is
+reported as in benchmarks.bench_pruning:
+
+- overlap: the fraction of the sentences of the unpruned summary that the pruned summary also selects
+- coverage: the cosine similarity of the summary's term vector to the document's, relative to that of the unpruned
+  summary
+"""
+import sys
+from optparse import OptionParser
+from pytldr.nlp import DocumentFrequencies, Tokenizer, VocabularyPruner
+from pytldr.summarize import LsaOzsoy, LsaSteinberger, TextRankSummarizer, RelevanceSummarizer
+from pytldr.summarize.lsa import BaseLsaSummarizer
+from .bench_pruning import TOKENIZATION_STAGES, coverage
+from .corpus import make_corpus
+from .harness import summarize_times, format_table
+
+SUMMARIZERS = (LsaOzsoy, LsaSteinberger, TextRankSummarizer, RelevanceSummarizer)
+
+
+class _Collector(object):
+
+    def __init__(self):
+        self.record = None
+
+    def emit(self, record):
+        self.record = record
+
+
+def pruners(corpus_frequencies):
+    return (
+        ('min_df=2', VocabularyPruner(min_df=2)),
+        ('max_df=0.1', VocabularyPruner(max_df=0.1)),
+        ('min_df=2 max_df=0.1', VocabularyPruner(min_df=2, max_df=0.1)),
+        ('max_features=500', VocabularyPruner(max_features=500)),
+        ('corpus max_df=0.5', VocabularyPruner(max_df=0.5, corpus=corpus_frequencies))
+    )
+
+
+def measure(summarizer_class, tokenizer, text, length, repeat, **params):
+    """Returns the summary, the p50 latency after tokenization and the number of terms of the sentence matrix."""
+    collector = _Collector()
+    summarizer = summarizer_class(tokenizer, hooks=[collector], **params)
+    summary = summarizer.summarize(text, length=length)
+    ranking = []
+    for _ in range(repeat):
+        summarizer.summarize(text, length=length)
+        record = collector.record
+        ranking.append(record.total - sum(seconds for name, seconds in record.stages if name in TOKENIZATION_STAGES))
+    # LSA decomposes the term-sentence matrix, the other summarizers use the sentence-term matrix
+    terms = record.matrix_shape[0 if issubclass(summarizer_class, BaseLsaSummarizer) else 1]
+    return summary, summarize_times(ranking)['p50'], terms
+
+
+def run(sizes, corpus='synthetic', corpus_documents=20, length=5, repeat=3, out=sys.stdout):
+    tokenizer = Tokenizer('english')
+    rows = []
+    for size in sizes:
+        text = make_corpus(corpus, size)
+        frequencies = DocumentFrequencies.fit(
+            [make_corpus(corpus, 50, seed=seed) for seed in range(1, corpus_documents + 1)], tokenizer
+        )
+        for summarizer_class in SUMMARIZERS:
+            name = summarizer_class.__name__
+            full_summary, full_ranking, full_terms = measure(summarizer_class, tokenizer, text, length, repeat)
+            full_coverage = coverage(full_summary, text, tokenizer)
+            rows.append((name, size, 'none', full_terms, '{0:.4f}'.format(full_ranking), '1.00x', '1.00', '1.00'))
+
+            for pruning, pruner in pruners(frequencies):
+                try:
+                    summary, ranking, terms = measure(summarizer_class, tokenizer, text, length, repeat,
+                                                      prune_vocabulary=pruner)
+                except ValueError:  # Too few terms left, e.g. for the rank of the SVD
+                    rows.append((name, size, pruning, '-', '-', '-', '-', '-'))
+                    continue
+                overlap = len(set(summary) & set(full_summary)) / float(len(full_summary))
+                relative_coverage = coverage(summary, text, tokenizer) / full_coverage if full_coverage else 0.0
+                rows.append((
+                    name, size, pruning, terms, '{0:.4f}'.format(ranking), '{0:.2f}x'.format(full_ranking / ranking),
+                    '{0:.2f}'.format(overlap), '{0:.2f}'.format(relative_coverage)
+                ))
+            out.write('{0:<24} {1:>7} sentences done\n'.format(name, size))
+            out.flush()
+
+    out.write('\n' + format_table(
+        rows, ['summarizer', 'sentences', 'pruning', 'terms', 'ranking p50 (s)', 'ranking speedup', 'overlap',
+               'coverage']
+    ) + '\n')
+    return rows
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.bench_vocabulary [options]')
+    parser.add_option('--sizes', default='1000,5000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    parser.add_option('--corpus-documents', type='int', default=20,
+                      help='documents that corpus document frequencies are fitted on [default: %default]')
+    parser.add_option('--length', type='int', default=5, help='summary length in sentences [default: %default]')
+    parser.add_option('--repeat', type='int', default=3, help='timed repetitions per benchmark [default: %default]')
+    options, _ = parser.parse_args(argv)
+
+    run([int(size) for size in options.sizes.split(',')], corpus=options.corpus,
+        corpus_documents=options.corpus_documents, length=options.length, repeat=options.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Calibration of the cost model of AutoSummarizer on the current machine: times each candidate summarizer on
+documents of a range of sizes, fits the model and reports how well it predicts the measurements.
+
+    python -m benchmarks.calibrate_auto --sizes 10,30,100,300,1000,2000 --output cost_model.json
+
+The model bundled with PyTLDR (pytldr/summarize/cost_model.json) is the output of this script on the reference
+machine, with its default options. Pass the saved model to AutoSummarizer(cost_model=...) to use it.
+"""
+from __future__ import division
+import sys
+from optparse import OptionParser
+import numpy as np
+from pytldr.nlp import Tokenizer
+from pytldr.summarize.auto import AutoSummarizer, CostModel
+from .corpus import make_corpus
+from .harness import format_table
+
+
+def run(sizes, corpus='synthetic', length=5, repeat=3, seeds=2, output=None, out=sys.stdout):
+    tokenizer = Tokenizer('english')
+    documents = [make_corpus(corpus, size, seed=seed) for size in sizes for seed in range(seeds)]
+    model = CostModel.calibrate(AutoSummarizer.default_candidates(tokenizer), documents, tokenizer, length=length,
+                                repeat=repeat)
+
+    rows = []
+    for name, samples in sorted(model.samples.items()):
+        for features, seconds in samples:
+            predicted = model.predict(name, features)
+            rows.append((name, features.sentences, features.terms, features.nnz, '{0:.4f}'.format(seconds),
+                         '{0:.4f}'.format(predicted), '{0:+.0%}'.format(predicted / seconds - 1)))
+    out.write(format_table(rows, ['candidate', 'sentences', 'terms', 'nnz', 'measured (s)', 'predicted (s)',
+                                  'error']) + '\n\n')
+
+    errors = [(name, np.median([abs(model.predict(name, features) / seconds - 1) for features, seconds in samples]))
+              for name, samples in sorted(model.samples.items())]
+    out.write(format_table([(name, '{0:.0%}'.format(error)) for name, error in errors],
+                           ['candidate', 'median relative error']) + '\n')
+
+    if output is not None:
+        model.save(output)
+        out.write('\nSaved the cost model to {0}\n'.format(output))
+    return model
+
+
+def main(argv=None):
+    parser = OptionParser(usage='python -m benchmarks.calibrate_auto [options]')
+    parser.add_option('--sizes', default='10,30,100,300,1000,2000',
+                      help='comma-separated document sizes in sentences [default: %default]')
+    parser.add_option('--corpus', default='synthetic', choices=['synthetic', 'bundled'],
+                      help='"synthetic" or "bundled" [default: %default]')
+    parser.add_option('--length', type='int', default=5, help='summary length in sentences [default: %default]')
+    parser.add_option('--repeat', type='int', default=3, help='timed repetitions per document [default: %default]')
+    parser.add_option('--seeds', type='int', default=2, help='documents per size [default: %default]')
+    parser.add_option('--output', help='path of the JSON file the cost model is saved to')
+    options, _ = parser.parse_args(argv)
+
+    run([int(size) for size in options.sizes.split(',')], corpus=options.corpus, length=options.length,
+        repeat=options.repeat, seeds=options.seeds, output=options.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Corpora for the benchmark suite. Documents can either be generated synthetically (with a Zipfian vocabulary) or
+built from the bundled news article in benchmarks/data, repeated until the requested number of sentences is met.
+"""
+import os.path
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+BUNDLED_ARTICLE = os.path.join(DATA_DIR, 'reuters_greece.txt')
+
+_CONSONANTS = 'bcdfghjklmnprstvwz'
+_VOWELS = 'aeiou'
+
+
+def _make_vocabulary(size, random_state):
+    words = set()
+    while len(words) < size:
+        num_syllables = random_state.randint(1, 4)
+        words.add(''.join(
+            random_state.choice(list(_CONSONANTS)) + random_state.choice(list(_VOWELS))
+            for _ in range(num_syllables)
+        ) + random_state.choice(list(_CONSONANTS)))
+    return sorted(words)
+
+
+def synthetic_text(num_sentences, vocabulary_size=5000, min_words=6, max_words=25, sentences_per_paragraph=5,
+                   zipf_exponent=1.1, seed=0):
+    """
+    Generate a document of num_sentences sentences whose words follow a Zipf distribution over a synthetic
+    vocabulary. Paragraphs are separated by blank lines.
+    """
+    random_state = np.random.RandomState(seed)
+    vocabulary = _make_vocabulary(vocabulary_size, random_state)
+
+    ranks = np.arange(1, vocabulary_size + 1)
+    probabilities = 1.0 / np.power(ranks, zipf_exponent)
+    probabilities /= probabilities.sum()
+
+    lengths = random_state.randint(min_words, max_words + 1, size=num_sentences)
+    word_ids = random_state.choice(vocabulary_size, size=int(lengths.sum()), p=probabilities)
+
+    paragraphs = []
+    paragraph = []
+    offset = 0
+    for length in lengths:
+        words = [vocabulary[i] for i in word_ids[offset:offset + length]]
+        offset += length
+        paragraph.append(' '.join(words).capitalize() + '.')
+        if len(paragraph) == sentences_per_paragraph:
+            paragraphs.append(' '.join(paragraph))
+            paragraph = []
+    if paragraph:
+        paragraphs.append(' '.join(paragraph))
+
+    return '\n\n'.join(paragraphs)
+
+
+def bundled_text(num_sentences, path=BUNDLED_ARTICLE):
+    """
+    Build a document of num_sentences sentences by cycling through the sentences of a bundled article. Paragraph
+    breaks of the original article are preserved.
+    """
+    from pytldr.nlp import Tokenizer
+
+    with open(path, 'rb') as article_file:
+        paragraphs = [p.strip() for p in article_file.read().split('\n') if p.strip()]
+
+    tokenizer = Tokenizer('english')
+    paragraph_sentences = [tokenizer.split_sentences(p) for p in paragraphs]
+
+    output = []
+    count = 0
+    while count < num_sentences:
+        for sentences in paragraph_sentences:
+            sentences = sentences[:num_sentences - count]
+            if not sentences:
+                break
+            output.append(' '.join(sentences))
+            count += len(sentences)
+
+    return '\n\n'.join(output)
+
+
+def make_corpus(kind, num_sentences, seed=0):
+    if kind == 'synthetic':
+        return synthetic_text(num_sentences, seed=seed)
+    elif kind == 'bundled':
+        return bundled_text(num_sentences)
+    else:
+        raise ValueError('Corpus must be either "synthetic" or "bundled"')
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Timing utilities shared by the benchmark scripts: repeated measurement, latency percentiles, scaling curves and
+comparison against a saved baseline.
+"""
+from __future__ import division
+import json
+import math
+from timeit import default_timer
+
+
+def time_call(func, repeat=5, warmup=1):
+    """Call func warmup + repeat times and return the wall times (in seconds) of the last repeat calls."""
+    for _ in range(warmup):
+        func()
+
+    times = []
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        times.append(default_timer() - start)
+    return times
+
+
+def percentile(values, q):
+    """Linearly interpolated percentile (q between 0 and 100) of a list of values."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(math.floor(position))
+    upper = int(math.ceil(position))
+    if lower == upper:
+        return values[lower]
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize_times(times, items=None):
+    """
+    Reduce a list of timings to summary statistics. If items (e.g. the number of sentences processed per call)
+    is given, the throughput in items per second is computed from the median latency.
+    """
+    stats = {
+        'repeat': len(times),
+        'min': min(times),
+        'mean': sum(times) / len(times),
+        'p50': percentile(times, 50),
+        'p90': percentile(times, 90),
+        'p99': percentile(times, 99),
+        'max': max(times)
+    }
+    if items is not None:
+        stats['items'] = items
+        stats['throughput'] = items / stats['p50'] if stats['p50'] > 0 else float('inf')
+    return stats
+
+
+def scaling_exponent(sizes, latencies):
+    """
+    Least-squares slope of log(latency) against log(size). An exponent of ~1 indicates linear scaling and ~2
+    quadratic scaling.
+    """
+    points = [(math.log(s), math.log(t)) for s, t in zip(sizes, latencies) if s > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def save_results(results, path):
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, 'r') as results_file:
+        return json.load(results_file)
+
+
+def compare(results, baseline, tolerance=0.1, statistic='p50'):
+    """
+    Compare benchmark results with a baseline produced by an earlier run. Results are nested dictionaries of
+    {benchmark name: {size: stats}}. Returns a list of (name, size, baseline, current, ratio, status) tuples,
+    where status is 'regression', 'improvement' or 'ok' depending on whether the ratio of current to baseline
+    latency exceeds 1 +/- tolerance.
+    """
+    rows = []
+    for name in sorted(results):
+        for size in sorted(results[name], key=int):
+            if name not in baseline or str(size) not in baseline[name]:
+                continue
+            base = baseline[name][str(size)][statistic]
+            current = results[name][size][statistic]
+            ratio = current / base if base > 0 else float('inf')
+            if ratio > 1 + tolerance:
+                status = 'regression'
+            elif ratio < 1 - tolerance:
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append((name, int(size), base, current, ratio, status))
+    return rows
+
+
+def format_table(rows, headers):
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(headers[i]), *[len(row[i]) for row in rows]) if rows else len(headers[i])
+              for i in range(len(headers))]
+    lines = ['  '.join(h.ljust(w) for h, w in zip(headers, widths)),
+             '  '.join('-' * w for w in widths)]
+    lines += ['  '.join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows]
+    return '\n'.join(lines)
@@ -1,4 +1,8 @@
-from .tokenizer import Tokenizer
-from .preprocess import unicode_to_ascii, parse_input
+from .tokenizer import Tokenizer, SentenceCache
+from .preprocess import unicode_to_ascii, parse_input, open_input, iter_records
+from .dedup import MinHashLSH
+from .document import PreprocessedDocument
+from .vocabulary import DocumentFrequencies, VocabularyPruner
 
-__all__ = [Tokenizer, unicode_to_ascii, parse_input]
\ No newline at end of file
+__all__ = [Tokenizer, SentenceCache, unicode_to_ascii, parse_input, open_input, iter_records, MinHashLSH,
+           PreprocessedDocument, DocumentFrequencies, VocabularyPruner]
\ No newline at end of file
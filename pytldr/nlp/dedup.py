@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import zlib
+import numpy as np
+
+
+class MinHashLSH(object):
+    """
+    Finds near-duplicate sentences with MinHash signatures and locality sensitive hashing (Broder, 1997; Indyk and
+    Motwani, 1998). Each sentence is represented by the set of its (sanitized) tokens and two sentences are near
+    duplicates if the Jaccard similarity of their token sets is at least "threshold".
+
+    Signatures are computed in O(num_perm) per token, and sentences are only compared when their signatures agree
+    on all rows of at least one band, so the cost is linear in the number of sentences rather than quadratic.
+    """
+
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8, seed=1):
+        """
+        :param num_perm: number of hash functions in each signature
+        :param bands: number of LSH bands the signatures are split into (must divide num_perm). More bands find
+        more candidate pairs at lower similarities.
+        :param threshold: minimum estimated Jaccard similarity for two sentences to be near duplicates (between 0
+        and 1; 1 only matches sentences with identical token sets)
+        :param seed: seed of the random hash functions
+        """
+        if num_perm < 1 or bands < 1 or num_perm % bands:
+            raise ValueError('Parameter "bands" must be a positive divisor of "num_perm"')
+        if not 0 < threshold <= 1:
+            raise ValueError('Parameter "threshold" must take a value between 0 and 1')
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+
+        # Universal hash functions h(x) = (a * x + b) mod p, with p the Mersenne prime 2^31 - 1 such that
+        # a * x + b cannot overflow 64 bits
+        random_state = np.random.RandomState(seed)
+        self._a = random_state.randint(1, self._PRIME, size=num_perm).astype(np.uint64)
+        self._b = random_state.randint(0, self._PRIME, size=num_perm).astype(np.uint64)
+
+    @classmethod
+    def _hash_token(cls, token):
+        if isinstance(token, unicode):
+            token = token.encode('utf-8')
+        return (zlib.crc32(token) & 0xffffffff) % cls._PRIME
+
+    def signature(self, tokens):
+        """Returns the MinHash signature (an array of num_perm integers) of an iterable of tokens."""
+        hashes = np.array([self._hash_token(token) for token in set(tokens)], dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, self._PRIME, dtype=np.uint64)
+
+        permuted = (np.outer(self._a, hashes) + self._b[:, np.newaxis]) % np.uint64(self._PRIME)
+        return permuted.min(axis=1)
+
+    def signatures(self, token_sets):
+        """Returns the matrix of MinHash signatures of a list of token iterables, one row per item."""
+        signatures = np.empty((len(token_sets), self.num_perm), dtype=np.uint64)
+        for ndx, tokens in enumerate(token_sets):
+            signatures[ndx] = self.signature(tokens)
+        return signatures
+
+    def duplicates(self, token_sets, signatures=None):
+        """
+        Cluster near-duplicate items. Returns a list with, for each item, the index of the first item of its cluster
+        (so that item i is unique, or the first occurrence of its cluster, if and only if the value is i).
+
+        Within each LSH bucket, items are only compared to the first item of the bucket, which keeps the number of
+        comparisons linear even when a sentence is repeated many times; clusters are the connected components of
+        the resulting matches.
+        """
+        if signatures is None:
+            signatures = self.signatures(token_sets)
+
+        parents = list(range(len(signatures)))
+
+        def find(ndx):
+            while parents[ndx] != ndx:
+                parents[ndx] = parents[parents[ndx]]
+                ndx = parents[ndx]
+            return ndx
+
+        rows = self.num_perm // self.bands
+        for band in range(self.bands):
+            buckets = {}
+            band_signatures = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            for ndx in range(len(signatures)):
+                key = band_signatures[ndx].tostring()
+                first = buckets.setdefault(key, ndx)
+                if first == ndx:
+                    continue
+
+                root, first_root = find(ndx), find(first)
+                if root != first_root and self.similarity(signatures[ndx], signatures[first]) >= self.threshold:
+                    # The cluster is represented by its earliest item
+                    parents[max(root, first_root)] = min(root, first_root)
+
+        return [find(ndx) for ndx in range(len(signatures))]
+
+    @staticmethod
+    def similarity(signature, other):
+        """Estimate of the Jaccard similarity of two token sets from their MinHash signatures."""
+        return np.mean(signature == other)
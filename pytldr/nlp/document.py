@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer
+from .tokenizer import Tokenizer
+from .preprocess import parse_input
+
+
+class StringColumn(object):
+    """
+    Read-only sequence of strings stored as one contiguous byte buffer and an array of offsets, such that string i
+    is data[offsets[i]:offsets[i + 1]]. Strings are only materialized when they are accessed.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        strings = [string.encode('utf-8') if isinstance(string, unicode) else string for string in strings]
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(string) for string in strings])
+        return cls(np.frombuffer(''.join(strings), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, ndx):
+        if isinstance(ndx, slice):
+            return [self[i] for i in range(*ndx.indices(len(self)))]
+        if ndx < 0:
+            ndx += len(self)
+        if not 0 <= ndx < len(self):
+            raise IndexError('StringColumn index out of range')
+        return self.data[self.offsets[ndx]:self.offsets[ndx + 1]].tostring()
+
+    def __iter__(self):
+        for ndx in range(len(self)):
+            yield self[ndx]
+
+
+class SentenceColumn(StringColumn):
+    """
+    StringColumn of processed sentences that also carries their term counts (a CSR matrix with one row per
+    sentence and one column per term of the vocabulary, in alphabetical order), and the vocabulary. Summarizers
+    derive their sentence matrices from the counts instead of vectorizing the sentences again.
+    """
+
+    def __init__(self, data, offsets, counts, terms=None):
+        super(SentenceColumn, self).__init__(data, offsets)
+        self.counts = counts
+        self.terms = terms
+
+
+class PreprocessedDocument(object):
+    """
+    The output of Tokenizer.tokenize_sentences for a document, together with the term counts of its processed
+    sentences, so that the document can be summarized any number of times (e.g. in parameter sweeps) without
+    splitting, sanitizing or vectorizing it again. Every summarizer accepts a PreprocessedDocument in place of text.
+
+    Documents are saved as a directory of .npy arrays in a columnar layout: each list of strings (processed
+    sentences, unprocessed sentences and the vocabulary) is one byte buffer plus an array of offsets, and the term
+    counts are the three arrays of a CSR matrix. load memory-maps all of them, so loading is immediate and the
+    pages of a document are shared by every process summarizing it.
+
+    Example:
+
+        PreprocessedDocument.build(text).save('archive/article-1')
+        document = PreprocessedDocument.load('archive/article-1')
+        for topics in (2, 4, 8):
+            LsaOzsoy().summarize(document, topics=topics)
+    """
+
+    FORMAT_VERSION = 1
+    _COLUMNS = ('sentences', 'unprocessed', 'terms')
+    _ARRAYS = ('indptr', 'indices', 'counts')
+
+    def __init__(self, sentences, unprocessed_sentences, terms, paragraphs=None):
+        """
+        :param sentences: SentenceColumn of the processed sentences
+        :param unprocessed_sentences: StringColumn of the unprocessed sentences
+        :param terms: StringColumn of the vocabulary, in the order of the columns of the term counts
+        :param paragraphs: array with the paragraph of each sentence, if the document was split paragraph by
+        paragraph (None otherwise)
+        """
+        self.sentences = sentences
+        self.unprocessed_sentences = unprocessed_sentences
+        self.terms = terms
+        self.paragraphs = paragraphs
+
+    @classmethod
+    def build(cls, text, tokenizer=None, word_threshold=5, paragraphs=False):
+        """
+        :param text: a string of text, path to a text file, or URL starting with http
+        :param tokenizer: Tokenizer used to split and sanitize sentences (English tokenizer by default). The
+        summarizers use these sentences as they are, whatever their own tokenizer.
+        :param word_threshold: number of significant words that a sentence must contain to be counted
+        :param paragraphs: whether the text is split into sentences paragraph by paragraph, recording the
+        paragraph of each sentence. This is required to summarize the document with paragraph pruning.
+        """
+        tokenizer = tokenizer if tokenizer is not None else Tokenizer('english')
+        text = parse_input(text)
+
+        if paragraphs:
+            sentences, unprocessed_sentences, paragraph_ids = [], [], []
+            for ndx, paragraph in enumerate(tokenizer.tokenize_paragraphs(text)):
+                paragraph_sentences, paragraph_unprocessed = tokenizer.tokenize_sentences(paragraph, word_threshold)
+                sentences += paragraph_sentences
+                unprocessed_sentences += paragraph_unprocessed
+                paragraph_ids += [ndx] * len(paragraph_sentences)
+            paragraph_ids = np.array(paragraph_ids, dtype=np.int32)
+        else:
+            sentences, unprocessed_sentences = tokenizer.tokenize_sentences(text, word_threshold)
+            paragraph_ids = None
+
+        # The same vectorizer as BaseSummarizer._compute_matrix, so that the columns are the same
+        vectorizer = CountVectorizer(min_df=1, ngram_range=(1, 1), binary=False, stop_words=None)
+        try:
+            counts = vectorizer.fit_transform(sentences)
+            terms = vectorizer.get_feature_names()
+        except ValueError:  # No sentences, or no terms in them
+            counts = csr_matrix((len(sentences), 0))
+            terms = []
+        counts = csr_matrix(counts, dtype=np.int32)
+        counts.sum_duplicates()  # Canonical format, which load relies on
+
+        column = StringColumn.from_strings(sentences)
+        terms = StringColumn.from_strings(terms)
+        return cls(SentenceColumn(column.data, column.offsets, counts, terms),
+                   StringColumn.from_strings(unprocessed_sentences), terms, paragraph_ids)
+
+    def __len__(self):
+        return len(self.sentences)
+
+    @property
+    def counts(self):
+        return self.sentences.counts
+
+    def save(self, path):
+        """Saves the document to a directory (created if needed)."""
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        for name in self._COLUMNS:
+            column = getattr(self, 'unprocessed_sentences' if name == 'unprocessed' else name)
+            np.save(os.path.join(path, name + '_data.npy'), np.asarray(column.data, dtype=np.uint8))
+            np.save(os.path.join(path, name + '_offsets.npy'), np.asarray(column.offsets, dtype=np.int64))
+
+        counts = self.counts
+        for name, array in zip(self._ARRAYS, (counts.indptr, counts.indices, counts.data)):
+            np.save(os.path.join(path, name + '.npy'), array)
+        if self.paragraphs is not None:
+            np.save(os.path.join(path, 'paragraphs.npy'), self.paragraphs)
+
+        with open(os.path.join(path, 'meta.json'), 'wb') as meta_file:
+            json.dump({'version': self.FORMAT_VERSION, 'shape': list(counts.shape)}, meta_file)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Loads a document saved with save. Arrays are memory-mapped unless mmap_mode is None (see numpy.load).
+        """
+        with open(os.path.join(path, 'meta.json'), 'rb') as meta_file:
+            meta = json.load(meta_file)
+        if meta['version'] != cls.FORMAT_VERSION:
+            raise ValueError('Unsupported document format version {0}'.format(meta['version']))
+
+        def load_array(name):
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+
+        columns = [(load_array(name + '_data'), load_array(name + '_offsets')) for name in cls._COLUMNS]
+        indptr, indices, data = [load_array(name) for name in cls._ARRAYS]
+        counts = csr_matrix((data, indices, indptr), shape=tuple(meta['shape']), copy=False)
+        # Documents are saved in canonical format: scipy must not try to sort the (read-only) arrays
+        counts.has_canonical_format = True
+
+        paragraphs_path = os.path.join(path, 'paragraphs.npy')
+        paragraphs = load_array('paragraphs') if os.path.exists(paragraphs_path) else None
+        terms = StringColumn(*columns[2])
+        return cls(SentenceColumn(columns[0][0], columns[0][1], counts, terms), StringColumn(*columns[1]), terms,
+                   paragraphs)
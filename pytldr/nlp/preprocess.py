@@ -1,6 +1,17 @@
 # -*- coding: utf-8 -*-
+import bz2
+import gzip
+import io
+import json
+import os
 import unicodedata
 
+# Extensions of compressed files, and the leading bytes by which each compression is detected otherwise
+COMPRESSIONS = (('.gz', 'gzip', '\x1f\x8b'), ('.bz2', 'bz2', 'BZh'), ('.xz', 'xz', '\xfd7zXZ\x00'),
+                ('.zst', 'zstd', '\x28\xb5\x2f\xfd'))
+TEXT_EXTENSIONS = ('.txt',)
+RECORD_EXTENSIONS = ('.jsonl',)
+
 
 def unicode_to_ascii(unicodestr):
     if isinstance(unicodestr, str):
@@ -26,14 +37,106 @@ def parse_input(text, extractor='newspaper'):
                 article.download()
                 article.parse()
                 return unicode_to_ascii(article.text)
-        elif text.endswith('.txt'):
-            # Input is a file - need to read it
-            textfile = open(text, 'rb')
-            article = textfile.read()
-            textfile.close()
+        elif _is_input_file(text, TEXT_EXTENSIONS):
+            # Input is a file (possibly compressed) - need to read it
+            with open_input(text) as textfile:
+                article = textfile.read()
             return unicode_to_ascii(article)
+        elif _is_input_file(text, RECORD_EXTENSIONS):
+            raise ValueError('{0} holds many documents: read them with iter_records'.format(text))
         else:
             # Input is a string containing the raw text
             return unicode_to_ascii(text)
     else:
-        raise ValueError('Input text must be of type str or unicode.')
\ No newline at end of file
+        raise ValueError('Input text must be of type str or unicode.')
+
+
+def detect_compression(path):
+    """
+    Returns the compression of a file ('gzip', 'bz2', 'xz' or 'zstd'), or None if it is not compressed. The
+    compression is given by the extension of the file, or else by its leading bytes.
+    """
+    for extension, compression, _ in COMPRESSIONS:
+        if path.endswith(extension):
+            return compression
+    with open(path, 'rb') as input_file:
+        header = input_file.read(6)
+    for _, compression, magic in COMPRESSIONS:
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def open_input(path):
+    """
+    Opens a file for reading in binary mode. Compressed files are decompressed as they are read, so that neither
+    the compressed nor the decompressed contents are held in memory or written to disk as a whole. xz needs the
+    lzma module (backports.lzma on Python 2) and zstd the zstandard package.
+    """
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    elif compression == 'bz2':
+        return bz2.BZ2File(path, 'rb')
+    elif compression == 'xz':
+        try:
+            import lzma
+        except ImportError:
+            from backports import lzma
+        return lzma.open(path, 'rb')
+    elif compression == 'zstd':
+        import zstandard
+        # The buffered reader provides line iteration, which zstandard's reader lacks
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')))
+    return open(path, 'rb')
+
+
+def iter_records(source, field='text'):
+    """
+    Yields the documents of a file one at a time, decompressing it as a stream if it is compressed (see
+    open_input), so that a whole archive never has to be held in memory. Records are the lines of a JSONL file
+    (ending in .jsonl, optionally followed by the extension of its compression), where each line is a JSON object
+    whose "field" holds the text of a document, or a JSON string; any other file is a single document.
+
+    :param source: path to a file, or an open file object of JSONL records
+    :param field: the field of the JSON objects that holds the text of the document
+    """
+    if not isinstance(source, basestring):
+        lines = source
+    elif _strip_compression(source).endswith(RECORD_EXTENSIONS):
+        lines = open_input(source)
+    else:
+        with open_input(source) as input_file:
+            yield unicode_to_ascii(input_file.read())
+        return
+
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                if field not in record:
+                    raise ValueError('Record on line {0} has no field "{1}"'.format(line_number, field))
+                record = record[field]
+            yield unicode_to_ascii(record)
+    finally:
+        if lines is not source:
+            lines.close()
+
+
+def _is_input_file(text, extensions):
+    """Whether text is the path of an existing file with one of the extensions (possibly compressed)."""
+    if not _strip_compression(text).endswith(extensions):
+        return False
+    try:
+        return os.path.isfile(text)
+    except (TypeError, ValueError, UnicodeError):  # Raw text that cannot be a path, e.g. with null bytes
+        return False
+
+
+def _strip_compression(path):
+    for extension, _, _ in COMPRESSIONS:
+        if path.endswith(extension):
+            return path[:-len(extension)]
+    return path
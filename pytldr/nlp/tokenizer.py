@@ -1,22 +1,166 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import re
 import os.path
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 from nltk.stem import SnowballStemmer
 from nltk.tokenize.punkt import PunktSentenceTokenizer, PunktParameters
 from string import punctuation
 from preprocess import unicode_to_ascii
 
 
+class SentenceCache(object):
+    """
+    Thread-safe least recently used cache of sanitized sentences, shared across documents. Syndicated content
+    (e.g. wire stories republished with small edits) repeats most of its sentences verbatim, and a cached sentence
+    costs a hash of its raw text instead of lowercasing, stopword removal and stemming. Entries are keyed by a
+    digest of the raw sentence and of the settings of the tokenizer, so one cache may be shared by tokenizers of
+    different languages or stopwords.
+
+    The cache is bounded by a number of entries and, optionally, by an estimate of the memory its entries take.
+
+    Example:
+
+        tokenizer = Tokenizer('english', cache=SentenceCache(max_entries=100000, max_bytes=64 * 2 ** 20))
+        summarizer = TextRankSummarizer(tokenizer)
+        print tokenizer.cache.hit_rate
+    """
+
+    # Estimated bytes of an entry besides its key and sanitized sentence: the ordered dict's node and slot, and the
+    # cached tuple
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_entries=100000, max_bytes=None):
+        """
+        :param max_entries: maximum number of cached sentences
+        :param max_bytes: maximum estimated memory of the cached sentences in bytes (None for no limit)
+        """
+        if max_entries < 1:
+            raise ValueError('Parameter "max_entries" must be a positive integer')
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError('Parameter "max_bytes" must be None or a positive integer')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries[key] = entry
+            return entry
+
+    def put(self, key, entry):
+        """
+        :param key: digest of a raw sentence (see Tokenizer)
+        :param entry: tuple of (sanitized sentence, or None if it was not sanitized, number of significant words)
+        """
+        size = self._size(key, entry)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= self._size(key, previous)
+            self._entries[key] = entry
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and
+                                                            self.nbytes > self.max_bytes and len(self._entries) > 1):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.nbytes -= self._size(evicted_key, evicted)
+                self.evictions += 1
+
+    @classmethod
+    def _size(cls, key, entry):
+        return sys.getsizeof(key) + (sys.getsizeof(entry[0]) if entry[0] is not None else 0) + cls.ENTRY_OVERHEAD
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Returns the hit and eviction counts, hit rate, number of entries and estimated memory in bytes."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self.nbytes}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_entries'] = OrderedDict(self._entries)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
 class Tokenizer(object):
+    """
+    Splits text into sentences and sanitizes them. Tokenizers are reentrant and may be shared between threads:
+    their state (stemmer and stopwords) is not modified after construction, and every call builds its own
+    sentence splitter.
+
+    Sentences are split either by NLTK's Punkt tokenizer (the default) or by a rule-based splitter made of
+    compiled regular expressions, which reproduces the decisions of Punkt without training data (see
+    split_sentences) several times faster. Sanitized sentences can be cached across documents (see SentenceCache).
+    """
+
+    SPLITTERS = ('punkt', 'regex')
+    ABBREVIATIONS = frozenset(['dr', 'vs', 'mr', 'mrs', 'ms', 'prof', 'mt', 'inc', 'i.e', 'e.g'])
+
+    # A candidate sentence end: a word ending with sentence-final punctuation and optional closing quotes or
+    # brackets, followed by whitespace or the end of the line
+    _RE_SENTENCE_END = re.compile(r'(?<!\S)(\S*?)([.?!]+)([\'")\]}]*)(?=\s|$)')
+    _RE_NEXT_TOKEN = re.compile(r'\s*(\S?)')
+    _RE_INITIAL = re.compile(r'[^\W\d]$', re.UNICODE)
+    _RE_NUMBER = re.compile(r'-?[.,]?\d[\d,.-]*$')
+    _NOT_SENTENCE_STARTERS = frozenset(';:,.!?')
+    # The edits made to the text before Punkt splits it (see _punkt_spans)
+    _RE_PUNKT_EDITS = re.compile(r'(?<=[?!.])(?=")|\n')
+    _RE_PARAGRAPH_BREAK = re.compile(r'\s{4,}')
+
+    def __init__(self, language='english', stopwords=None, stemming=True, splitter='punkt', cache=None):
+        """
+        :param language: language of the stemmer and of the built-in stopwords
+        :param stopwords: list of stopwords, path to a text file with one stopword per line, or None for the
+        built-in list of the language
+        :param stemming: whether words are stemmed
+        :param splitter: sentence splitter, 'punkt' (the default) or 'regex'
+        :param cache: SentenceCache of sanitized sentences, which may be shared with other tokenizers (None by
+        default, i.e. no caching)
+        """
+        if splitter not in self.SPLITTERS:
+            raise ValueError('Parameter "splitter" must take one of the values "punkt" or "regex"')
 
-    def __init__(self, language='english', stopwords=None, stemming=True):
+        self._language = language
+        self._splitter = splitter
         if stemming:
             self._stemmer = SnowballStemmer(language)
         else:
             self._stemmer = None
 
         if isinstance(stopwords, list):
-            self._stopwords = stopwords
+            self._stopwords = list(stopwords)  # A copy, so that the caller's list is not shared
         elif isinstance(stopwords, (str, unicode)):
             # stopwords argument is a path
             try:
@@ -30,6 +174,25 @@ class Tokenizer(object):
             application_root = os.path.dirname(__file__)
             stopwords_file = os.path.join(application_root, '..', stopwords_dir)
             self._stopwords = self._load_stopwords(stopwords_file)
+        self._stopword_set = frozenset(self._stopwords)
+
+        # Distinguishes the cache entries of tokenizers that sanitize sentences differently
+        settings = hashlib.sha1('{0}\n{1}\n'.format(language, stemming))
+        for word in sorted(self._stopword_set):
+            settings.update(word.encode('utf-8') if isinstance(word, unicode) else word)
+            settings.update('\n')
+        self._cache_prefix = settings.digest()
+        self.cache = cache
+
+    def __getstate__(self):
+        # The stemmer holds bound methods, which cannot be pickled on Python 2: it is rebuilt when unpickling
+        state = self.__dict__.copy()
+        state['_stemmer'] = self._stemmer is not None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stemmer = SnowballStemmer(self._language) if state['_stemmer'] else None
 
     @property
     def stopwords(self):
@@ -52,10 +215,10 @@ class Tokenizer(object):
     def remove_stopwords(self, tokens):
         """Remove all stopwords from a list of word tokens or a string of text."""
         if isinstance(tokens, (list, tuple)):
-            return [word for word in tokens if word.lower() not in self._stopwords]
+            return [word for word in tokens if word.lower() not in self._stopword_set]
         else:
             return ' '.join(
-                [word for word in tokens.split(' ') if word.lower() not in self._stopwords]
+                [word for word in tokens.split(' ') if word.lower() not in self._stopword_set]
             )
 
     def stem(self, word):
@@ -67,7 +230,20 @@ class Tokenizer(object):
 
     def stem_tokens(self, tokens):
         """Perform snowball (Porter2) stemming on a list of word tokens."""
-        return [self.stem(word) for word in tokens]
+        if not self._stemmer:
+            return list(tokens)
+
+        stem = self._stemmer.stem
+        stems = []
+        for word in tokens:
+            word = stem(word)
+            try:
+                # The stemmer returns unicode strings, which are ASCII when the words are: encoding them is much
+                # cheaper than normalizing them
+                stems.append(word.encode('ascii'))
+            except UnicodeError:
+                stems.append(unicode_to_ascii(word))
+        return stems
 
     @staticmethod
     def strip_punctuation(text, exclude='', include=''):
@@ -84,43 +260,16 @@ class Tokenizer(object):
 
     def tokenize_words(self, text):
         """Tokenize an input string into a list of words (with punctuation removed)."""
-        return [
-            self.strip_punctuation(word) for word in text.split(' ')
-            if self.strip_punctuation(word)
-        ]
+        words = (word.strip(punctuation) for word in text.split(' '))
+        return [word for word in words if word]
 
     def sanitize_text(self, text):
-        tokens = self.tokenize_words(text.lower())
-        tokens = self.remove_stopwords(tokens)
-        tokens = self.stem_tokens(tokens)
-        sanitized_text = ' '.join(tokens)
-        return sanitized_text
+        return ' '.join(self.stem_tokens(self._significant_words(text)))
 
-    @staticmethod
-    def _remove_whitespace(text):
-        """Remove excess whitespace from the ends of a given input string."""
-        # while True:
-        #     old_text = text
-        #     text = text.replace('  ', ' ')
-        #     if text == old_text:
-        #         return text
-        non_spaces = re.finditer(r'[^ ]', text)
-
-        if not non_spaces:
-            return text
-
-        first_non_space = non_spaces.next()
-        first_non_space = first_non_space.start()
-
-        last_non_space = None
-        for item in non_spaces:
-            last_non_space = item
-
-        if not last_non_space:
-            return text[first_non_space:]
-        else:
-            last_non_space = last_non_space.end()
-            return text[first_non_space:last_non_space]
+    def _significant_words(self, text):
+        """The words of a string of text that are not stopwords, lowercased and stripped of punctuation."""
+        stopwords = self._stopword_set
+        return [word for word in self.tokenize_words(text.lower()) if word not in stopwords]
 
     def tokenize_sentences(self, text, word_threshold=5):
         """
@@ -131,14 +280,34 @@ class Tokenizer(object):
         (to count all sentences set equal to 1; 5 by default)
         :return: list of sentences
         """
+        return self.sanitize_sentences(self.split_sentences(text), word_threshold=word_threshold)
+
+    def split_sentences(self, text):
+        """
+        Splits an input string into a list of "unprocessed" sentences for display. This is the first stage of
+        tokenize_sentences. Line breaks always end sentences (titles often lack a full stop).
+        """
+        if self._splitter == 'regex':
+            return self._split_sentences_regex(text)[0]
+        return self._split_sentences_punkt(text)[0]
+
+    def split_sentence_spans(self, text):
+        """
+        As split_sentences, but also returns the (start, end) offsets of each sentence in the input string. The
+        span of a sentence is its text before any normalization (its line breaks and quotes are left as they are).
+
+        :return: tuple of (unprocessed sentences, list of (start, end) offsets)
+        """
+        if self._splitter == 'regex':
+            return self._split_sentences_regex(text)
+        return self._split_sentences_punkt(text, spans=True)
+
+    def _split_sentences_punkt(self, text, spans=False):
+        """Returns the sentences of a text and, if spans is True, their offsets in the text (None otherwise)."""
         punkt_params = PunktParameters()
-        # Not using set literal to allow compatibility with Python 2.6
-        punkt_params.abbrev_types = set([
-            'dr', 'vs', 'mr', 'mrs', 'ms', 'prof', 'mt', 'inc', 'i.e', 'e.g'
-        ])
+        punkt_params.abbrev_types = set(self.ABBREVIATIONS)
         sentence_splitter = PunktSentenceTokenizer(punkt_params)
 
-        # 1. TOKENIZE "UNPROCESSED" SENTENCES FOR DISPLAY
         # Need to adjust quotations for correct sentence splitting
         text_unprocessed = text.replace('?"', '? "').replace('!"', '! "').replace('."', '. "')
 
@@ -146,37 +315,216 @@ class Tokenizer(object):
         text_unprocessed = text_unprocessed.replace('\n', ' . ')
 
         # Perform sentence splitting
-        unprocessed_sentences = sentence_splitter.tokenize(text_unprocessed)
+        boundaries = list(sentence_splitter.span_tokenize(text_unprocessed))
+        unprocessed_sentences = [text_unprocessed[start:end] for start, end in boundaries]
 
-        # Now that sentences have been split we can return them back to their normal formatting
+        # Now that sentences have been split we can return them back to their normal formatting. The sentence
+        # splitter returns slices of the text, which only need converting to ASCII if the text is unicode.
+        is_unicode = isinstance(text, unicode)
         for ndx, sentence in enumerate(unprocessed_sentences):
-            sentence = unicode_to_ascii(sentence)  # Sentence splitter returns unicode strings
+            if is_unicode:
+                sentence = unicode_to_ascii(sentence)
             sentence = sentence.replace('? " ', '?" ').replace('! " ', '!" ').replace('. " ', '." ')
-            sentence = self._remove_whitespace(sentence)  # Remove excess whitespace
+            sentence = sentence.strip(' ')  # Remove excess whitespace
             sentence = sentence[:-2] if (sentence.endswith(' .') or sentence.endswith(' . ')) else sentence
             unprocessed_sentences[ndx] = sentence
 
-        # 2. PROCESS THE SENTENCES TO PERFORM STEMMING, STOPWORDS REMOVAL ETC. FOR MATRIX COMPUTATION
-        processed_sentences = [self.sanitize_text(sen) for sen in unprocessed_sentences]
+        if not spans:
+            return unprocessed_sentences, None
+        return unprocessed_sentences, self._punkt_spans(text, boundaries)
+
+    @classmethod
+    def _punkt_spans(cls, text, boundaries):
+        """
+        Maps the boundaries of the sentences that Punkt found in the text prepared by _split_sentences_punkt back to
+        offsets in the original text. The text is copied unchanged in runs, between which a space is inserted before
+        each quote that follows sentence-final punctuation and each line break is replaced by ' . '; inserted
+        characters map to the character that follows them in the original text. Spans exclude the whitespace at
+        either end of a sentence.
+        """
+        runs, origins, lengths = [0], [0], []
+        for match in cls._RE_PUNKT_EDITS.finditer(text):
+            lengths.append(match.start() - origins[-1])
+            runs.append(runs[-1] + lengths[-1] + (3 if match.group() else 1))
+            origins.append(match.end())
+        lengths.append(len(text) - origins[-1])
+
+        def origin(position):
+            run = bisect_right(runs, position) - 1
+            return origins[run] + min(position - runs[run], lengths[run])
+
+        spans = []
+        for start, end in boundaries:
+            start, end = origin(start), origin(end - 1) + 1
+            sentence = text[start:end]
+            start += len(sentence) - len(sentence.lstrip())
+            spans.append((start, max(start, end - len(sentence) + len(sentence.rstrip()))))
+        return spans
+
+    def _split_sentences_regex(self, text):
+        """
+        Rule-based sentence splitting, following the decisions that Punkt makes without training data:
+
+        - "?" and "!" end a sentence, and so does a full stop, except after an abbreviation in ABBREVIATIONS
+          (including the last part of a hyphenated word) and after an ellipsis
+        - a full stop after an initial or a number only ends a sentence if the next word does not start in
+          lower case or with punctuation (and, for initials, does not start in upper case either)
+        - closing quotes and brackets after the punctuation belong to the sentence they close, as does punctuation
+          that stands alone after it on the same line (e.g. the quote in 'There is no Plan B. "')
+
+        Unlike Punkt, it never returns sentences that consist only of punctuation. Returns the sentences and their
+        (start, end) offsets in the text.
+        """
+        sentences, spans = [], []
+        line_start = 0
+        for line in text.split('\n'):
+            first = len(sentences)
+            start = 0
+            for match in self._RE_SENTENCE_END.finditer(line):
+                if self._is_sentence_end(match.group(1), match.group(2), line, match.end()):
+                    self._append_sentence(sentences, spans, line[start:match.end()], line_start + start, first)
+                    start = match.end()
+            self._append_sentence(sentences, spans, line[start:], line_start + start, first)
+            line_start += len(line) + 1
+
+        return sentences, spans
+
+    def _is_sentence_end(self, word, marks, line, end):
+        if '?' in marks or '!' in marks:
+            return True
+        if len(marks) > 1:  # Ellipsis
+            return False
+
+        word = word.lstrip('"\'([{').lower()
+        if word in self.ABBREVIATIONS or word.split('-')[-1] in self.ABBREVIATIONS:
+            return False
+
+        is_initial = self._RE_INITIAL.match(word) is not None
+        if is_initial or self._RE_NUMBER.match(word):
+            next_char = self._RE_NEXT_TOKEN.match(line, end).group(1)
+            if next_char and (next_char.islower() or next_char in self._NOT_SENTENCE_STARTERS):
+                return False
+            if is_initial and next_char.isupper():
+                return False
+
+        return True
+
+    @staticmethod
+    def _append_sentence(sentences, spans, fragment, offset, first):
+        """
+        Appends a sentence of the line whose first sentence is sentences[first], and its span given the offset of
+        the fragment of text it was taken from. Punctuation-only fragments are appended to the previous sentence of
+        the line, or dropped if there is none.
+        """
+        sentence = fragment.strip()
+        start = offset + len(fragment) - len(fragment.lstrip())
+        if isinstance(sentence, unicode):
+            sentence = unicode_to_ascii(sentence)
+        if sentence.strip(punctuation):
+            sentences.append(sentence)
+            spans.append((start, start + len(fragment.strip())))
+        elif sentence and len(sentences) > first:
+            sentences[-1] += ' ' + sentence
+            spans[-1] = (spans[-1][0], start + len(fragment.strip()))
+
+    def sanitize_sentences(self, unprocessed_sentences, word_threshold=5):
+        """
+        Performs stemming, stopword removal etc. on a list of sentences returned by split_sentences, and drops
+        those with too few significant words. This is the second stage of tokenize_sentences.
+
+        :return: tuple of (processed sentences, unprocessed sentences)
+        """
+        processed_sentences, kept = self._sanitize_kept(unprocessed_sentences, word_threshold)
+        return processed_sentences, [unprocessed_sentences[ndx] for ndx in kept]
+
+    def _sanitize_kept(self, unprocessed_sentences, word_threshold=5):
+        """As sanitize_sentences, but returns the indices of the kept sentences instead of the sentences."""
+        processed_sentences, kept = [], []
+        for ndx, sentence in enumerate(unprocessed_sentences):
+            processed_sentence = self._sanitize_significant(sentence, word_threshold)
+            if processed_sentence is not None:
+                processed_sentences.append(processed_sentence)
+                kept.append(ndx)
 
-        # Sentences should contain at least 'word_threshold' significant terms
-        filter_sentences = [i for i in range(len(processed_sentences))
-                            if len(processed_sentences[i].replace('.', '').split(' ')) > word_threshold]
+        return processed_sentences, kept
 
-        processed_sentences = [processed_sentences[i] for i in filter_sentences]
-        unprocessed_sentences = [unprocessed_sentences[i] for i in filter_sentences]
+    def _sanitize_significant(self, sentence, word_threshold):
+        """
+        Returns the sanitized sentence if it contains more than word_threshold significant words, None otherwise.
 
-        return processed_sentences, unprocessed_sentences
+        Stemming does not change the number of words, so words are counted before they are stemmed and dropped
+        sentences are never stemmed; sentences with too few words to pass are not even tokenized. A sentence
+        without significant words counts as one word (as its sanitized text, '', always did).
+
+        With a cache, the sanitized sentence and its number of words are looked up by a digest of the raw sentence.
+        Sentences dropped for their number of words are cached unsanitized, so a lower word_threshold sanitizes
+        them on their next occurrence.
+        """
+        if self.cache is None:
+            return self._sanitize_counted(sentence, word_threshold)[0]
+        if not isinstance(sentence, unicode) and sentence.count(' ') < word_threshold:
+            return None
+
+        digest = hashlib.sha1(self._cache_prefix)
+        if isinstance(sentence, unicode):
+            digest.update('u')
+            digest.update(sentence.encode('utf-8'))
+        else:
+            digest.update('s')
+            digest.update(sentence)
+        key = digest.digest()
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            processed_sentence, num_words = entry
+            if num_words <= word_threshold:
+                return None
+            if processed_sentence is not None:
+                return processed_sentence
+        entry = self._sanitize_counted(sentence, word_threshold)
+        self.cache.put(key, entry)
+        return entry[0] if entry[1] > word_threshold else None
+
+    def _sanitize_counted(self, sentence, word_threshold):
+        """
+        Returns the sanitized sentence if it contains more than word_threshold significant words (None otherwise),
+        and its number of significant words (or an upper bound of it for sentences with too few spaces).
+        """
+        if isinstance(sentence, unicode):
+            # Conversion to ASCII can turn characters within words into spaces (e.g. no-break spaces), so words
+            # are only counted once the sentence is sanitized
+            processed_sentence = self.sanitize_text(sentence)
+            num_words = len(processed_sentence.replace('.', '').split(' '))
+            return processed_sentence if num_words > word_threshold else None, num_words
+
+        if sentence.count(' ') < word_threshold:
+            return None, sentence.count(' ') + 1
+        words = self._significant_words(sentence)
+        num_words = max(len(words), 1)
+        if num_words <= word_threshold:
+            return None, num_words
+        return ' '.join(self.stem_tokens(words)), num_words
 
     @classmethod
     def tokenize_paragraphs(cls, text):
         """Convert an input string into a list of paragraphs."""
-        paragraphs = []
-        paragraphs_first_pass = text.split('\n')
-        for p in paragraphs_first_pass:
-            paragraphs_second_pass = re.split('\s{4,}', p)
-            paragraphs += paragraphs_second_pass
-
-        # Remove empty strings from list
-        paragraphs = [p for p in paragraphs if p]
-        return paragraphs
\ No newline at end of file
+        return [text[start:end] for start, end in cls.paragraph_spans(text)]
+
+    @classmethod
+    def paragraph_spans(cls, text):
+        """
+        Returns the (start, end) offsets of the paragraphs of an input string: its lines, split further at runs of
+        four or more whitespace characters, without the empty ones.
+        """
+        spans = []
+        line_start = 0
+        for line in text.split('\n'):
+            start = 0
+            for match in cls._RE_PARAGRAPH_BREAK.finditer(line):
+                if match.start() > start:
+                    spans.append((line_start + start, line_start + match.start()))
+                start = match.end()
+            if len(line) > start:
+                spans.append((line_start + start, line_start + len(line)))
+            line_start += len(line) + 1
+        return spans
\ No newline at end of file
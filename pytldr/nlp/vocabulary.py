@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import hashlib
+import json
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from .tokenizer import Tokenizer
+from .preprocess import parse_input
+
+
+class DocumentFrequencies(object):
+    """
+    The number of documents of a corpus that each term occurs in, for pruning the vocabulary of the documents that
+    are summarized against the statistics of a whole corpus (see VocabularyPruner). Terms are those of the
+    sentence matrices, i.e. the words of the sanitized (stemmed) sentences.
+
+    Example:
+
+        frequencies = DocumentFrequencies.fit(documents)
+        frequencies.save('corpus_df.json')
+        pruner = VocabularyPruner(max_df=0.5, corpus=DocumentFrequencies.load('corpus_df.json'))
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, frequencies=None, num_documents=0, tokenizer=None):
+        """
+        :param frequencies: dict mapping each term to the number of documents it occurs in
+        :param num_documents: number of documents in the corpus
+        :param tokenizer: Tokenizer used to sanitize the documents added with add (English tokenizer by default)
+        """
+        self.frequencies = dict(frequencies) if frequencies is not None else {}
+        self.num_documents = num_documents
+        self._tokenizer = tokenizer
+        self._analyzer = CountVectorizer().build_analyzer()
+        self._fingerprint = None
+
+    @classmethod
+    def fit(cls, documents, tokenizer=None):
+        """
+        :param documents: list of documents (strings of text, paths to text files or URLs starting with http)
+        :param tokenizer: Tokenizer used to split and sanitize the documents (English tokenizer by default). It
+        should sanitize sentences as the tokenizer of the summarizers does.
+        """
+        frequencies = cls(tokenizer=tokenizer)
+        for document in documents:
+            frequencies.add(document)
+        return frequencies
+
+    def add(self, document):
+        """Counts the terms of one more document of the corpus."""
+        if self._tokenizer is None:
+            self._tokenizer = Tokenizer('english')
+        sentences, _ = self._tokenizer.tokenize_sentences(parse_input(document))
+        for term in set(term for sentence in sentences for term in self._analyzer(sentence)):
+            self.frequencies[term] = self.frequencies.get(term, 0) + 1
+        self.num_documents += 1
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def lookup(self, terms):
+        """Returns the document frequency of each of a list of terms, or -1 for terms that the corpus lacks."""
+        return np.array([self.frequencies.get(term, -1) for term in terms], dtype=np.int64)
+
+    @property
+    def fingerprint(self):
+        """Digest of the statistics, which identifies them in cache keys."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1(str(self.num_documents))
+            for term, frequency in sorted(self.frequencies.items()):
+                digest.update('{0}\t{1}\n'.format(term, frequency))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def save(self, path):
+        with open(path, 'wb') as frequencies_file:
+            json.dump({'version': self.FORMAT_VERSION, 'num_documents': self.num_documents,
+                       'frequencies': self.frequencies}, frequencies_file, sort_keys=True)
+
+    @classmethod
+    def load(cls, path, tokenizer=None):
+        with open(path, 'rb') as frequencies_file:
+            data = json.load(frequencies_file)
+        if data['version'] != cls.FORMAT_VERSION:
+            raise ValueError('Unsupported document frequencies format version {0}'.format(data['version']))
+        # Terms are str in the vocabularies of the sentence matrices
+        frequencies = dict((term.encode('utf-8'), frequency) for term, frequency in data['frequencies'].items())
+        return cls(frequencies, data['num_documents'], tokenizer)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_analyzer']  # A closure, which cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._analyzer = CountVectorizer().build_analyzer()
+
+
+class VocabularyPruner(object):
+    """
+    Selects the terms that become columns of the sentence matrices. Terms occurring in very few sentences (e.g.
+    hapaxes, which only ever match the sentence they occur in) or in most of them widen the matrices, and with them
+    the SVD of LSA and the similarity products of TextRank, while contributing little to the ranking. Pruning is
+    applied to the term counts, before they are weighted.
+
+    Document frequencies are counted over the sentences of the document that is summarized, or, if corpus
+    statistics are given (see DocumentFrequencies), over the documents of the corpus. Terms that the corpus lacks
+    are never pruned by the frequency thresholds, as they are likely to be specific to the document.
+
+    Example:
+
+        summarizer = LsaOzsoy(prune_vocabulary=VocabularyPruner(min_df=2, max_df=0.5))
+    """
+
+    def __init__(self, min_df=1, max_df=1.0, max_features=None, corpus=None):
+        """
+        :param min_df: terms occurring in fewer sentences (or corpus documents) than this are pruned: a number of
+        sentences if an int, or a fraction of the sentences if a float (1 by default, i.e. no pruning)
+        :param max_df: terms occurring in more sentences (or corpus documents) than this are pruned: a number of
+        sentences if an int, or a fraction of the sentences if a float (1.0 by default, i.e. no pruning)
+        :param max_features: maximum number of terms kept per document: those occurring in most of its sentences,
+        among the terms that the frequency thresholds keep (None for no limit)
+        :param corpus: DocumentFrequencies, or path to saved DocumentFrequencies, which min_df and max_df apply to
+        instead of the sentences of the document (None by default)
+        """
+        for name, value in (('min_df', min_df), ('max_df', max_df)):
+            if not isinstance(value, (int, long, float)) or value < 0 or (isinstance(value, float) and value > 1):
+                raise ValueError('Parameter "{0}" must be a fraction between 0 and 1 or a number of '
+                                 'sentences'.format(name))
+        if max_features is not None and (not isinstance(max_features, (int, long)) or max_features < 1):
+            raise ValueError('Parameter "max_features" must be None or a positive integer')
+        if corpus is not None and not isinstance(corpus, DocumentFrequencies):
+            corpus = DocumentFrequencies.load(corpus)
+
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.corpus = corpus
+
+    def __repr__(self):
+        # Identifies the pruning in cache keys
+        corpus = self.corpus.fingerprint if self.corpus is not None else None
+        return 'VocabularyPruner(min_df={0!r}, max_df={1!r}, max_features={2!r}, corpus={3})'.format(
+            self.min_df, self.max_df, self.max_features, corpus
+        )
+
+    def select(self, frequencies, num_sentences, terms=None, groups=None):
+        """
+        Returns a boolean mask of the columns of a sentence-term matrix that are kept.
+
+        :param frequencies: the number of sentences that the term of each column occurs in
+        :param num_sentences: the number of sentences of the document, or of the document of each column
+        :param terms: the term of each column, which corpus statistics require (None for hashed columns)
+        :param groups: the document of each column, if the matrix holds several documents, so that max_features
+        applies to each of them (None for a single document)
+        """
+        frequencies = np.asarray(frequencies)
+        if self.corpus is None:
+            keep = self._within_thresholds(frequencies, num_sentences)
+        else:
+            if terms is None:
+                raise ValueError('Corpus document frequencies require the terms of the columns')
+            corpus_frequencies = self.corpus.lookup(terms)
+            keep = corpus_frequencies < 0
+            keep |= self._within_thresholds(corpus_frequencies, self.corpus.num_documents)
+
+        if self.max_features is not None:
+            # Rank the kept columns of each group by decreasing frequency (ties go to the earlier column) and drop
+            # those beyond max_features
+            columns = np.flatnonzero(keep)
+            groups = np.zeros(len(frequencies), dtype=np.int64) if groups is None else np.asarray(groups)
+            order = columns[np.lexsort((columns, -frequencies[columns], groups[columns]))]
+            ordered_groups = groups[order]
+            rank = np.arange(len(order)) - np.searchsorted(ordered_groups, ordered_groups)
+            keep[order[rank >= self.max_features]] = False
+        return keep
+
+    def _within_thresholds(self, frequencies, num_documents):
+        num_documents = np.asarray(num_documents)
+        min_count = self.min_df if isinstance(self.min_df, (int, long)) else self.min_df * num_documents
+        max_count = self.max_df if isinstance(self.max_df, (int, long)) else self.max_df * num_documents
+        return (frequencies >= min_count) & (frequencies <= max_count)
@@ -1,5 +1,17 @@
-from .lsa import LsaOzsoy, LsaSummarizer, LsaSteinberger
+from .lsa import LsaOzsoy, LsaSummarizer, LsaSteinberger, LsaEngine, DecompositionCache
 from .relevance import RelevanceSummarizer
 from .textrank import TextRankSummarizer
+from .incremental import IncrementalSummarizer
+from .multidoc import MultiDocumentSummarizer
+from .parallel import ParallelSummarizer
+from .query import QueryIndex
+from .auto import AutoSummarizer, CostModel
+from .instrumentation import (
+    StageTimings, MemoryTimings, TimingSink, LoggingSink, HistogramSink, PrometheusExporter
+)
 
-__all__ = [LsaOzsoy, LsaSummarizer, LsaSteinberger, RelevanceSummarizer, TextRankSummarizer]
\ No newline at end of file
+__all__ = [
+    LsaOzsoy, LsaSummarizer, LsaSteinberger, LsaEngine, DecompositionCache, RelevanceSummarizer, TextRankSummarizer,
+    IncrementalSummarizer, MultiDocumentSummarizer, ParallelSummarizer, QueryIndex, AutoSummarizer, CostModel,
+    StageTimings, MemoryTimings, TimingSink, LoggingSink, HistogramSink, PrometheusExporter
+]
\ No newline at end of file
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import json
+import os
+import platform
+from multiprocessing import cpu_count
+from timeit import default_timer
+import numpy as np
+from scipy.optimize import nnls
+from ..nlp import Tokenizer, parse_input
+from .baseclass import BaseSummarizer
+from .instrumentation import NULL_TIMINGS
+from .deadline import NO_DEADLINE
+from .lsa import BaseLsaSummarizer, LsaOzsoy, LsaSteinberger
+from .relevance import RelevanceSummarizer
+from .textrank import TextRankSummarizer
+
+DEFAULT_COST_MODEL = os.path.join(os.path.dirname(__file__), 'cost_model.json')
+
+# Candidate summarizers of AutoSummarizer, in order of preference: (name, class, parameters of _rank_sentences)
+DEFAULT_CANDIDATES = (
+    ('textrank', TextRankSummarizer, {}),
+    ('lsa_steinberger', LsaSteinberger, {'topics': 4}),
+    ('lsa_ozsoy', LsaOzsoy, {'topics': 4}),
+    ('relevance', RelevanceSummarizer, {})
+)
+
+
+class DocumentFeatures(object):
+    """
+    The properties of a tokenized document that the cost of ranking its sentences depends on: the number of
+    sentences, of distinct terms and of non-zero elements of its sentence-term matrix, and the summary length.
+    """
+
+    def __init__(self, sentences, terms, nnz, length):
+        self.sentences = sentences
+        self.terms = terms
+        self.nnz = nnz
+        self.length = length
+
+    @classmethod
+    def measure(cls, sentences, length, hash_features=None, pruner=None):
+        matrix = BaseSummarizer._compute_matrix(sentences, hash_features=hash_features, pruner=pruner)
+        terms = matrix.shape[1] if hash_features is None else len(np.unique(matrix.indices))
+        return cls(matrix.shape[0], terms, matrix.nnz, length)
+
+    def basis(self, kind, topics=4):
+        """
+        The terms of the cost of an algorithm of the given kind (see cost_kind), of which its running time is a
+        linear combination:
+
+        - textrank: the similarity graph and PageRank grow with nnz and (at most) the square of the sentences
+        - relevance: each of the "length" greedy steps costs a pass over the non-zero elements
+        - lsa: ARPACK's matrix-vector products cost topics * nnz, and its orthogonalizations topics^2 per sentence
+          and term
+        """
+        n = self.sentences
+        if kind == 'textrank':
+            return [1, self.nnz, n * n]
+        elif kind == 'relevance':
+            return [1, self.nnz, self.length * self.nnz]
+        elif kind == 'lsa':
+            return [1, self.nnz, topics * self.nnz, topics * topics * (n + self.terms)]
+        return [1, n, self.nnz, n * n]
+
+
+def cost_kind(summarizer):
+    """The kind of cost model that fits a summarizer: 'textrank', 'relevance', 'lsa' or 'generic'."""
+    if isinstance(summarizer, TextRankSummarizer):
+        return 'textrank'
+    elif isinstance(summarizer, RelevanceSummarizer):
+        return 'relevance'
+    elif isinstance(summarizer, BaseLsaSummarizer):
+        return 'lsa'
+    return 'generic'
+
+
+class CostModel(object):
+    """
+    Predicts the time that each of a set of named candidate summarizers takes to rank the sentences of a document,
+    from the features of the document (see DocumentFeatures). The time of each candidate is modelled as a linear
+    combination, with non-negative coefficients, of the terms of the asymptotic cost of its algorithm; the
+    coefficients are fitted to measurements on the current machine by calibrate.
+
+    Example:
+
+        model = CostModel.calibrate(AutoSummarizer.default_candidates(), documents)
+        model.save('cost_model.json')
+        summarizer = AutoSummarizer(cost_model='cost_model.json', latency_target=0.5)
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, models, machine=None):
+        """
+        :param models: dict mapping the name of each candidate to a tuple of (cost kind, coefficients)
+        :param machine: description of the machine the model was calibrated on
+        """
+        self.models = dict((name, (kind, np.asarray(coefficients, dtype=np.float64)))
+                           for name, (kind, coefficients) in models.items())
+        self.machine = machine if machine is not None else _machine()
+
+    def __contains__(self, name):
+        return name in self.models
+
+    def predict(self, name, features, topics=4):
+        """Predicted time in seconds for the candidate to rank the sentences of a document with the given features."""
+        kind, coefficients = self.models[name]
+        return float(np.dot(coefficients, features.basis(kind, topics)))
+
+    @classmethod
+    def calibrate(cls, candidates, documents, tokenizer=None, length=5, repeat=3):
+        """
+        Measures the time that each candidate takes to rank the sentences of each document, and fits the model.
+
+        :param candidates: list of (name, summarizer, parameters of its _rank_sentences) tuples
+        :param documents: list of documents (strings of text or paths), covering the range of sizes that the model
+        should predict
+        :param tokenizer: Tokenizer used to split and sanitize the documents (English tokenizer by default)
+        :param length: summary length in sentences
+        :param repeat: timed repetitions per document and candidate (the fastest one is kept)
+        :return: the CostModel. Its "samples" attribute maps each candidate's name to the list of (features,
+        seconds) measured.
+        """
+        tokenizer = tokenizer if tokenizer is not None else Tokenizer('english')
+        tokenized = [tokenizer.tokenize_sentences(parse_input(document))[0] for document in documents]
+        tokenized = [sentences for sentences in tokenized if len(sentences) > length]
+
+        models, samples = {}, {}
+        for name, summarizer, params in candidates:
+            kind, topics = cost_kind(summarizer), _topics(params)
+            samples[name] = []
+            for sentences in tokenized:
+                features = DocumentFeatures.measure(sentences, length, summarizer._hash_features,
+                                                    summarizer._prune_vocabulary)
+                times = []
+                for _ in range(repeat):
+                    start = default_timer()
+                    try:
+                        summarizer._rank_sentences(sentences, length, **params)
+                    except ValueError:  # E.g. the rank of the matrix is too low for LSA
+                        break
+                    times.append(default_timer() - start)
+                if times:
+                    samples[name].append((features, min(times)))
+
+            if samples[name]:
+                basis = np.array([sample_features.basis(kind, topics) for sample_features, _ in samples[name]],
+                                 dtype=np.float64)
+                seconds = np.array([time for _, time in samples[name]])
+                models[name] = (kind, cls._fit(basis, seconds))
+
+        model = cls(models)
+        model.samples = samples
+        return model
+
+    @staticmethod
+    def _fit(basis, seconds):
+        """Non-negative least squares fit of the relative error, with the columns scaled for conditioning."""
+        scale = basis.max(axis=0)
+        scale[scale == 0] = 1
+        # Weighting each equation by 1 / seconds fits the relative error, so that small documents count as much as
+        # large ones
+        coefficients, _ = nnls(basis / scale / seconds[:, np.newaxis], np.ones(len(seconds)))
+        return coefficients / scale
+
+    def save(self, path):
+        with open(path, 'wb') as model_file:
+            json.dump({
+                'version': self.FORMAT_VERSION, 'machine': self.machine,
+                'models': dict((name, {'kind': kind, 'coefficients': list(coefficients)})
+                               for name, (kind, coefficients) in self.models.items())
+            }, model_file, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as model_file:
+            data = json.load(model_file)
+        if data['version'] != cls.FORMAT_VERSION:
+            raise ValueError('Unsupported cost model format version {0}'.format(data['version']))
+        return cls(dict((str(name), (str(model['kind']), model['coefficients']))
+                        for name, model in data['models'].items()), data.get('machine'))
+
+
+class AutoSummarizer(BaseSummarizer):
+    """
+    Chooses a summarizer for each document: the preferred candidate (by default TextRank, then LSA by the methods
+    of Steinberger and Ozsoy, then the relevance score) that the cost model predicts will summarize the document
+    within the latency target. Once the document is tokenized, the number of sentences, of terms and of non-zero
+    elements of its sentence matrix are measured, and the time already spent is added to the predicted ranking time
+    of each candidate. If no candidate meets the target, the one predicted to be fastest is used.
+
+    The bundled cost model was calibrated on a reference machine; for accurate predictions, calibrate one on the
+    machine that runs the summaries (see CostModel.calibrate and benchmarks.calibrate_auto).
+
+    Example:
+
+        summarizer = AutoSummarizer(latency_target=0.2)
+        summary = summarizer.summarize(text, length=5)
+        summary.algorithm  # Name of the chosen candidate, e.g. 'textrank'
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accepts the arguments of BaseSummarizer, and:
+
+        :param latency_target: time in seconds within which each summary should be ready (1 by default)
+        :param cost_model: CostModel, path to a saved cost model, or None for the bundled one
+        :param candidates: list of (name, summarizer, parameters of its _rank_sentences) tuples in order of
+        preference (see default_candidates, which builds the default list). Candidates missing from the cost model
+        are never chosen.
+        """
+        latency_target = kwargs.pop('latency_target', 1.0)
+        cost_model = kwargs.pop('cost_model', None)
+        candidates = kwargs.pop('candidates', None)
+        super(AutoSummarizer, self).__init__(*args, **kwargs)
+
+        if latency_target <= 0:
+            raise ValueError('Parameter "latency_target" must be a positive number of seconds')
+        if not isinstance(cost_model, CostModel):
+            cost_model = CostModel.load(cost_model if cost_model is not None else DEFAULT_COST_MODEL)
+        if candidates is None:
+            candidates = self.default_candidates(self._tokenizer, dtype=self._dtype, hash_features=self._hash_features,
+                                                 prune_vocabulary=self._prune_vocabulary)
+        candidates = [candidate for candidate in candidates if candidate[0] in cost_model]
+        if not candidates:
+            raise ValueError('The cost model has none of the candidate summarizers')
+
+        self._latency_target = latency_target
+        self._cost_model = cost_model
+        self._candidates = candidates
+
+    @staticmethod
+    def default_candidates(tokenizer=None, **params):
+        """
+        The default candidates, built with the given tokenizer and keyword arguments (e.g. dtype) of
+        BaseSummarizer.
+        """
+        return [(name, summarizer_class(tokenizer, **params), dict(rank_params))
+                for name, summarizer_class, rank_params in DEFAULT_CANDIDATES]
+
+    @property
+    def candidates(self):
+        return [name for name, _, _ in self._candidates]
+
+    def summarize(self, text, length=5):
+        """
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
+        :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
+        of the original document (e.g. 0.5)
+        :return: list of sentences for the summary. Its "algorithm" attribute holds the name of the chosen
+        candidate (None if no ranking was needed).
+        """
+        selection = {'start': default_timer(), 'algorithm': None}
+        summary = self._summarize(text, length, selection=selection)
+        summary.algorithm = selection['algorithm']
+        return summary
+
+    def predict(self, sentences, length):
+        """
+        Returns the predicted ranking time in seconds of each candidate for a list of processed sentences, as a
+        list of (name, seconds) in order of preference.
+        """
+        features = DocumentFeatures.measure(sentences, length, self._hash_features, self._prune_vocabulary)
+        return [(name, self._cost_model.predict(name, features, _topics(params)))
+                for name, _, params in self._candidates]
+
+    def _choose(self, sentences, length, elapsed=0.0):
+        predictions = self.predict(sentences, length)
+        for ndx, (_, seconds) in enumerate(predictions):
+            if elapsed + seconds <= self._latency_target:
+                return self._candidates[ndx]
+        return self._candidates[int(np.argmin([seconds for _, seconds in predictions]))]
+
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        selection=None):
+        _, summarizer, params = self._select_candidate(sentences, length, timings, selection)
+        return summarizer._rank_sentences(sentences, length, timings, deadline, weights=weights, **params)
+
+    def _score_sentences(self, sentences, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None, selection=None):
+        # Scores are used by callers that select sentences themselves, e.g. the multi-document summarizer
+        _, summarizer, params = self._select_candidate(sentences, min(5, len(sentences)), timings, selection)
+        return summarizer._score_sentences(sentences, timings, deadline, weights, **params)
+
+    def _select_candidate(self, sentences, length, timings, selection):
+        elapsed = default_timer() - selection['start'] if selection is not None else 0.0
+        with timings.stage('choose_algorithm'):
+            candidate = self._choose(sentences, length, elapsed)
+        if selection is not None:
+            selection['algorithm'] = candidate[0]
+        return candidate
+
+
+def _topics(params):
+    topics = params.get('topics', 4)
+    return topics if topics != 'auto' else BaseLsaSummarizer.MAX_AUTO_TOPICS
+
+
+def _machine():
+    return {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': cpu_count(),
+            'python': platform.python_version()}
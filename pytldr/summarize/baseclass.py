@@ -1,29 +1,648 @@
 # -*- coding: utf-8 -*-
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+import threading
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.preprocessing import normalize
-from ..nlp import Tokenizer, parse_input
+from ..nlp import Tokenizer, MinHashLSH, PreprocessedDocument, VocabularyPruner, parse_input
+from .instrumentation import StageTimings, NULL_TIMINGS
+from .deadline import Deadline, NO_DEADLINE
 from abc import ABCMeta, abstractmethod
+from warnings import warn
+
+
+class Summary(list):
+    """
+    List of summary sentences returned by summarize. Behaves exactly like a list, but also carries metadata about
+    how the summary was produced.
+
+    timings: the StageTimings record for the call, or None if the summarizer has no hooks attached
+    degraded: list of dicts describing each memory budget that was exceeded and how the input was reduced to fit
+    it (empty if the whole input was summarized)
+    truncated: True if the timeout passed before the summary was complete, in which case the summary is the best
+    one found so far
+    truncated_stages: names of the stages that were stopped early because of the timeout
+    fallback: name of the cheaper algorithm used instead of the summarizer's own, if the timeout passed before it
+    could start (None otherwise)
+    spans: array of shape (number of sentences, 2) of the (start, end) offsets of the summary sentences in the text
+    they were selected from (the text returned by pytldr.nlp.parse_input), or None if they are not known (e.g. for a
+    PreprocessedDocument)
+    """
+
+    def __init__(self, sentences, timings=None, degraded=None, deadline=NO_DEADLINE, spans=None):
+        super(Summary, self).__init__(sentences)
+        self.spans = spans
+        self.timings = timings
+        self.degraded = degraded or []
+        self.truncated = deadline.truncated
+        self.truncated_stages = list(deadline.truncated_stages)
+        self.fallback = deadline.fallback
+
+
+class BudgetWarning(UserWarning):
+    pass
 
 
 class BaseSummarizer(object):
+    """
+    Summarizers are reentrant: summarize (and summarize_batch) may be called concurrently from several threads on
+    the same instance. Each call keeps its state in local variables; the only state shared between calls is
+    immutable after construction, apart from the hooks, which are replaced rather than modified when a hook is
+    added or removed, and the LSA decomposition cache, which is locked. Hooks must be thread-safe themselves, as
+    the sinks in pytldr.summarize.instrumentation are.
+    """
     __metaclass__ = ABCMeta
 
-    def __init__(self, tokenizer=Tokenizer('english')):
-        self._tokenizer = tokenizer
+    BUDGET_STRATEGIES = ('truncate', 'sample', 'chunk')
+    DTYPES = (np.float32, np.float64)
+
+    timings_class = StageTimings
+
+    def __init__(self, tokenizer=None, hooks=None, max_sentences=None, max_bytes=None,
+                 budget_strategy='truncate', dtype=np.float64, timeout=None, collapse_duplicates=False,
+                 prune_paragraphs=None, hash_features=None, prune_vocabulary=None):
+        """
+        :param tokenizer: Tokenizer used to split and sanitize sentences (a new English tokenizer by default)
+        :param hooks: list of instrumentation sinks (see pytldr.summarize.instrumentation) that receive a
+        StageTimings record for every call to summarize. Instrumentation is disabled when there are no hooks.
+        :param max_sentences: maximum number of sentences used to build the sentence matrices (None for no limit)
+        :param max_bytes: maximum size of the input text in bytes (None for no limit)
+        :param budget_strategy: how inputs exceeding the budget are reduced: 'truncate' keeps the start of the
+        document, 'sample' keeps evenly spaced sentences (or paragraphs, for max_bytes), and 'chunk' summarizes
+        the document in chunks of max_sentences sentences and then summarizes the best sentences of each chunk
+        (for max_bytes, the text is tokenized in pieces of at most max_bytes). A BudgetWarning is issued and the
+        summary's "degraded" attribute is set whenever a budget is exceeded.
+        :param dtype: floating point precision of the sentence matrices and of all computations on them
+        (numpy.float64 by default). numpy.float32 halves the memory footprint on large documents.
+        :param timeout: time limit for each call to summarize, in seconds (None for no limit). Iterative algorithms
+        stop at the deadline and return the best summary found so far; if the deadline has already passed once the
+        text is tokenized, sentences are ranked by the cheap relevance score instead. The summary's "truncated"
+        attribute says whether this happened.
+        :param collapse_duplicates: whether repeated sentences (e.g. boilerplate in scraped pages) are collapsed
+        into a single weighted row of the sentence matrices before ranking. True collapses sentences whose sanitized
+        tokens are identical; a number between 0 and 1 also collapses near duplicates whose token sets have at least
+        this (estimated) Jaccard similarity. The weight of each row is the number of sentences it stands for, so the
+        ranking of the remaining sentences is unaffected, and the first occurrence of each sentence represents it in
+        the summary. False by default.
+        :param prune_paragraphs: fraction of the sentences (between 0 and 1) that are ranked on long documents, or
+        None to rank them all (the default). Paragraphs are first scored by the cosine similarity of their term
+        vector (the sum of the term vectors of their sentences) to that of the whole document, and only the
+        sentences of the most salient paragraphs, up to this fraction of the sentences but no fewer than the length
+        of the summary, are ranked. This reduces the size of the sentence matrices, and the cost of SVD and
+        PageRank, in proportion.
+        :param hash_features: number of columns of a hashed feature space (e.g. 2 ** 18), or None to give the sentence
+        matrices one column per term of the document (the default). With hashing, terms are mapped to columns by
+        signed feature hashing (see _hash_counts): no vocabulary is built, the number of columns is fixed whatever
+        the document, and the matrices of all documents share one column space. Summaries are the same unless
+        terms collide, which is rare when hash_features is much larger than the number of distinct terms.
+        :param prune_vocabulary: VocabularyPruner that selects the terms that become columns of the sentence
+        matrices, e.g. by their document frequency, or None to keep every term (the default). Pruning applies to the
+        term counts, before weighting, in every summarizer. Corpus document frequencies cannot be used with
+        hash_features, whose columns are not terms.
+        """
+        if budget_strategy not in self.BUDGET_STRATEGIES:
+            raise ValueError('Parameter "budget_strategy" must take one of the values "truncate", "sample" or "chunk"')
+        if np.dtype(dtype) not in self.DTYPES:
+            raise ValueError('Parameter "dtype" must be either numpy.float32 or numpy.float64')
+        if timeout is not None and timeout <= 0:
+            raise ValueError('Parameter "timeout" must be a positive number of seconds')
+        if max_sentences is not None and max_sentences < 1:
+            raise ValueError('Parameter "max_sentences" must be a positive integer')
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError('Parameter "max_bytes" must be a positive integer')
+        if not isinstance(collapse_duplicates, bool) and not 0 < collapse_duplicates <= 1:
+            raise ValueError('Parameter "collapse_duplicates" must be True, False or a number between 0 and 1')
+        if prune_paragraphs is not None and not 0 < prune_paragraphs <= 1:
+            raise ValueError('Parameter "prune_paragraphs" must be None or a number between 0 and 1')
+        if hash_features is not None and (not isinstance(hash_features, (int, long)) or hash_features < 1):
+            raise ValueError('Parameter "hash_features" must be None or a positive integer')
+        if prune_vocabulary is not None and not isinstance(prune_vocabulary, VocabularyPruner):
+            raise ValueError('Parameter "prune_vocabulary" must be None or a VocabularyPruner')
+        if prune_vocabulary is not None and prune_vocabulary.corpus is not None and hash_features is not None:
+            raise ValueError('Corpus document frequencies cannot be used with hash_features')
+
+        self._tokenizer = tokenizer if tokenizer is not None else Tokenizer('english')
+        # Replaced as a whole on every change, so that calls in progress keep emitting to a consistent list
+        self._hooks = tuple(hooks) if hooks else ()
+        self._hooks_lock = threading.Lock()
+        self._max_sentences = max_sentences
+        self._max_bytes = max_bytes
+        self._budget_strategy = budget_strategy
+        self._dtype = np.dtype(dtype)
+        self._timeout = timeout
+        if collapse_duplicates is True or collapse_duplicates is False:
+            self._deduplicator = None
+        else:
+            self._deduplicator = MinHashLSH(threshold=collapse_duplicates)
+        self._collapse_duplicates = bool(collapse_duplicates)
+        self._prune_paragraphs = prune_paragraphs
+        self._hash_features = hash_features
+        self._prune_vocabulary = prune_vocabulary
 
     @abstractmethod
     def summarize(self, text, length=5):
         pass
 
+    @abstractmethod
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        **params):
+        """
+        Select the indices of the top "length" sentences out of a list of processed sentences, where
+        0 < length < len(sentences). Indices are returned in the order in which the sentences appear in the document.
+        Iterative algorithms should stop early once the deadline has expired. If given, weights holds the number of
+        (duplicate) sentences that each sentence stands for.
+        """
+        pass
+
+    def __getstate__(self):
+        # Locks cannot be pickled (e.g. to send a summarizer to worker processes)
+        state = self.__dict__.copy()
+        del state['_hooks_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._hooks_lock = threading.Lock()
+
+    @property
+    def hooks(self):
+        return list(self._hooks)
+
+    def add_hook(self, hook):
+        with self._hooks_lock:
+            self._hooks += (hook,)
+
+    def remove_hook(self, hook):
+        with self._hooks_lock:
+            hooks = list(self._hooks)
+            hooks.remove(hook)
+            self._hooks = tuple(hooks)
+
+    def _start_timings(self):
+        if not self._hooks:
+            return NULL_TIMINGS
+        return self.timings_class(self.__class__.__name__)
+
+    def _start_deadline(self):
+        if self._timeout is None:
+            return NO_DEADLINE
+        return Deadline(self._timeout)
+
+    def _finish(self, sentences, timings, degraded=None, deadline=NO_DEADLINE, spans=None):
+        """Wraps the summary sentences in a Summary and emits the timing record to all hooks."""
+        if timings is NULL_TIMINGS:
+            return Summary(sentences, degraded=degraded, deadline=deadline, spans=spans)
+
+        self._emit(timings)
+        return Summary(sentences, timings=timings, degraded=degraded, deadline=deadline, spans=spans)
+
+    def _summarize_batch(self, texts, length, **params):
+        """
+        Batch counterpart of _summarize, for subclasses implementing _rank_batch. Each document is parsed and
+        tokenized, and then all documents are ranked together, so that the cost of each step of the ranking is paid
+        once per batch rather than once per document, and the timeout applies to the whole batch. Returns a list with
+        the Summary of each document; the summaries share the timing record of the batch.
+
+        Memory budgets, duplicate collapsing and paragraph pruning reduce each document on its own, so when any of
+        them is enabled every document is summarized separately with _summarize instead.
+        """
+        if not self._batch_ranking:
+            return [self._summarize(text, length, **params) for text in texts]
+
+        timings = self._start_timings()
+        deadline = self._start_deadline()
+
+        summaries = [None] * len(texts)
+        batch, blocks, lengths = [], [], []
+        unprocessed_blocks, span_blocks = [], []
+        for ndx, text in enumerate(texts):
+            sentences, unprocessed_sentences, spans = self._read_input(text, timings)
+            unprocessed_blocks.append(unprocessed_sentences)
+            span_blocks.append(spans)
+
+            doc_length = self._parse_summary_length(length, len(sentences))
+            if doc_length == len(sentences):
+                summaries[ndx] = range(len(sentences))
+            else:
+                batch.append(ndx)
+                blocks.append(sentences)
+                lengths.append(doc_length)
+        timings.record_sentences([sentence for block in blocks for sentence in block])
+
+        if batch:
+            for ndx, top_sentences in zip(batch, self._rank_batch(blocks, lengths, timings, deadline, **params)):
+                summaries[ndx] = top_sentences
+
+        if timings is not NULL_TIMINGS:
+            self._emit(timings)
+        return [
+            Summary([unprocessed[i] for i in top_sentences], timings=timings if timings is not NULL_TIMINGS else None,
+                    deadline=deadline, spans=self._select_spans(spans, top_sentences))
+            for unprocessed, spans, top_sentences in zip(unprocessed_blocks, span_blocks, summaries)
+        ]
+
+    @property
+    def _batch_ranking(self):
+        """Whether _summarize_batch ranks documents together, i.e. no option reduces documents one at a time."""
+        return (self._max_sentences is None and self._max_bytes is None and not self._collapse_duplicates and
+                self._prune_paragraphs is None)
+
+    def _rank_batch(self, blocks, lengths, timings=NULL_TIMINGS, deadline=NO_DEADLINE, **params):
+        """
+        Rank several lists of processed sentences at once. Returns, for each list, the indices of its top
+        lengths[i] sentences in the order in which they appear (as _rank_sentences does for a single list).
+        """
+        raise NotImplementedError('{0} does not support batch summarization'.format(self.__class__.__name__))
+
+    def _emit(self, timings):
+        timings.finish()
+        for hook in self._hooks:
+            hook.emit(timings)
+
+    def _summarize(self, text, length, **params):
+        """
+        Runs the summarization pipeline shared by all summarizers: parse the input, tokenize it, enforce the
+        memory budget and rank the sentences using the _rank_sentences method of the subclass.
+        """
+        timings = self._start_timings()
+        deadline = self._start_deadline()
+        degraded = []
+
+        spans = None
+        if self._prune_paragraphs is None:
+            sentences, unprocessed_sentences, spans = self._read_input(text, timings, degraded)
+        elif isinstance(text, PreprocessedDocument):
+            if text.paragraphs is None:
+                raise ValueError('Paragraph pruning requires a PreprocessedDocument built with paragraphs=True')
+            sentences, unprocessed_sentences, paragraphs = text.sentences, text.unprocessed_sentences, text.paragraphs
+            timings.record_sentences(sentences)
+        else:
+            with timings.stage('parse_input'):
+                text, origins = self._apply_byte_budget(self._parse_input(text), degraded)
+            sentences, unprocessed_sentences, paragraphs, spans = self._tokenize_paragraphs(text, timings)
+            spans = self._restore_offsets(spans, origins)
+
+        length = self._parse_summary_length(length, len(sentences))
+        if self._prune_paragraphs is not None and length < len(sentences):
+            with timings.stage('prune_paragraphs'):
+                kept = self._select_paragraphs(sentences, paragraphs, length)
+            sentences = [sentences[i] for i in kept]
+            unprocessed_sentences = [unprocessed_sentences[i] for i in kept]
+            spans = self._select_spans(spans, kept)
+
+        weights = None
+        if self._collapse_duplicates:
+            with timings.stage('collapse_duplicates'):
+                kept, weights = self._collapse_indices(sentences)
+                sentences = [sentences[i] for i in kept]
+                unprocessed_sentences = [unprocessed_sentences[i] for i in kept]
+                spans = self._select_spans(spans, kept)
+            length = min(length, len(sentences))
+
+        if length == len(sentences):
+            return self._finish(unprocessed_sentences, timings, degraded, deadline, spans)
+
+        if deadline.expired():
+            # Out of time before ranking could even start: fall back to the cheapest scoring
+            deadline.fallback = 'relevance_score'
+            top_sentences = self._rank_by_relevance_score(sentences, length, timings, weights)
+        elif self._max_sentences is not None and len(sentences) > self._max_sentences:
+            top_sentences = self._rank_over_budget(sentences, length, timings, deadline, degraded, weights, **params)
+        else:
+            top_sentences = self._rank_sentences(sentences, length, timings, deadline, weights=weights, **params)
+
+        return self._finish([unprocessed_sentences[i] for i in top_sentences], timings, degraded, deadline,
+                            self._select_spans(spans, top_sentences))
+
+    def _read_input(self, text, timings=NULL_TIMINGS, degraded=None):
+        """
+        Returns the processed and unprocessed sentences of an input, and the spans of the unprocessed sentences in
+        the parsed text (see _tokenize): a PreprocessedDocument is used as it is (and its spans are None), and
+        anything else is parsed, reduced to the byte budget (if degraded is given) and tokenized.
+        """
+        if isinstance(text, PreprocessedDocument):
+            timings.record_sentences(text.sentences)
+            return text.sentences, text.unprocessed_sentences, None
+
+        origins = None
+        with timings.stage('parse_input'):
+            text = self._parse_input(text)
+            if degraded is not None:
+                text, origins = self._apply_byte_budget(text, degraded)
+        sentences, unprocessed_sentences, spans = self._tokenize(text, timings)
+        return sentences, unprocessed_sentences, self._restore_offsets(spans, origins)
+
+    @staticmethod
+    def _select_spans(spans, indices):
+        """The rows of an array of sentence spans at the given indices, or None if the spans are not known."""
+        if spans is None:
+            return None
+        return spans[np.asarray(indices, dtype=np.intp)]
+
+    def _collapse_sentences(self, sentences, unprocessed_sentences):
+        """
+        Collapse repeated sentences into their first occurrence. Returns the remaining processed and unprocessed
+        sentences, and the number of sentences that each of them stands for.
+        """
+        kept, weights = self._collapse_indices(sentences)
+        return [sentences[i] for i in kept], [unprocessed_sentences[i] for i in kept], weights
+
+    def _collapse_indices(self, sentences):
+        """
+        Returns the indices of the first occurrences of the sentences (see _collapse_sentences), and the number of
+        sentences that each of them stands for.
+        """
+        if self._deduplicator is None:
+            first_occurrences = {}
+            clusters = [first_occurrences.setdefault(frozenset(sentence.split(' ')), ndx)
+                        for ndx, sentence in enumerate(sentences)]
+        else:
+            clusters = self._deduplicator.duplicates([sentence.split(' ') for sentence in sentences])
+
+        kept = [ndx for ndx, first in enumerate(clusters) if ndx == first]
+        weights = np.bincount(clusters, minlength=len(sentences))[kept].astype(self._dtype)
+        return kept, weights
+
+    def _score_sentences(self, sentences, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None, **params):
+        """
+        Score each of a list of processed sentences (higher scores are more salient), for callers that do their
+        own selection such as the multi-document summarizer. Subclasses whose ranking is driven by a score override
+        this; the default is the relevance score.
+        """
+        with timings.stage('compute_matrix'):
+            matrix = self._compute_matrix(sentences, weighting='frequency', dtype=self._dtype,
+                                          hash_features=self._hash_features, pruner=self._prune_vocabulary)
+        timings.record_matrix(matrix)
+
+        with timings.stage('score'):
+            return self._relevance_scores(matrix, weights)
+
+    @classmethod
+    def _document_frequency(cls, matrix, weights=None):
+        """Sum of the rows of a sentence-term matrix, each counted as many times as its weight."""
+        if weights is None:
+            return np.asarray(matrix.sum(axis=0)).ravel()
+        return matrix.T.dot(weights)
+
+    @classmethod
+    def _relevance_scores(cls, matrix, weights=None):
+        """
+        Inner product of the binary term vector of each sentence with the document term frequencies: a single
+        sparse matrix-vector product. The signs of the elements are kept in binary vectors, so that the terms of
+        signed hashed columns count positively too.
+        """
+        return matrix.sign().dot(cls._document_frequency(matrix, weights))
+
+    def _rank_by_relevance_score(self, sentences, length, timings=NULL_TIMINGS, weights=None):
+        """Rank sentences by their relevance score (see _relevance_scores)."""
+        with timings.stage('compute_matrix'):
+            matrix = self._compute_matrix(sentences, weighting='frequency', dtype=self._dtype,
+                                          hash_features=self._hash_features, pruner=self._prune_vocabulary)
+        timings.record_matrix(matrix)
+
+        with timings.stage('select'):
+            scores = self._relevance_scores(matrix, weights)
+            top_sentences = scores.argsort()[-length:]
+            top_sentences.sort()
+
+        return top_sentences
+
+    def _select_paragraphs(self, sentences, paragraphs, length):
+        """
+        Select the sentences of the most salient paragraphs, given the paragraph of each sentence, such that at
+        least max(length, prune_paragraphs * len(sentences)) sentences are kept. Paragraphs are scored by the cosine
+        similarity of the sum of their sentences' term vectors to the sum of all term vectors. Returns the indices
+        of the kept sentences in the order in which they appear.
+        """
+        matrix = self._compute_matrix(sentences, weighting='frequency', dtype=self._dtype,
+                                      hash_features=self._hash_features, pruner=self._prune_vocabulary)
+        paragraph_ids, paragraphs = np.unique(paragraphs, return_inverse=True)
+        membership = csr_matrix((np.ones(len(sentences), dtype=self._dtype), (paragraphs, np.arange(len(sentences)))),
+                                shape=(len(paragraph_ids), len(sentences)))
+        paragraph_matrix = membership.dot(matrix)
+        document = np.asarray(matrix.sum(axis=0)).ravel()
+
+        norms = np.sqrt(np.asarray(paragraph_matrix.multiply(paragraph_matrix).sum(axis=1)).ravel())
+        salience = paragraph_matrix.dot(document) / np.maximum(norms * np.linalg.norm(document), 1e-12)
+
+        # Most salient paragraphs first; ties go to the earlier paragraph
+        order = np.lexsort((np.arange(len(paragraph_ids)), -salience))
+        sizes = np.bincount(paragraphs)[order]
+        budget = max(length, int(np.ceil(self._prune_paragraphs * len(sentences))))
+        selected = np.zeros(len(paragraph_ids), dtype=bool)
+        selected[order[:np.searchsorted(np.cumsum(sizes), budget) + 1]] = True
+        return np.flatnonzero(selected[paragraphs])
+
+    def _tokenize(self, text, timings=NULL_TIMINGS):
+        """
+        Returns the processed and unprocessed sentences of a text, and the (start, end) offsets of the unprocessed
+        sentences in the text as an array of shape (number of sentences, 2).
+        """
+        pieces, offsets = self._pieces(text)
+        sentences, unprocessed_sentences, _, spans = self._tokenize_pieces(pieces, offsets, timings)
+        return sentences, unprocessed_sentences, spans
+
+    def _tokenize_paragraphs(self, text, timings=NULL_TIMINGS):
+        """As _tokenize, but sentences are split paragraph by paragraph and the paragraph of each is returned too."""
+        pieces, offsets, paragraphs = [], [], []
+        for ndx, (start, end) in enumerate(self._tokenizer.paragraph_spans(text)):
+            paragraph_pieces, paragraph_offsets = self._pieces(text[start:end])
+            pieces += paragraph_pieces
+            offsets += [start + offset for offset in paragraph_offsets]
+            paragraphs += [ndx] * len(paragraph_pieces)
+
+        sentences, unprocessed_sentences, piece_ids, spans = self._tokenize_pieces(pieces, offsets, timings)
+        return sentences, unprocessed_sentences, [paragraphs[ndx] for ndx in piece_ids], spans
+
+    def _pieces(self, text):
+        """Returns the pieces in which a text is tokenized (see _apply_byte_budget) and the offset of each."""
+        if self._budget_strategy == 'chunk' and self._max_bytes is not None and len(text) > self._max_bytes:
+            pieces = self._split_text(text, self._max_bytes)
+            return pieces, [0] + list(np.cumsum([len(piece) for piece in pieces[:-1]]))
+        return [text], [0]
+
+    def _tokenize_pieces(self, pieces, offsets, timings=NULL_TIMINGS):
+        """
+        Tokenize each of a list of pieces of text, given the offset of each piece in the text. Also returns the
+        index of the piece of each sentence, and the spans of the unprocessed sentences in the text.
+        """
+        sentences, unprocessed_sentences, piece_ids, spans = [], [], [], []
+        for ndx, (piece, offset) in enumerate(zip(pieces, offsets)):
+            with timings.stage('split_sentences'):
+                piece_unprocessed, piece_spans = self._tokenizer.split_sentence_spans(piece)
+            with timings.stage('sanitize_text'):
+                piece_sentences, kept = self._tokenizer._sanitize_kept(piece_unprocessed)
+            sentences += piece_sentences
+            unprocessed_sentences += [piece_unprocessed[i] for i in kept]
+            piece_ids += [ndx] * len(piece_sentences)
+            spans += [(offset + piece_spans[i][0], offset + piece_spans[i][1]) for i in kept]
+
+        timings.record_sentences(sentences)
+        return sentences, unprocessed_sentences, piece_ids, np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+    @staticmethod
+    def _split_text(text, max_bytes):
+        """Split text into pieces of at most max_bytes, breaking at line breaks wherever possible."""
+        pieces = []
+        start = 0
+        while len(text) - start > max_bytes:
+            end = text.rfind('\n', start, start + max_bytes)
+            if end <= start:
+                end = start + max_bytes
+            pieces.append(text[start:end])
+            start = end
+        pieces.append(text[start:])
+        return pieces
+
+    def _apply_byte_budget(self, text, degraded):
+        """
+        Reduces a text to the byte budget. Returns the reduced text and, if it is not a prefix of the text, an array
+        of the (offset in the reduced text, offset in the text) of each of its paragraphs (None otherwise), from
+        which _restore_offsets maps offsets back to the text.
+        """
+        if self._max_bytes is None or len(text) <= self._max_bytes:
+            return text, None
+
+        report = {'budget': 'max_bytes', 'strategy': self._budget_strategy, 'limit': self._max_bytes,
+                  'input_bytes': len(text)}
+
+        origins = None
+        if self._budget_strategy == 'chunk':
+            # The whole text is kept, but it is tokenized piece by piece (see _tokenize)
+            report['chunks'] = len(self._split_text(text, self._max_bytes))
+            kept = text
+        elif self._budget_strategy == 'sample':
+            # Keep paragraphs evenly spread over the document, such that their total size is within budget
+            ratio = self._max_bytes / float(len(text))
+            paragraphs, origins = [], []
+            credit = 0.0
+            kept_offset = offset = 0
+            for paragraph in text.split('\n'):
+                credit += (len(paragraph) + 1) * ratio
+                if credit >= len(paragraph) + 1:
+                    paragraphs.append(paragraph)
+                    origins.append((kept_offset, offset))
+                    kept_offset += len(paragraph) + 1
+                    credit -= len(paragraph) + 1
+                offset += len(paragraph) + 1
+            kept = '\n'.join(paragraphs)[:self._max_bytes]
+            origins = np.array(origins, dtype=np.int64).reshape(-1, 2)
+        else:
+            kept = self._split_text(text, self._max_bytes)[0]
+
+        report['kept_bytes'] = len(kept)
+        self._report_budget(report, degraded)
+        return kept, origins
+
+    @staticmethod
+    def _restore_offsets(spans, origins):
+        """
+        Maps the spans of sentences in a text reduced by _apply_byte_budget to spans in the original text, given
+        the origins of the paragraphs of the reduced text (None if offsets are the same in both texts).
+        """
+        if spans is None or origins is None or not len(spans):
+            return spans
+        paragraphs = np.searchsorted(origins[:, 0], spans, side='right') - 1
+        # A sentence ends at most at the end of its last paragraph
+        paragraphs[:, 1] = np.searchsorted(origins[:, 0], spans[:, 1] - 1, side='right') - 1
+        return spans + (origins[:, 1] - origins[:, 0])[paragraphs]
+
+    def _rank_over_budget(self, sentences, length, timings, deadline, degraded, weights=None, **params):
+        num_sentences = len(sentences)
+        report = {'budget': 'max_sentences', 'strategy': self._budget_strategy, 'limit': self._max_sentences,
+                  'input_sentences': num_sentences}
+
+        if self._budget_strategy == 'chunk':
+            candidates, report['rounds'] = self._reduce_in_chunks(sentences, length, deadline, weights, **params)
+        elif self._budget_strategy == 'sample':
+            candidates = [i * num_sentences // self._max_sentences for i in range(self._max_sentences)]
+        else:
+            candidates = range(self._max_sentences)
+
+        report['kept_sentences'] = len(candidates)
+        self._report_budget(report, degraded)
+
+        if length >= len(candidates):
+            return list(candidates)
+
+        top_sentences = self._rank_sentences([sentences[i] for i in candidates], length, timings, deadline,
+                                             weights=self._select_weights(weights, candidates), **params)
+        return [candidates[i] for i in top_sentences]
+
+    @staticmethod
+    def _select_weights(weights, indices):
+        if weights is None:
+            return None
+        return weights[list(indices)]
+
+    def _reduce_in_chunks(self, sentences, length, deadline=NO_DEADLINE, weights=None, **params):
+        """
+        Reduce the sentences to at most max_sentences candidates by repeatedly summarizing chunks of max_sentences
+        sentences and keeping the top sentences of each chunk. Returns the candidates and the number of rounds.
+        """
+        candidates = list(range(len(sentences)))
+        chunk_size = max(2, self._max_sentences)
+        rounds = 0
+        while len(candidates) > self._max_sentences:
+            rounds += 1
+            num_chunks = -(-len(candidates) // chunk_size)
+            # Keep enough sentences per chunk to fill the summary, but stay within budget where possible. Keeping
+            # at most half of each chunk guarantees that every round reduces the number of candidates.
+            keep = max(1, self._max_sentences // num_chunks, -(-length // num_chunks))
+            keep = min(keep, chunk_size // 2)
+
+            reduced = []
+            for offset in range(0, len(candidates), chunk_size):
+                chunk = candidates[offset:offset + chunk_size]
+                if len(chunk) <= keep:
+                    reduced += chunk
+                    continue
+                try:
+                    selected = self._rank_sentences([sentences[i] for i in chunk], keep, deadline=deadline,
+                                                    weights=self._select_weights(weights, chunk), **params)
+                except ValueError:
+                    # The chunk cannot be ranked on its own (e.g. it does not have sufficient rank for SVD)
+                    selected = range(keep)
+                reduced += [chunk[i] for i in selected]
+            candidates = reduced
+
+        return candidates, rounds
+
+    @staticmethod
+    def _report_budget(report, degraded):
+        degraded.append(report)
+        warn('Input exceeds the {budget} budget of {limit}; it has been reduced using the "{strategy}" '
+             'strategy.'.format(**report), BudgetWarning)
+
     @classmethod
-    def _compute_matrix(cls, sentences, weighting='frequency', norm=None):
+    def _compute_matrix(cls, sentences, weighting='frequency', norm=None, dtype=np.float64, hash_features=None,
+                        pruner=None):
         """
-        Compute the matrix of term frequencies given a list of sentences
+        Compute the matrix of term frequencies given a list of sentences. The matrix is returned in CSR format with
+        elements of the given dtype and 32-bit indices. If the sentences carry their term counts (the sentences of a
+        PreprocessedDocument), the matrix is derived from the counts without vectorizing the sentences. If
+        hash_features is given, the columns are those of a hashed feature space of this size (see _hash_counts). If
+        a VocabularyPruner is given, the columns of the terms it prunes are removed before weighting.
         """
 
         if norm not in ('l1', 'l2', None):
             raise ValueError('Parameter "norm" can only take values "l1", "l2" or None')
 
+        if hash_features is not None:
+            counts = cls._prune_counts(cls._hash_counts(sentences, hash_features), pruner)
+            return cls._weight_counts(counts, weighting, norm, dtype)
+
+        counts = getattr(sentences, 'counts', None)
+        if counts is not None:
+            counts = cls._prune_counts(counts, pruner, getattr(sentences, 'terms', None))
+            return cls._weight_counts(counts, weighting, norm, dtype)
+
+        if pruner is not None:
+            vectorizer = CountVectorizer(min_df=1, ngram_range=(1, 1), binary=False, stop_words=None)
+            counts = vectorizer.fit_transform(sentences)
+            counts = cls._prune_counts(counts, pruner, vectorizer.get_feature_names())
+            return cls._weight_counts(counts, weighting, norm, dtype)
+
         # Initialise vectorizer to convert text documents into matrix of token counts
         if weighting.lower() == 'binary':
             vectorizer = CountVectorizer(min_df=1, ngram_range=(1, 1), binary=True, stop_words=None)
@@ -35,7 +654,7 @@ class BaseSummarizer(object):
             raise ValueError('Parameter "method" must take one of the values "binary", "frequency" or "tfidf".')
 
         # Extract word features from sentences using sparse vectorizer
-        frequency_matrix = vectorizer.fit_transform(sentences).astype(float)
+        frequency_matrix = vectorizer.fit_transform(sentences).astype(dtype)
 
         # Normalize the term vectors (i.e. each row adds to 1)
         if norm in ('l1', 'l2'):
@@ -43,7 +662,135 @@ class BaseSummarizer(object):
         elif norm is not None:
             raise ValueError('Parameter "norm" can only take values "l1", "l2" or None')
 
-        return frequency_matrix
+        return cls._compact_indices(frequency_matrix)
+
+    @classmethod
+    def _weight_counts(cls, counts, weighting='frequency', norm=None, dtype=np.float64):
+        """The matrix that _compute_matrix returns for sentences with the given matrix of term counts."""
+        if weighting.lower() == 'binary':
+            matrix = counts.copy()
+            matrix.data = np.sign(matrix.data)  # Hashed counts are signed
+        elif weighting.lower() == 'frequency':
+            matrix = counts
+        elif weighting.lower() == 'tfidf':
+            matrix = TfidfTransformer().fit_transform(counts)
+        else:
+            raise ValueError('Parameter "method" must take one of the values "binary", "frequency" or "tfidf".')
+
+        matrix = csr_matrix(matrix, dtype=dtype, copy=True)
+        if norm in ('l1', 'l2'):
+            matrix = normalize(matrix, norm=norm, axis=1)
+
+        return cls._compact_indices(matrix)
+
+    @staticmethod
+    def _prune_counts(counts, pruner, terms=None):
+        """Removes the columns of a matrix of term counts that a VocabularyPruner prunes (if any)."""
+        if pruner is None:
+            return counts
+        frequencies = np.bincount(counts.indices, minlength=counts.shape[1])
+        return counts[:, np.flatnonzero(pruner.select(frequencies, counts.shape[0], terms))]
+
+    @staticmethod
+    def _hash_counts(sentences, hash_features):
+        """
+        Term counts of a list of sentences in a hashed feature space with hash_features columns. Each term is mapped
+        to a column by its MurmurHash3 hash, and counted as -1 rather than 1 if the sign bit of the hash is set, so
+        that inner products between rows are preserved in expectation (and exactly, unless terms collide). Columns
+        only depend on the terms, so no vocabulary is built and the matrices of any documents can be stacked or
+        compared.
+        """
+        vectorizer = HashingVectorizer(n_features=hash_features, alternate_sign=True, norm=None, dtype=np.float64)
+        counts = vectorizer.transform(sentences)
+        counts.eliminate_zeros()  # Colliding terms whose counts cancel out
+        return counts
+
+    @classmethod
+    def _compute_block_matrix(cls, blocks, weighting='frequency', norm=None, dtype=np.float64, hash_features=None,
+                              pruner=None):
+        """
+        Compute the term frequency matrices of several lists of sentences at once, as one block-diagonal matrix:
+        the rows are the sentences of all lists in order, and the columns of each block are the terms of its list
+        only, so that products such as matrix * matrix.T are block-diagonal too. Each block equals the matrix that
+        _compute_matrix returns for its list (up to the order of the columns, if hash_features is given), with the
+        same vocabulary pruning. Returns the matrix and the number of sentences in each block.
+        """
+        if norm not in ('l1', 'l2', None):
+            raise ValueError('Parameter "norm" can only take values "l1", "l2" or None')
+        if weighting.lower() not in ('binary', 'frequency', 'tfidf'):
+            raise ValueError('Parameter "method" must take one of the values "binary", "frequency" or "tfidf".')
+        weighting = weighting.lower()
+
+        sentences = [sentence for block in blocks for sentence in block]
+        sizes = np.array([len(block) for block in blocks])
+        terms = None
+        if hash_features is not None:
+            counts = cls._hash_counts(sentences, hash_features)
+            if weighting == 'binary':
+                counts.data = np.sign(counts.data)
+        else:
+            vectorizer = CountVectorizer(min_df=1, ngram_range=(1, 1), binary=weighting == 'binary', stop_words=None)
+            counts = vectorizer.fit_transform(sentences)
+            if pruner is not None:
+                terms = np.array(vectorizer.get_feature_names(), dtype=object)
+
+        # Give each (block, term) pair its own column. Columns stay in the order of the terms within each block.
+        num_terms = counts.shape[1]
+        rows = np.repeat(np.arange(len(sentences)), np.diff(counts.indptr))
+        block_ids = np.repeat(np.arange(len(blocks)), sizes)[rows].astype(np.int64)
+        columns, indices = np.unique(block_ids * num_terms + counts.indices, return_inverse=True)
+        data, indptr = counts.data, counts.indptr
+
+        if pruner is not None:
+            # Prune the terms of each block by their frequency within the block, and renumber the remaining columns
+            column_blocks = columns // num_terms
+            keep = pruner.select(np.bincount(indices, minlength=len(columns)), sizes[column_blocks],
+                                 terms[columns % num_terms] if terms is not None else None, column_blocks)
+            kept_entries = keep[indices]
+            indices = (np.cumsum(keep) - 1)[indices[kept_entries]]
+            data = data[kept_entries]
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(rows[kept_entries], minlength=len(sentences)))))
+            columns = columns[keep]
+
+        data = data.astype(np.float64)
+        if weighting == 'tfidf':
+            # Smoothed inverse document frequency of each term within its block, as computed by TfidfVectorizer
+            # (with sentences as documents), followed by its l2 normalization of the rows
+            sentence_frequency = np.bincount(indices)
+            block_sizes = sizes[columns // num_terms]
+            data *= (np.log((1.0 + block_sizes) / (1.0 + sentence_frequency)) + 1)[indices]
+
+        matrix = csr_matrix((data, indices, indptr), shape=(len(sentences), len(columns)))
+        if weighting == 'tfidf':
+            matrix = normalize(matrix, norm='l2', axis=1)
+        matrix = matrix.astype(dtype)
+
+        if norm in ('l1', 'l2'):
+            matrix = normalize(matrix, norm=norm, axis=1)
+
+        return cls._compact_indices(matrix), sizes
+
+    @staticmethod
+    def _segmented_top_k(scores, sizes, lengths):
+        """
+        For consecutive segments of the given sizes of a score vector, returns the indices (within each segment, in
+        ascending order) of the lengths[i] highest scores of segment i. Ties are broken in favour of later indices.
+        """
+        segment_ids = np.repeat(np.arange(len(sizes)), sizes)
+        order = np.lexsort((np.arange(len(scores)), scores, segment_ids))
+        ends = np.cumsum(sizes)
+        return [
+            list(np.sort(order[end - length:end]) - (end - size)) if length else []
+            for size, end, length in zip(sizes, ends, lengths)
+        ]
+
+    @staticmethod
+    def _compact_indices(matrix):
+        """Store the index arrays of a sparse CSR/CSC matrix as 32-bit integers where they fit."""
+        if matrix.nnz < np.iinfo(np.int32).max:
+            matrix.indices = matrix.indices.astype(np.int32, copy=False)
+            matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+        return matrix
 
     @classmethod
     def _parse_input(cls, text):
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from timeit import default_timer
+
+
+class Deadline(object):
+    """
+    Tracks the time budget of a single call to summarize. Iterative algorithms poll expired() between iterations
+    and, once the deadline has passed, stop early with the best result so far and call truncate() to record that
+    the result is approximate.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.truncated_stages = []
+        self.fallback = None
+        self._end = default_timer() + timeout
+
+    def remaining(self):
+        return self._end - default_timer()
+
+    def expired(self):
+        return default_timer() >= self._end
+
+    def truncate(self, stage):
+        """Record that the given stage was stopped early because the deadline passed."""
+        self.truncated_stages.append(stage)
+
+    @property
+    def truncated(self):
+        return bool(self.truncated_stages) or self.fallback is not None
+
+
+class _NoDeadline(object):
+    """Stand-in for Deadline used when there is no timeout. It never expires."""
+
+    __slots__ = ()
+
+    timeout = None
+    truncated_stages = ()
+    fallback = None
+    truncated = False
+
+    def remaining(self):
+        return float('inf')
+
+    def expired(self):
+        return False
+
+    def truncate(self, stage):
+        pass
+
+
+NO_DEADLINE = _NoDeadline()
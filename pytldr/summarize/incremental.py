@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from array import array
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer
+from ..nlp import unicode_to_ascii
+from .baseclass import Summary
+from .lsa import BaseLsaSummarizer
+from .relevance import RelevanceSummarizer
+from .textrank import TextRankSummarizer
+
+
+class IncrementalSummarizer(object):
+    """
+    Summarization session for a growing document, such as a live blog or a meeting transcript. Text is appended
+    to the session as it arrives and only the new text is tokenized. The sentence-term matrix is grown in place,
+    and the state of the ranking algorithm is updated rather than recomputed:
+
+    * TextRank: the edges of the new sentences are found using an inverted index of the existing sentences and
+      added to the similarity graph, which is kept between summaries, and PageRank is warm-started from the previous
+      scores.
+    * LSA: the truncated SVD is updated with the new sentences (Brand, 2006) instead of being recomputed.
+    * Relevance: the document frequency of each term and the relevance score of each sentence are updated through
+      the inverted index as sentences arrive, and each step of the greedy selection only updates the scores of the
+      sentences that share a term with the selected sentence.
+
+    Example:
+
+        session = IncrementalSummarizer(TextRankSummarizer())
+        for text in transcript_updates:
+            summary = session.update(text, length=5)
+    """
+
+    SENTENCE_ENDINGS = ('.', '!', '?', '"', "'", '\n')
+
+    def __init__(self, summarizer=None, weighting='frequency', norm=None, topics=4, binary_matrix=True):
+        """
+        :param summarizer: a TextRankSummarizer (the default), RelevanceSummarizer or LSA summarizer, whose
+        tokenizer and dtype are used by the session
+        :param weighting: 'frequency' or 'binary' weighting of sentence terms for TextRank ('tfidf' is not
+        supported because the weight of every term changes with each appended sentence)
+        :param norm: None, 'l1' or 'l2' normalization of sentence vectors for TextRank
+        :param topics: the number of topics/concepts kept in the truncated SVD for LSA
+        :param binary_matrix: whether the matrix of word counts should be binary for LSA and Relevance
+        """
+        if summarizer is None:
+            summarizer = TextRankSummarizer()
+
+        if isinstance(summarizer, TextRankSummarizer):
+            if weighting not in ('binary', 'frequency'):
+                raise ValueError('Parameter "weighting" must take one of the values "binary" or "frequency".')
+            if norm not in ('l1', 'l2', None):
+                raise ValueError('Parameter "norm" can only take values "l1", "l2" or None')
+        elif isinstance(summarizer, BaseLsaSummarizer):
+            weighting = 'binary' if binary_matrix else 'frequency'
+            norm = None
+        elif isinstance(summarizer, RelevanceSummarizer):
+            weighting = 'frequency'
+            norm = None
+        else:
+            raise ValueError('Parameter "summarizer" must be a TextRankSummarizer, RelevanceSummarizer or an LSA '
+                             'summarizer')
+
+        self._summarizer = summarizer
+        self._tokenizer = summarizer._tokenizer
+        self._dtype = summarizer._dtype
+        self._weighting = weighting
+        self._norm = norm
+        self._topics = topics
+        self._binary_matrix = binary_matrix
+        self._analyzer = CountVectorizer().build_analyzer()
+
+        self._pending = ''
+        self._sentences = []
+        self._vocabulary = {}
+
+        # Sentence-term matrix in CSR format, grown one row at a time
+        self._data = array('d')
+        self._indices = array('i')
+        self._indptr = array('i', [0])
+
+        # Inverted index of sentence terms: the rows and weights of the sentences that contain each term
+        self._postings = {}
+
+        # TextRank state: similarity graph in CSR format, the edges added since it was last built (in COO format)
+        # and the last scores
+        self._graph_rows = array('i')
+        self._graph_cols = array('i')
+        self._graph_data = array('d')
+        self._graph = None
+        self._scores = None
+
+        # Relevance state: document frequency of each term and relevance score of each sentence
+        self._term_frequency = array('d')
+        self._relevance = array('d')
+
+        # LSA state: truncated SVD of the term-sentence matrix and the number of sentences it covers
+        self._u = None
+        self._sigma = None
+        self._v = None
+        self._decomposed = 0
+
+    @property
+    def sentences(self):
+        """The sentences of the document so far."""
+        return list(self._sentences)
+
+    @property
+    def num_sentences(self):
+        return len(self._sentences)
+
+    def append(self, text):
+        """
+        Append text to the document. A trailing incomplete sentence is held back until more text arrives (or until
+        flush() is called). Returns the number of sentences added.
+        """
+        text = self._pending + unicode_to_ascii(text)
+
+        end = len(text.rstrip(' \t'))
+        if not text[:end].endswith(self.SENTENCE_ENDINGS):
+            # Hold back everything after the last sentence boundary
+            end = max(text.rfind(char) for char in '.!?\n') + 1
+        self._pending = text[end:]
+
+        if not text[:end].strip():
+            return 0
+        return self._add_sentences(self._tokenizer.split_sentences(text[:end]))
+
+    def flush(self):
+        """Add any held-back incomplete sentence to the document. Returns the number of sentences added."""
+        pending, self._pending = self._pending, ''
+        if not pending.strip():
+            return 0
+        return self._add_sentences(self._tokenizer.split_sentences(pending))
+
+    def update(self, text, length=5, **params):
+        """Append text to the document and return the current summary."""
+        self.append(text)
+        return self.summary(length, **params)
+
+    def summary(self, length=5, topic_sigma_threshold=None):
+        """
+        Returns the summary of the document so far.
+
+        :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
+        of the document so far (e.g. 0.5)
+        :param topic_sigma_threshold: for LSA, filters out topics with a singular value less than this percentage
+        of the largest singular value (the summarizer's default if None)
+        :return: list of sentences for the summary
+        """
+        num_sentences = len(self._sentences)
+        length = self._summarizer._parse_summary_length(length, num_sentences)
+        if length == num_sentences:
+            return Summary(list(self._sentences))
+
+        if isinstance(self._summarizer, TextRankSummarizer):
+            top_sentences = TextRankSummarizer._select_top(self._pagerank(), length)
+        elif isinstance(self._summarizer, BaseLsaSummarizer):
+            self._update_svd()
+            saliency_vec = self._summarizer._saliency(self._sigma, self._v, topic_sigma_threshold)
+            top_sentences = saliency_vec.argsort()[-length:][::-1]
+            top_sentences.sort()
+        else:
+            top_sentences = self._greedy_select(length)
+
+        return Summary([self._sentences[i] for i in top_sentences])
+
+    def _add_sentences(self, unprocessed_sentences):
+        sentences, unprocessed_sentences = self._tokenizer.sanitize_sentences(unprocessed_sentences)
+
+        for sentence, unprocessed_sentence in zip(sentences, unprocessed_sentences):
+            counts = {}
+            for term in self._analyzer(sentence):
+                column = self._vocabulary.setdefault(term, len(self._vocabulary))
+                counts[column] = counts.get(column, 0) + 1
+
+            columns = sorted(counts)
+            if self._weighting == 'binary':
+                weights = np.ones(len(columns))
+            else:
+                weights = np.array([counts[term_column] for term_column in columns], dtype=float)
+
+            if self._norm == 'l1' and len(columns):
+                weights /= weights.sum()
+            elif self._norm == 'l2' and len(columns):
+                weights /= np.sqrt(np.square(weights).sum())
+
+            if isinstance(self._summarizer, TextRankSummarizer):
+                self._link(len(self._sentences), columns, weights)
+            elif isinstance(self._summarizer, RelevanceSummarizer):
+                self._add_relevance(len(self._sentences), columns, weights)
+
+            self._indices.extend(columns)
+            self._data.extend(weights)
+            self._indptr.append(len(self._indices))
+            self._sentences.append(unprocessed_sentence)
+
+        return len(sentences)
+
+    def _link(self, row, columns, weights):
+        """Add a sentence to the similarity graph, computing its similarity with all sentences sharing a term."""
+        similarities = {}
+        for column, weight in zip(columns, weights):
+            rows, row_weights = self._postings.setdefault(column, (array('i'), array('d')))
+            for other_row, other_weight in zip(rows, row_weights):
+                similarities[other_row] = similarities.get(other_row, 0.0) + weight * other_weight
+
+        for other_row, similarity in similarities.items():
+            self._graph_rows.extend((row, other_row))
+            self._graph_cols.extend((other_row, row))
+            self._graph_data.extend((similarity, similarity))
+
+        if len(columns):
+            self._graph_rows.append(row)
+            self._graph_cols.append(row)
+            self._graph_data.append(float(np.square(weights).sum()))
+
+        for column, weight in zip(columns, weights):
+            rows, row_weights = self._postings[column]
+            rows.append(row)
+            row_weights.append(weight)
+
+    def _add_relevance(self, row, columns, weights):
+        """
+        Add a sentence to the inverted index and to the document frequencies, and update the relevance score (the
+        inner product of the sentence's term vector with the document frequencies) of the sentences sharing its
+        terms.
+        """
+        num_terms = len(self._vocabulary)
+        self._term_frequency.extend([0.0] * (num_terms - len(self._term_frequency)))
+
+        relevance = 0.0
+        for column, weight in zip(columns, weights):
+            rows, row_weights = self._postings.setdefault(column, (array('i'), array('d')))
+            for other_row, other_weight in zip(rows, row_weights):
+                self._relevance[other_row] += self._score_weight(other_weight) * weight
+            rows.append(row)
+            row_weights.append(weight)
+
+            self._term_frequency[column] += weight
+            relevance += self._score_weight(weight) * self._term_frequency[column]
+        self._relevance.append(relevance)
+
+    def _score_weight(self, weight):
+        """The weight of a term of a sentence in its relevance score."""
+        return 1.0 if self._binary_matrix else weight
+
+    def _greedy_select(self, length):
+        """
+        The selection of RelevanceSummarizer._greedy_select, on the maintained relevance scores: removing the terms
+        of each selected sentence from the document only changes the scores of the sentences sharing them, which
+        are found in the inverted index.
+        """
+        scores = np.array(self._relevance, dtype=self._dtype)
+        term_frequency = np.array(self._term_frequency, dtype=self._dtype)
+
+        top_sentences = []
+        for _ in range(length):
+            # Grab the top sentence (the last one in case of ties) and remove it from consideration
+            top_sentence = len(scores) - 1 - scores[::-1].argmax()
+            top_sentences.append(top_sentence)
+            scores[top_sentence] = -np.inf
+
+            # Remove all terms that appear in the top sentence from the document
+            for column in self._indices[self._indptr[top_sentence]:self._indptr[top_sentence + 1]]:
+                if term_frequency[column]:
+                    rows, row_weights = self._postings[column]
+                    for other_row, other_weight in zip(rows, row_weights):
+                        scores[other_row] -= self._score_weight(other_weight) * term_frequency[column]
+                    term_frequency[column] = 0
+
+        top_sentences.sort()
+        return top_sentences
+
+    def _get_matrix(self, start=0):
+        """Returns the sentence-term matrix (from sentence "start" onwards) in CSR format."""
+        offset = self._indptr[start]
+        return csr_matrix(
+            (_to_numpy(self._data, self._dtype, offset), _to_numpy(self._indices, np.int32, offset),
+             _to_numpy(self._indptr, np.int32, start) - offset),
+            shape=(len(self._sentences) - start, len(self._vocabulary))
+        )
+
+    def _pagerank(self):
+        num_sentences = len(self._sentences)
+        if self._graph is None or self._graph.shape[0] < num_sentences:
+            self._graph = self._extend_graph(num_sentences)
+
+        initial = None
+        if self._scores is not None and len(self._scores) == num_sentences:
+            initial = self._scores
+        elif self._scores is not None:
+            # Warm start: previous scores for existing sentences, the previous average score for new ones
+            initial = np.empty(num_sentences)
+            initial[:len(self._scores)] = self._scores
+            initial[len(self._scores):] = 1.0 / len(self._scores)
+
+        self._scores = TextRankSummarizer._pagerank(self._graph, initial=initial)
+        return self._scores
+
+    def _extend_graph(self, num_sentences):
+        """
+        Returns the similarity graph of the first num_sentences sentences: the graph of the sentences it covered
+        when it was last built, grown to the new size without copying its arrays, plus the edges added since then
+        (the rows of the new sentences and their symmetric entries in the rows of existing sentences).
+        """
+        edges = coo_matrix(
+            (_to_numpy(self._graph_data, self._dtype),
+             (_to_numpy(self._graph_rows, np.int32), _to_numpy(self._graph_cols, np.int32))),
+            shape=(num_sentences, num_sentences)
+        ).tocsr()
+        self._graph_rows, self._graph_cols, self._graph_data = array('i'), array('i'), array('d')
+        if self._graph is None:
+            return edges
+
+        graph = self._graph
+        indptr = np.concatenate((graph.indptr, np.repeat(graph.indptr[-1], num_sentences - graph.shape[0])))
+        graph = csr_matrix((graph.data, graph.indices, indptr), shape=(num_sentences, num_sentences))
+        return graph + edges
+
+    def _update_svd(self):
+        start = self._decomposed
+        num_sentences = len(self._sentences)
+        if start == num_sentences:
+            return
+
+        # New sentences as columns of the term-sentence matrix
+        new_columns = self._get_matrix(start).T
+
+        if self._u is None:
+            num_concepts = min(self._topics, min(new_columns.shape))
+            if num_concepts < min(new_columns.shape):
+                u, sigma, v = BaseLsaSummarizer._svd(new_columns.tocsc(), num_concepts=num_concepts)
+            else:
+                u, sigma, v = np.linalg.svd(new_columns.toarray(), full_matrices=False)
+        else:
+            u, sigma, v = self._brand_update(new_columns)
+
+        self._u, self._sigma, self._v = BaseLsaSummarizer._flip_signs(u, sigma, v)
+        self._decomposed = num_sentences
+
+    def _brand_update(self, new_columns):
+        """
+        Update the truncated SVD U diag(sigma) V of the term-sentence matrix A with new columns C, such that
+        [A C] ~ U' diag(sigma') V' (M. Brand, 2006. Fast low-rank modifications of the thin singular value
+        decomposition). Only a (k + p) x (k + m) matrix is decomposed, for k topics, m new sentences and
+        p = min(m, number of terms) (the number of columns of the reduced QR decomposition of the new columns).
+        """
+        num_terms, num_new = new_columns.shape
+        num_concepts = len(self._sigma)
+
+        # Terms first seen in the new sentences do not appear in the existing sentences
+        u = np.zeros((num_terms, num_concepts), dtype=self._u.dtype)
+        u[:self._u.shape[0]] = self._u
+
+        c = new_columns.toarray()
+        m = np.dot(u.T, c)
+        q, r = np.linalg.qr(c - np.dot(u, m))
+
+        # With more new sentences than terms, the residual spans fewer dimensions than there are new sentences
+        k = np.zeros((num_concepts + q.shape[1], num_concepts + num_new), dtype=c.dtype)
+        k[:num_concepts, :num_concepts] = np.diag(self._sigma)
+        k[:num_concepts, num_concepts:] = m
+        k[num_concepts:, num_concepts:] = r
+        u_k, sigma, v_k = np.linalg.svd(k)
+
+        rank = min(self._topics, num_terms, len(sigma))
+        u = np.dot(np.hstack([u, q]), u_k[:, :rank])
+        v = np.hstack([np.dot(v_k[:rank, :num_concepts], self._v), v_k[:rank, num_concepts:]])
+        return u, sigma[:rank], v
+
+
+def _to_numpy(values, dtype, start=0):
+    """Copy an array.array (from index "start" onwards) into a numpy array of the given dtype."""
+    typecode_dtype = np.float64 if values.typecode == 'd' else np.int32
+    # Always copy: the array may be resized later, which would invalidate a view of its buffer
+    return np.frombuffer(values, dtype=typecode_dtype)[start:].astype(dtype)
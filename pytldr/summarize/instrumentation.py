@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from timeit import default_timer
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+
+class StageTimings(object):
+    """
+    Timing record for a single call to summarize. A record is created for each call when the summarizer has at
+    least one hook attached, and is passed to the emit() method of every hook once the summary is complete.
+    """
+
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self.stages = []  # List of (stage name, wall time in seconds) in the order the stages were executed
+        self.num_sentences = None
+        self.matrix_shape = None
+        self.nnz = None
+        self.total = None
+        self._start = default_timer()
+
+    def stage(self, name):
+        """Returns a context manager that records the wall time spent inside it under the given stage name."""
+        return _StageTimer(self, name)
+
+    def record_sentences(self, sentences):
+        self.num_sentences = len(sentences)
+
+    def record_matrix(self, matrix):
+        self.matrix_shape = matrix.shape
+        self.nnz = matrix.nnz
+
+    def finish(self):
+        self.total = default_timer() - self._start
+
+    def as_dict(self):
+        return {
+            'summarizer': self.summarizer,
+            'stages': dict(self.stages),
+            'num_sentences': self.num_sentences,
+            'matrix_shape': self.matrix_shape,
+            'nnz': self.nnz,
+            'total': self.total
+        }
+
+    def __repr__(self):
+        stages = ', '.join('{0}={1:.6f}s'.format(name, seconds) for name, seconds in self.stages)
+        return '<StageTimings {0}: {1} (total={2})>'.format(self.summarizer, stages, self.total)
+
+
+class _StageTimer(object):
+
+    __slots__ = ('_record', '_name', '_start')
+
+    def __init__(self, record, name):
+        self._record = record
+        self._name = name
+
+    def __enter__(self):
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._record.stages.append((self._name, default_timer() - self._start))
+        return False
+
+
+def current_rss():
+    """Returns the resident set size of the current process in bytes (None where this cannot be determined)."""
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Returns the peak resident set size of the current process in bytes (None where this is not available)."""
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryTimings(StageTimings):
+    """
+    StageTimings record that also tracks memory for each stage. For every stage, "memory" holds the resident set
+    size after the stage, the growth of the peak resident set size during the stage and, if tracemalloc is tracing,
+    the peak of traced Python allocations during the stage. Use by setting the timings_class of a summarizer.
+    """
+
+    def __init__(self, summarizer):
+        super(MemoryTimings, self).__init__(summarizer)
+        self.memory = []  # List of (stage name, dict of memory statistics in bytes)
+
+    def stage(self, name):
+        return _MemoryStageTimer(self, name)
+
+
+class _MemoryStageTimer(_StageTimer):
+
+    __slots__ = ('_peak_rss', '_traced')
+
+    def __enter__(self):
+        self._peak_rss = peak_rss()
+        self._traced = None
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        return super(_MemoryStageTimer, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(_MemoryStageTimer, self).__exit__(exc_type, exc_value, traceback)
+        stats = {'rss': current_rss()}
+        end_peak_rss = peak_rss()
+        if end_peak_rss is not None:
+            stats['peak_rss'] = end_peak_rss
+            stats['peak_rss_growth'] = end_peak_rss - self._peak_rss
+        if self._traced is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            stats['traced_peak'] = peak - self._traced
+            stats['traced_growth'] = current - self._traced
+        self._record.memory.append((self._name, stats))
+        return False
+
+
+class _NullStage(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _NullTimings(object):
+    """
+    Stand-in for StageTimings used when instrumentation is disabled. Every method is a no-op so that the
+    summarizers can be instrumented unconditionally at (almost) no cost.
+    """
+
+    __slots__ = ()
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def record_sentences(self, sentences):
+        pass
+
+    def record_matrix(self, matrix):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TIMINGS = _NullTimings()
+
+
+class TimingSink(object):
+    """
+    Base class for instrumentation hooks. Subclasses must implement emit(), which receives a StageTimings record
+    for every completed call to summarize.
+    """
+
+    def emit(self, record):
+        raise NotImplementedError
+
+
+class LoggingSink(TimingSink):
+    """Writes one log line per summarize call."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('pytldr')
+        self.level = level
+
+    def emit(self, record):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        stages = ' '.join('{0}={1:.6f}'.format(name, seconds) for name, seconds in record.stages)
+        self.logger.log(
+            self.level, '%s total=%.6f sentences=%s shape=%s nnz=%s %s',
+            record.summarizer, record.total or 0.0, record.num_sentences, record.matrix_shape, record.nnz, stages
+        )
+
+
+class HistogramSink(TimingSink):
+    """
+    Aggregates stage timings in memory as cumulative histograms, keyed by (summarizer, stage). The total wall time
+    of each call is aggregated under the stage name 'total'.
+    """
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_histograms'] = self._snapshot()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            for name, seconds in record.stages:
+                self._observe(record.summarizer, name, seconds)
+            if record.total is not None:
+                self._observe(record.summarizer, 'total', record.total)
+
+    def _observe(self, summarizer, stage, seconds):
+        key = (summarizer, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+
+        for ndx, upper_bound in enumerate(self.buckets):
+            if seconds <= upper_bound:
+                histogram['buckets'][ndx] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+    @property
+    def histograms(self):
+        """Returns a snapshot of the aggregated histograms."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return dict(
+            (key, {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']})
+            for key, value in self._histograms.items()
+        )
+
+    def mean(self, summarizer, stage):
+        histogram = self.histograms.get((summarizer, stage))
+        if not histogram or not histogram['count']:
+            return None
+        return histogram['sum'] / histogram['count']
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+class PrometheusExporter(HistogramSink):
+    """
+    Histogram aggregator that renders its contents in the Prometheus text exposition format, e.g. for serving
+    from a /metrics endpoint.
+    """
+
+    def __init__(self, buckets=HistogramSink.DEFAULT_BUCKETS, metric_name='pytldr_stage_seconds'):
+        super(PrometheusExporter, self).__init__(buckets)
+        self.metric_name = metric_name
+
+    def render(self):
+        lines = [
+            '# HELP {0} Wall time spent in each stage of summarization.'.format(self.metric_name),
+            '# TYPE {0} histogram'.format(self.metric_name)
+        ]
+        for (summarizer, stage), histogram in sorted(self.histograms.items()):
+            labels = 'summarizer="{0}",stage="{1}"'.format(summarizer, stage)
+            for upper_bound, count in zip(self.buckets, histogram['buckets']):
+                lines.append('{0}_bucket{{{1},le="{2!r}"}} {3}'.format(self.metric_name, labels, upper_bound, count))
+            lines.append('{0}_bucket{{{1},le="+Inf"}} {2}'.format(self.metric_name, labels, histogram['count']))
+            lines.append('{0}_sum{{{1}}} {2!r}'.format(self.metric_name, labels, histogram['sum']))
+            lines.append('{0}_count{{{1}}} {2}'.format(self.metric_name, labels, histogram['count']))
+        return '\n'.join(lines) + '\n'
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import threading
+from collections import OrderedDict
 import numpy as np
-from baseclass import BaseSummarizer
+from .baseclass import BaseSummarizer, Summary
+from .instrumentation import NULL_TIMINGS
+from .deadline import NO_DEADLINE
+from scipy.sparse import diags
 from scipy.sparse.linalg import svds
 from warnings import warn
 
@@ -10,140 +16,397 @@ class BaseLsaSummarizer(BaseSummarizer):
     This is an abstract base class for summarizers using the LSA method.
     """
 
+    # Largest number of topics considered when topics='auto'
+    MAX_AUTO_TOPICS = 50
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accepts the arguments of BaseSummarizer, and:
+
+        :param cache: a DecompositionCache in which the SVD of each document is kept (None by default, for no
+        caching). Summarizers sharing a cache, e.g. an LsaOzsoy and an LsaSteinberger, compute the SVD of a
+        document once for each set of parameters.
+        """
+        self._cache = kwargs.pop('cache', None)
+        super(BaseLsaSummarizer, self).__init__(*args, **kwargs)
+
+    @property
+    def cache(self):
+        return self._cache
+
     @classmethod
-    def _svd(cls, matrix, num_concepts=5):
+    def _svd(cls, matrix, num_concepts=5, deadline=NO_DEADLINE):
         """
         Perform singular value decomposition for dimensionality reduction of the input matrix.
+
+        ARPACK cannot be interrupted, so when there is a deadline the truncated SVD is computed with the randomized
+        method instead, whose power iterations stop once the deadline expires. ARPACK starts from a fixed vector:
+        its default random one depends on the calls made before in the same process, and when the matrix has fewer
+        distinct singular values than concepts, so do the singular vectors.
+        """
+        if deadline is NO_DEADLINE:
+            v0 = np.random.RandomState(0).uniform(-1, 1, min(matrix.shape)).astype(matrix.dtype)
+            u, s, v = svds(matrix, k=num_concepts, v0=v0)
+        else:
+            u, s, v = cls._randomized_svd(matrix, num_concepts, deadline=deadline)
+        return cls._flip_signs(u, s, v)
+
+    @staticmethod
+    def _flip_signs(u, s, v):
         """
-        u, s, v = svds(matrix, k=num_concepts)
+        The signs of singular vectors are arbitrary and may differ between runs or precisions. Flip each pair
+        of singular vectors such that the largest component of v is positive, so that the sentence scores
+        (which threshold v) are deterministic.
+        """
+        signs = np.sign(v[np.arange(v.shape[0]), np.abs(v).argmax(axis=1)])
+        signs[signs == 0] = 1
+        u *= signs
+        v *= signs[:, np.newaxis]
         return u, s, v
 
+    @classmethod
+    def _randomized_svd(cls, matrix, num_concepts, num_iter=4, oversamples=10, deadline=NO_DEADLINE, seed=0):
+        """
+        Randomized truncated SVD (Halko, Martinsson and Tropp, 2011). Each power iteration (two passes over the
+        matrix) refines the approximation of the range of the matrix; iteration stops early if the deadline
+        expires. The computation is carried out in the precision of the matrix.
+        """
+        num_samples = min(num_concepts + oversamples, min(matrix.shape))
+        q = cls._range_finder(matrix, num_samples, num_iter, deadline, seed)
+
+        # Project the matrix onto the approximate range and decompose the (small) result
+        b = np.asarray(matrix.T.dot(q)).T
+        u_b, s, v = np.linalg.svd(b, full_matrices=False)
+        u = np.dot(q, u_b)
+
+        return u[:, :num_concepts], s[:num_concepts], v[:num_concepts]
+
+    @staticmethod
+    def _range_finder(matrix, num_samples, num_iter, deadline=NO_DEADLINE, seed=0):
+        """
+        Returns an orthonormal basis (num_samples columns) approximating the range of the matrix, refined by
+        num_iter power iterations.
+        """
+        random_state = np.random.RandomState(seed)
+        omega = random_state.normal(size=(matrix.shape[1], num_samples)).astype(matrix.dtype)
+
+        q, _ = np.linalg.qr(matrix.dot(omega))
+        for _ in range(num_iter):
+            if deadline.expired():
+                deadline.truncate('svd')
+                break
+            q, _ = np.linalg.qr(matrix.T.dot(q))
+            q, _ = np.linalg.qr(matrix.dot(q))
+        return q
+
+    @classmethod
+    def _estimate_num_topics(cls, matrix, max_topics, energy=0.9, topic_sigma_threshold=0, num_iter=2):
+        """
+        Choose the number of topics from a cheap estimate of the largest singular values of the matrix: a
+        randomized sketch with a couple of power iterations, i.e. a few sparse matrix products. The number of
+        topics is the smallest number whose singular values account for the given fraction of the energy of the
+        matrix (its squared Frobenius norm), and never more than the number of singular values that
+        topic_sigma_threshold would keep anyway.
+        """
+        num_samples = min(max_topics + 10, min(matrix.shape))
+        q = cls._range_finder(matrix, num_samples, num_iter)
+        sigma = np.linalg.svd(np.asarray(matrix.T.dot(q)), compute_uv=False)[:max_topics]
+
+        total_energy = np.square(matrix.data).sum()
+        cumulative_energy = np.cumsum(np.square(sigma)) / total_energy
+        topics_energy = np.searchsorted(cumulative_energy, energy) + 1
+        topics_sigma = np.count_nonzero(sigma >= sigma[0] * (topic_sigma_threshold or 0))
+
+        return int(max(1, min(topics_energy, topics_sigma, max_topics)))
+
     @classmethod
     def _validate_num_topics(cls, topics, sentences):
-        # Determine the number of "linearly independent" sentences
-        # This gives us an estimate for the rank of the matrix for which we will compute SVD
-        sentences_set = set([frozenset(sentence.split(' ')) for sentence in sentences])
-        est_matrix_rank = len(sentences_set)
+        est_matrix_rank = cls._estimate_rank(sentences)
 
-        if est_matrix_rank <= 1:
-            raise SvdRankException('The sentence matrix does not have sufficient rank to compute SVD')
+        if topics == 'auto':
+            return topics
+        return cls._clamp_num_topics(topics, est_matrix_rank)
 
-        if topics > est_matrix_rank - 1:
+    @staticmethod
+    def _clamp_num_topics(topics, matrix_rank):
+        if topics > matrix_rank - 1:
             warn(
                 'The parameter "topics" must be <= rank(sentence_matrix) - 1 to avoid rank '
                 'deficiency in the SVD computation. The number of topics has been adjusted '
                 'to equal rank(sentence_matrix) - 1 but this could result in a poor summary.',
                 Warning
             )
-            topics = est_matrix_rank - 1
+            topics = matrix_rank - 1
 
         return topics
 
+    @classmethod
+    def _estimate_rank(cls, sentences):
+        # Determine the number of "linearly independent" sentences
+        # This gives us an estimate for the rank of the matrix for which we will compute SVD
+        sentences_set = set([frozenset(sentence.split(' ')) for sentence in sentences])
+        est_matrix_rank = len(sentences_set)
+
+        if est_matrix_rank <= 1:
+            raise SvdRankException('The sentence matrix does not have sufficient rank to compute SVD')
+
+        return est_matrix_rank
+
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        topics=4, binary_matrix=True, topic_sigma_threshold=None, topic_energy=0.9, method=None):
+        u, sigma, v = self._decompose(sentences, timings, deadline, weights, topics=topics,
+                                      binary_matrix=binary_matrix, topic_sigma_threshold=topic_sigma_threshold,
+                                      topic_energy=topic_energy)
+
+        with timings.stage('select'):
+            saliency_vec = self._scoring(method)._saliency(sigma, v, topic_sigma_threshold, weights)
+
+            top_sentences = saliency_vec.argsort()[-length:][::-1]
+            # Return the sentences in the order in which they appear in the document
+            top_sentences.sort()
+
+        return top_sentences
+
+    def _score_sentences(self, sentences, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None, topics=4,
+                         binary_matrix=True, topic_sigma_threshold=None, topic_energy=0.9, method=None):
+        u, sigma, v = self._decompose(sentences, timings, deadline, weights, topics=topics,
+                                      binary_matrix=binary_matrix, topic_sigma_threshold=topic_sigma_threshold,
+                                      topic_energy=topic_energy)
+
+        with timings.stage('saliency'):
+            return self._scoring(method)._saliency(sigma, v, topic_sigma_threshold, weights)
+
+    @classmethod
+    def _scoring(cls, method=None):
+        """Returns the class whose _saliency scores sentences for the given method (None for this summarizer's)."""
+        if method is None:
+            return cls
+        if method not in LSA_METHODS:
+            raise ValueError('Parameter "method" must take one of the values {0}'.format(
+                ', '.join('"{0}"'.format(name) for name in sorted(LSA_METHODS))
+            ))
+        return LSA_METHODS[method]
+
+    def _decompose(self, sentences, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None, topics=4,
+                   binary_matrix=True, topic_sigma_threshold=None, topic_energy=0.9):
+        """
+        Build the term-sentence matrix of a list of processed sentences and compute its truncated SVD. If topics is
+        'auto', the number of topics is chosen from an estimate of the singular values (see _estimate_num_topics).
+
+        If given, weights holds the number of identical sentences that each column stands for. Scaling each column
+        by the square root of its weight leaves the left singular vectors and singular values of the matrix with
+        the repeated columns unchanged, and the right singular vectors of the repeated columns are recovered by
+        undoing the scaling.
+
+        If the summarizer has a cache, decompositions are looked up in (and added to) the cache. Decompositions cut
+        short by the deadline are not cached.
+        """
+        cache_key = None
+        if self._cache is not None:
+            # The threshold and energy only affect the decomposition through the choice of the number of topics
+            auto_params = (topic_sigma_threshold, topic_energy) if topics == 'auto' else None
+            cache_key = self._cache.key(sentences, weights, self._dtype, topics, binary_matrix, auto_params,
+                                        self._hash_features, self._prune_vocabulary)
+            factors = self._cache.get(cache_key)
+            if factors is not None:
+                return factors
+
+        topics = self._validate_num_topics(topics, sentences)
+
+        # Generate a matrix of terms that appear in each sentence
+        weighting = 'binary' if binary_matrix else 'frequency'
+        with timings.stage('compute_matrix'):
+            sentence_matrix = self._compute_matrix(sentences, weighting=weighting, dtype=self._dtype,
+                                                   hash_features=self._hash_features, pruner=self._prune_vocabulary)
+            sentence_matrix = sentence_matrix.transpose()
+
+            # Filter out negatives in the sparse matrix (need to do this on Vt for LSA method). Signed hashing
+            # negates whole rows of terms, which changes u but neither sigma nor v, so hashed matrices are kept as
+            # they are.
+            if self._hash_features is None:
+                sentence_matrix = sentence_matrix.multiply(sentence_matrix > 0)
+
+            if weights is not None:
+                sentence_matrix = sentence_matrix.dot(diags(np.sqrt(weights), format='csr'))
+        timings.record_matrix(sentence_matrix)
+
+        # The estimated rank counts distinct sentences, but a pruned vocabulary can leave fewer terms than that
+        matrix_rank = min(sentence_matrix.shape)
+        if matrix_rank <= 1 or sentence_matrix.nnz == 0:
+            raise SvdRankException('The sentence matrix does not have sufficient rank to compute SVD')
+        if topics != 'auto':
+            topics = self._clamp_num_topics(topics, matrix_rank)
+
+        if topics == 'auto':
+            with timings.stage('estimate_topics'):
+                max_topics = min(self.MAX_AUTO_TOPICS, self._estimate_rank(sentences) - 1, matrix_rank - 1)
+                topics = self._estimate_num_topics(sentence_matrix, max_topics, topic_energy, topic_sigma_threshold)
+
+        with timings.stage('svd'):
+            u, sigma, v = self._svd(sentence_matrix, num_concepts=topics, deadline=deadline)
+            if weights is not None:
+                u, sigma, v = self._flip_signs(u, sigma, v / np.sqrt(weights))
 
-class SvdRankException(Exception):
+        if cache_key is not None and not deadline.truncated:
+            self._cache.put(cache_key, (u, sigma, v))
+        return u, sigma, v
+
+    @classmethod
+    def _saliency(cls, sigma, v, topic_sigma_threshold=None, weights=None):
+        """
+        Score each sentence given the singular values (sigma) and right singular vectors (v, one row per topic)
+        of the term-sentence matrix. If given, weights holds the number of sentences that each column stands for.
+        """
+        raise NotImplementedError
+
+
+class SvdRankException(ValueError):
     pass
 
 
+class DecompositionCache(object):
+    """
+    Thread-safe least recently used cache of truncated SVDs, keyed by the processed sentences of a document and the
+    parameters of the decomposition. The cached factors are shared and must not be modified.
+    """
+
+    def __init__(self, max_entries=16):
+        if max_entries < 1:
+            raise ValueError('Parameter "max_entries" must be a positive integer')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(sentences, weights, *params):
+        digest = hashlib.sha1()
+        for sentence in sentences:
+            digest.update(sentence.encode('utf-8') if isinstance(sentence, unicode) else sentence)
+            digest.update('\n')
+        if weights is not None:
+            digest.update(np.ascontiguousarray(weights).tostring())
+        return (digest.hexdigest(), len(sentences)) + tuple(str(param) for param in params)
+
+    def get(self, key):
+        with self._lock:
+            factors = self._entries.pop(key, None)
+            if factors is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries[key] = factors
+            return factors
+
+    def put(self, key, factors):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = factors
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_entries'] = OrderedDict(self._entries)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
 class LsaSteinberger(BaseLsaSummarizer):
 
-    def summarize(self, text, topics=4, length=5, binary_matrix=True, topic_sigma_threshold=0.5):
+    def summarize(self, text, topics=4, length=5, binary_matrix=True, topic_sigma_threshold=0.5, topic_energy=0.9):
         """
         Implements the method of latent semantic analysis described by Steinberger and Jezek in the paper:
 
         J. Steinberger and K. Jezek (2004). Using latent semantic analysis in text summarization and summary evaluation.
         Proc. ISIM ’04, pp. 93–100.
 
-        :param text: a string of text to be summarized, path to a text file, or URL starting with http
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
         :param topics: the number of topics/concepts covered in the input text (defines the degree of
-        dimensionality reduction in the SVD step)
+        dimensionality reduction in the SVD step), or 'auto' to choose it from a fast estimate of the singular values
         :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
         of the original document (e.g. 0.5)
         :param binary_matrix: boolean value indicating whether the matrix of word counts should be binary
         (True by default)
         :param topic_sigma_threshold: filters out topics/concepts with a singular value less than this
         percentage of the largest singular value (must be between 0 and 1, 0.5 by default)
+        :param topic_energy: when topics is 'auto', the fraction of the energy (sum of squared singular values) of
+        the matrix that the topics must account for (0.9 by default). No more topics are computed than
+        topic_sigma_threshold would keep.
         :return: list of sentences for the summary
         """
 
-        text = self._parse_input(text)
-
-        sentences, unprocessed_sentences = self._tokenizer.tokenize_sentences(text)
-
-        length = self._parse_summary_length(length, len(sentences))
-        if length == len(sentences):
-            return unprocessed_sentences
-
-        topics = self._validate_num_topics(topics, sentences)
-
-        # Generate a matrix of terms that appear in each sentence
-        weighting = 'binary' if binary_matrix else 'frequency'
-        sentence_matrix = self._compute_matrix(sentences, weighting=weighting)
-        sentence_matrix = sentence_matrix.transpose()
-
-        # Filter out negatives in the sparse matrix (need to do this on Vt for LSA method):
-        sentence_matrix = sentence_matrix.multiply(sentence_matrix > 0)
+        return self._summarize(text, length, topics=topics, binary_matrix=binary_matrix,
+                               topic_sigma_threshold=topic_sigma_threshold, topic_energy=topic_energy)
 
-        s, u, v = self._svd(sentence_matrix, num_concepts=topics)
+    @classmethod
+    def _saliency(cls, sigma, v, topic_sigma_threshold=None, weights=None):
+        if topic_sigma_threshold is None:
+            topic_sigma_threshold = 0.5
 
         # Only consider topics/concepts whose singular values are half of the largest singular value
         if 1 <= topic_sigma_threshold < 0:
             raise ValueError('Parameter topic_sigma_threshold must take a value between 0 and 1')
 
-        sigma_threshold = max(u) * topic_sigma_threshold
-        u[u < sigma_threshold] = 0  # Set all other singular values to zero
+        sigma = sigma.copy()
+        sigma_threshold = max(sigma) * topic_sigma_threshold
+        sigma[sigma < sigma_threshold] = 0  # Set all other singular values to zero
 
         # Build a "length vector" containing the length (i.e. saliency) of each sentence
-        saliency_vec = np.dot(np.square(u), np.square(v))
-
-        top_sentences = saliency_vec.argsort()[-length:][::-1]
-        # Return the sentences in the order in which they appear in the document
-        top_sentences.sort()
-
-        return [unprocessed_sentences[i] for i in top_sentences]
+        return np.dot(np.square(sigma), np.square(v))
 
 
 class LsaOzsoy(BaseLsaSummarizer):
 
-    def summarize(self, text, topics=4, length=5, binary_matrix=True, topic_sigma_threshold=0):
+    def summarize(self, text, topics=4, length=5, binary_matrix=True, topic_sigma_threshold=0, topic_energy=0.9):
         """
         Implements the "cross method" of latent semantic analysis described by Ozsoy et al. in the paper:
 
         Ozsoy, M., Alpaslan, F., and Cicekli, I. (2011). Text summarization using latent semantic analysis.
         Journal of Information Science, 37(4), 405-417.
 
-        :param text: a string of text to be summarized, path to a text file, or URL starting with http
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
         :param topics: the number of topics/concepts covered in the input text (defines the degree of
-        dimensionality reduction in the SVD step)
+        dimensionality reduction in the SVD step), or 'auto' to choose it from a fast estimate of the singular values
         :param length: the length of the output summary; either a number of sentences (5) or a percentage
         of the original document (e.g. 0.5)
         :param binary_matrix: boolean value indicating whether the matrix of word counts should be binary
         (True by default)
         :param topic_sigma_threshold: filters out topics/concepts with a singular value less than this
         percentage of the largest singular value (must be between 0 and 1, 0 by default)
+        :param topic_energy: when topics is 'auto', the fraction of the energy (sum of squared singular values) of
+        the matrix that the topics must account for (0.9 by default). No more topics are computed than
+        topic_sigma_threshold would keep.
         :return: list of sentences for the summary
         """
 
-        text = self._parse_input(text)
-
-        sentences, unprocessed_sentences = self._tokenizer.tokenize_sentences(text)
+        return self._summarize(text, length, topics=topics, binary_matrix=binary_matrix,
+                               topic_sigma_threshold=topic_sigma_threshold, topic_energy=topic_energy)
 
-        length = self._parse_summary_length(length, len(sentences))
-        if length == len(sentences):
-            return unprocessed_sentences
-
-        topics = self._validate_num_topics(topics, sentences)
-
-        weighting = 'binary' if binary_matrix else 'frequency'
-        sentence_matrix = self._compute_matrix(sentences, weighting=weighting)
-        sentence_matrix = sentence_matrix.transpose()
-
-        # Filter out negatives in the sparse matrix (need to do this on Vt for LSA method):
-        sentence_matrix = sentence_matrix.multiply(sentence_matrix > 0)
+    @classmethod
+    def _saliency(cls, sigma, v, topic_sigma_threshold=None, weights=None):
+        if topic_sigma_threshold is None:
+            topic_sigma_threshold = 0
 
-        s, u, v = self._svd(sentence_matrix, num_concepts=topics)
+        v = v.copy()
 
         # Get the average sentence score for each topic (i.e. each row in matrix v)
-        topic_averages = v.mean(axis=1)
+        topic_averages = np.average(v, axis=1, weights=weights)
 
         # Set sentences whose scores fall below the topic average to zero
         # This removes less related sentences from each concept
@@ -154,18 +417,109 @@ class LsaOzsoy(BaseLsaSummarizer):
         if 1 <= topic_sigma_threshold < 0:
             raise ValueError('Parameter topic_sigma_threshold must take a value between 0 and 1')
 
-        sigma_threshold = max(u) * topic_sigma_threshold
-        u[u < sigma_threshold] = 0  # Set all other singular values to zero
+        sigma = sigma.copy()
+        sigma_threshold = max(sigma) * topic_sigma_threshold
+        sigma[sigma < sigma_threshold] = 0  # Set all other singular values to zero
 
         # Build a "length vector" containing the length (i.e. saliency) of each sentence
-        saliency_vec = np.dot(np.square(u), np.square(v))
+        return np.dot(np.square(sigma), np.square(v))
 
-        top_sentences = saliency_vec.argsort()[-length:][::-1]
-        # Return the sentences in the order in which they appear in the document
-        top_sentences.sort()
 
-        return [unprocessed_sentences[i] for i in top_sentences]
+# Default LsaSummarizer just uses the Ozsoy method
+LsaSummarizer = LsaOzsoy
 
+class LsaEngine(BaseLsaSummarizer):
+    """
+    LSA summarizer that serves both the Ozsoy and the Steinberger scoring methods from one (cached) decomposition
+    of each document, and exposes the decomposition itself. Running both methods on a document, or sweeping
+    topic_sigma_threshold and length, costs a single SVD:
 
-# Default LsaSummarizer just uses the Ozsoy method
-LsaSummarizer = LsaOzsoy
\ No newline at end of file
+        engine = LsaEngine()
+        decomposition = engine.decompose(text, topics=4)
+        for threshold in (0, 0.25, 0.5):
+            summary = decomposition.summarize(length=5, method='steinberger', topic_sigma_threshold=threshold)
+
+    Accepts the arguments of BaseLsaSummarizer; a DecompositionCache is created if no cache is given.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('cache') is None:
+            kwargs['cache'] = DecompositionCache()
+        super(LsaEngine, self).__init__(*args, **kwargs)
+
+    def summarize(self, text, method='ozsoy', topics=4, length=5, binary_matrix=True, topic_sigma_threshold=None,
+                  topic_energy=0.9):
+        """
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
+        :param method: the scoring method, 'ozsoy' (as LsaOzsoy) or 'steinberger' (as LsaSteinberger)
+        :param topic_sigma_threshold: as for the chosen method (None for the default of the method)
+
+        The other parameters are those of LsaOzsoy.summarize.
+        """
+        self._scoring(method)
+        return self._summarize(text, length, topics=topics, binary_matrix=binary_matrix,
+                               topic_sigma_threshold=topic_sigma_threshold, topic_energy=topic_energy, method=method)
+
+    def decompose(self, text, topics=4, binary_matrix=True, topic_sigma_threshold=None, topic_energy=0.9):
+        """
+        Compute (or look up) the decomposition of a document. The byte budget and duplicate collapsing of the
+        engine apply, but the sentence budget does not.
+
+        :param text: a string of text, path to a text file, URL starting with http, or PreprocessedDocument
+        :param topic_sigma_threshold: only used to choose the number of topics when topics is 'auto'
+        :return: LsaDecomposition
+
+        The other parameters are those of LsaOzsoy.summarize.
+        """
+        sentences, unprocessed_sentences, _ = self._read_input(text, degraded=[])
+        weights = None
+        if self._collapse_duplicates:
+            sentences, unprocessed_sentences, weights = self._collapse_sentences(sentences, unprocessed_sentences)
+
+        u, sigma, v = self._decompose(sentences, weights=weights, topics=topics, binary_matrix=binary_matrix,
+                                      topic_sigma_threshold=topic_sigma_threshold, topic_energy=topic_energy)
+        return LsaDecomposition(u, sigma, v, unprocessed_sentences, weights)
+
+    @classmethod
+    def _saliency(cls, sigma, v, topic_sigma_threshold=None, weights=None):
+        return LsaOzsoy._saliency(sigma, v, topic_sigma_threshold, weights)
+
+
+class LsaDecomposition(object):
+    """
+    Truncated SVD of the term-sentence matrix of a document, as returned by LsaEngine.decompose.
+
+    u: left singular vectors (one column per topic, one row per term)
+    sigma: singular values
+    v: right singular vectors (one row per topic, one column per sentence)
+    sentences: the (unprocessed) sentences of the document, in the order of the columns of v
+    weights: number of sentences that each column stands for if duplicates were collapsed (None otherwise)
+    """
+
+    def __init__(self, u, sigma, v, sentences, weights=None):
+        self.u = u
+        self.sigma = sigma
+        self.v = v
+        self.sentences = sentences
+        self.weights = weights
+
+    def scores(self, method='ozsoy', topic_sigma_threshold=None):
+        """Returns the saliency of each sentence under the given scoring method ('ozsoy' or 'steinberger')."""
+        scoring = BaseLsaSummarizer._scoring(method)
+        return scoring._saliency(self.sigma, self.v, topic_sigma_threshold, self.weights)
+
+    def summarize(self, length=5, method='ozsoy', topic_sigma_threshold=None):
+        """
+        :param length: the length of the summary; either a number of sentences (e.g. 5) or a percentage of the
+        document (e.g. 0.5)
+        :param method: the scoring method, 'ozsoy' or 'steinberger'
+        :param topic_sigma_threshold: as for the chosen method (None for the default of the method)
+        :return: Summary of the top sentences, in the order in which they appear in the document
+        """
+        length = BaseLsaSummarizer._parse_summary_length(length, len(self.sentences))
+        top_sentences = self.scores(method, topic_sigma_threshold).argsort()[-length:] if length else []
+        return Summary([self.sentences[i] for i in sorted(top_sentences)])
+
+
+LSA_METHODS = {'ozsoy': LsaOzsoy, 'steinberger': LsaSteinberger}
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from ..nlp.dedup import MinHashLSH
+from .textrank import TextRankSummarizer
+
+
+class MultiDocumentSummarizer(object):
+    """
+    Summarizes a cluster of related documents, such as news articles covering the same story, in three steps:
+
+    1. Near-duplicate sentences across (and within) the documents are removed using MinHash signatures of their
+       sanitized token sets and locality sensitive hashing, keeping the first occurrence of each.
+    2. The remaining sentences are scored together by the wrapped summarizer, each weighted by the number of
+       sentences it stands for (so that a sentence reported by several sources carries more weight).
+    3. Sentences are selected by maximal marginal relevance (Carbonell and Goldstein, 1998), which trades the score
+       of each sentence off against its cosine similarity to the sentences already selected.
+
+    Apart from the scoring step, whose cost is that of the wrapped summarizer, each step is linear in the total
+    number of sentences (selection costs one sparse matrix-vector product per selected sentence).
+
+    Example:
+
+        summarizer = MultiDocumentSummarizer(LsaOzsoy())
+        summary = summarizer.summarize([article1, article2, article3], length=5)
+        summary.sources  # (document index, sentence index) of each summary sentence
+    """
+
+    def __init__(self, summarizer=None, threshold=0.8, num_perm=64, bands=16, diversity=0.3):
+        """
+        :param summarizer: summarizer used to tokenize the documents and score their sentences (a
+        TextRankSummarizer by default). Its hooks and timeout apply to each call to summarize.
+        :param threshold: sentences whose token sets have an estimated Jaccard similarity of at least this value
+        are near duplicates (between 0 and 1, 0.8 by default)
+        :param num_perm: number of hash functions in the MinHash signature of each sentence
+        :param bands: number of LSH bands (must divide num_perm)
+        :param diversity: weight of redundancy relative to score in the selection, between 0 (rank by score only)
+        and 1 (0.3 by default)
+        """
+        if not 0 <= diversity <= 1:
+            raise ValueError('Parameter "diversity" must take a value between 0 and 1')
+
+        self._summarizer = summarizer if summarizer is not None else TextRankSummarizer()
+        self._lsh = MinHashLSH(num_perm=num_perm, bands=bands, threshold=threshold)
+        self._diversity = diversity
+
+    def summarize(self, texts, length=5, **params):
+        """
+        :param texts: list of documents; each is a string of text, path to a text file, URL starting with http,
+        or PreprocessedDocument
+        :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
+        of the deduplicated sentences of all documents (e.g. 0.1)
+        :param params: keyword arguments of the wrapped summarizer's summarize method (e.g. topics for LSA)
+        :return: Summary of the selected sentences, ordered by document and then by position in the document. Its
+        "sources" attribute holds the (document index, index among the tokenized sentences of that document) of
+        each sentence and its "duplicates" attribute the number of sentences removed as near duplicates.
+        """
+        summarizer = self._summarizer
+        timings = summarizer._start_timings()
+        deadline = summarizer._start_deadline()
+
+        sentences, unprocessed_sentences, sources = [], [], []
+        for doc_ndx, text in enumerate(texts):
+            doc_sentences, doc_unprocessed, _ = summarizer._read_input(text, timings)
+            sentences += doc_sentences
+            unprocessed_sentences += doc_unprocessed
+            sources += [(doc_ndx, ndx) for ndx in range(len(doc_sentences))]
+        timings.record_sentences(sentences)
+
+        with timings.stage('deduplicate'):
+            clusters = self._lsh.duplicates([sentence.split(' ') for sentence in sentences])
+            kept = [ndx for ndx, first in enumerate(clusters) if ndx == first]
+            weights = np.bincount(clusters, minlength=len(sentences))[kept].astype(summarizer._dtype)
+        duplicates = len(sentences) - len(kept)
+        sentences = [sentences[ndx] for ndx in kept]
+
+        length = summarizer._parse_summary_length(length, len(sentences))
+        if length == len(sentences):
+            selected = range(len(sentences))
+        else:
+            scores = summarizer._score_sentences(sentences, timings, deadline, weights, **params)
+
+            with timings.stage('select'):
+                matrix = summarizer._compute_matrix(sentences, norm='l2', dtype=summarizer._dtype,
+                                                    hash_features=summarizer._hash_features,
+                                                    pruner=summarizer._prune_vocabulary)
+                selected = self._mmr(matrix, scores, length, self._diversity)
+
+        summary = summarizer._finish([unprocessed_sentences[kept[ndx]] for ndx in selected], timings,
+                                     deadline=deadline)
+        summary.sources = [sources[kept[ndx]] for ndx in selected]
+        summary.duplicates = duplicates
+        return summary
+
+    @staticmethod
+    def _mmr(matrix, scores, length, diversity):
+        """
+        Select "length" rows of an l2-normalized sentence-term matrix by maximal marginal relevance. Scores are
+        rescaled to [0, 1] so that they are comparable with cosine similarities. Returns the selected indices in
+        the order in which the sentences appear.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        score_range = scores.max() - scores.min()
+        if score_range > 0:
+            relevance = (scores - scores.min()) / score_range
+        else:
+            relevance = np.zeros(len(scores))
+
+        # Highest similarity of each sentence to any selected sentence
+        redundancy = np.zeros(len(scores))
+        selected = []
+        for _ in range(length):
+            marginal_relevance = (1 - diversity) * relevance - diversity * redundancy
+            marginal_relevance[selected] = -np.inf
+            best = int(marginal_relevance.argmax())
+            selected.append(best)
+
+            similarity = np.asarray(matrix.dot(matrix[best].T).todense()).ravel()
+            np.maximum(redundancy, similarity, out=redundancy)
+
+        selected.sort()
+        return selected
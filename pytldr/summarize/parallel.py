@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+import mmap
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from Queue import Empty, Queue
+import numpy as np
+from .baseclass import Summary
+from .scheduling import QueueStats, Scheduler, estimate_cost
+
+# State of each worker process, set up once by _init_worker
+_worker = {}
+
+
+class ParallelSummarizer(object):
+    """
+    Summarizes a corpus of documents with a pool of workers, either processes or threads.
+
+    With worker processes, documents and summaries are not pickled between processes. The corpus is written to an
+    anonymous shared memory mapping that the workers inherit when they are forked (so worker processes need the
+    fork start method of Unix); workers are sent the byte offsets of their documents and send back the (start, end)
+    offsets of the summary sentences in each document, as arrays of integers.
+
+    With threads, all workers share the summarizer (summarizers are reentrant) and a single copy of the corpus, so
+    memory does not grow with the number of workers. Threads run in parallel wherever NumPy, SciPy and ARPACK
+    release the GIL (sparse products, SVD, PageRank), but tokenization holds it, so threads pay off mainly when
+    ranking dominates, e.g. for long documents.
+
+    The cost of each document is estimated from its size and number of sentences, and tasks are dispatched to the
+    workers one at a time, as workers become free, in the order of the schedule (see scheduling.Scheduler). In mixed
+    workloads, shortest-job-first ('sjf') or separate lanes for small and large documents ('lanes') keep the many
+    small documents from queueing behind a few large ones, which cuts their latency. The queueing statistics of the
+    last call are kept in the "stats" attribute (see scheduling.QueueStats).
+
+    Example:
+
+        runner = ParallelSummarizer(TextRankSummarizer(), processes=4, schedule='lanes')
+        summaries = runner.summarize(documents, length=3)
+        for ndx, summary in runner.summarize_unordered(documents, length=3):
+            ...
+        runner.stats.summary()['small']['latency_p99']
+        for summary in runner.summarize_stream(iter_records('archive.jsonl.gz'), length=3):
+            ...
+    """
+
+    BACKENDS = ('process', 'thread')
+
+    # Interval in seconds at which running tasks are checked for failures (see _next_completed)
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, summarizer, processes=None, batch_size=16, backend='process', schedule='fifo', fairness=0.0,
+                 large_cost=None, large_workers=1):
+        """
+        :param summarizer: the summarizer run by the workers. With worker processes, it is sent to each worker once,
+        when the pool starts, so it must be picklable (in particular, its hooks).
+        :param processes: number of workers (the number of CPUs by default)
+        :param batch_size: number of documents sent to a worker at a time. Summarizers with a summarize_batch
+        method summarize each batch in a single call.
+        :param backend: 'process' for a pool of worker processes, 'thread' for a pool of threads
+        :param schedule: order in which documents are dispatched: 'fifo' (input order, the default), 'sjf' (cheapest
+        first) or 'lanes' (small and large documents on separate workers)
+        :param fairness: fraction of the dispatches of 'sjf' that go to the document that comes first in the input
+        instead of the cheapest one, between 0 and 1 (0 by default)
+        :param large_cost: estimated cost (see scheduling.estimate_cost) above which a document is large, for
+        'lanes' (10 times the median cost of the documents by default)
+        :param large_workers: number of workers that large documents may occupy while small ones are waiting, for
+        'lanes' (1 by default)
+        """
+        if batch_size < 1:
+            raise ValueError('Parameter "batch_size" must be a positive integer')
+        if backend not in self.BACKENDS:
+            raise ValueError('Parameter "backend" must take one of the values "process" or "thread"')
+        # Validates the scheduling parameters
+        Scheduler([], batch_size, schedule, fairness, large_cost, large_workers)
+        self._summarizer = summarizer
+        self._processes = processes
+        self._batch_size = batch_size
+        self._backend = backend
+        self._schedule = (schedule, fairness, large_cost, large_workers)
+        self.stats = None
+
+    def summarize(self, texts, length=5, **params):
+        """
+        :param texts: list of documents; each is a string of text or path to a (possibly compressed) text file
+        :param length: the length of each summary; either a number of sentences (e.g. 5) or a percentage of each
+        document (e.g. 0.5)
+        :param params: keyword arguments of the summarizer's summarize method
+        :return: list of summaries, one per document. The sentences of each summary are the spans of the document
+        they were selected from, verbatim (the summarizer's own summaries normalize line breaks within sentences),
+        and its "spans" attribute holds their (start, end) offsets as an array of shape (number of sentences, 2).
+        """
+        return self._summarize_parsed([self._summarizer._parse_input(text) for text in texts], length, params)
+
+    def summarize_stream(self, texts, length=5, chunk_size=1000, **params):
+        """
+        As summarize, but for a stream of documents such as the records of an archive (see
+        pytldr.nlp.iter_records): documents are read and summarized chunk_size at a time, and the summaries are
+        yielded in input order, so that only one chunk of the stream is held in memory at a time. Documents are
+        scheduled within each chunk, and "stats" describes the last one. The same workers summarize every chunk.
+
+        :param texts: iterable of documents; each is a string of text or path to a (possibly compressed) text file
+        :param chunk_size: number of documents summarized together
+        """
+        if chunk_size < 1:
+            raise ValueError('Parameter "chunk_size" must be a positive integer')
+
+        workers = self._start_workers()
+        try:
+            chunk = []
+            for text in texts:
+                chunk.append(self._summarizer._parse_input(text))
+                if len(chunk) == chunk_size:
+                    for summary in self._summarize_parsed(chunk, length, params, workers):
+                        yield summary
+                    chunk = []
+            if chunk:
+                for summary in self._summarize_parsed(chunk, length, params, workers):
+                    yield summary
+            workers.close()
+        except BaseException:
+            workers.terminate()
+            raise
+
+    def summarize_unordered(self, texts, length=5, **params):
+        """
+        As summarize, but yields (document index, summary) pairs as soon as each summary is ready, in the order in
+        which they complete.
+        """
+        return self._iter_summaries([self._summarizer._parse_input(text) for text in texts], length, params)
+
+    def summarize_spans(self, texts, length=5, **params):
+        """
+        As summarize, but returns only the array of (start, end) offsets of the summary sentences of each document
+        (offsets into the ASCII text of the document, as returned by pytldr.nlp.parse_input).
+        """
+        texts = [self._summarizer._parse_input(text) for text in texts]
+        results = [None] * len(texts)
+        for ndx, spans in self._iter_spans(texts, length, params):
+            results[ndx] = spans
+        return results
+
+    def _summarize_parsed(self, texts, length, params, workers=None):
+        summaries = [None] * len(texts)
+        for ndx, summary in self._iter_summaries(texts, length, params, workers):
+            summaries[ndx] = summary
+        return summaries
+
+    def _iter_summaries(self, texts, length, params, workers=None):
+        for ndx, spans in self._iter_spans(texts, length, params, workers):
+            summary = Summary([texts[ndx][start:end] for start, end in spans], spans=spans)
+            yield ndx, summary
+
+    def _start_workers(self):
+        workers = self._processes or cpu_count()
+        if self._backend == 'thread':
+            return _ThreadWorkers(self._summarizer, workers)
+        return _ProcessWorkers(self._summarizer, workers)
+
+    def _iter_spans(self, texts, length, params, workers=None):
+        """
+        Yields the (document index, spans) pairs of the documents as they are summarized. If workers (as returned by
+        _start_workers) are given, they are left running for further calls; otherwise workers are started for this
+        call only.
+        """
+        if workers is not None:
+            for result in self._run(workers, texts, length, params):
+                yield result
+            return
+
+        workers = self._start_workers()
+        try:
+            for result in self._run(workers, texts, length, params):
+                yield result
+            workers.close()
+        except BaseException:
+            workers.terminate()
+            raise
+
+    def _run(self, workers, texts, length, params):
+        """
+        Dispatch the tasks of the schedule of the documents to the workers, keeping at most one task per worker in
+        flight so that the scheduler decides the order in which tasks start, and yield the (document index, spans)
+        pairs of each task as it completes.
+        """
+        scheduler = Scheduler([estimate_cost(text) for text in texts], self._batch_size, *self._schedule)
+        self.stats = stats = QueueStats(scheduler)
+        pool, function, make_task = workers.load(texts, length, params)
+
+        completed = Queue()
+        running, results = {}, {}
+        while True:
+            while len(running) < workers.size:
+                task = scheduler.next_task(running.values())
+                if task is None:
+                    break
+                running[task.ndx] = task
+                stats.dispatched(task)
+                results[task.ndx] = pool.apply_async(_call_task, (function, make_task(task.documents), task.ndx),
+                                                     callback=completed.put)
+            if not running:
+                break
+
+            task_ndx = self._next_completed(completed, results)
+            _, error, batch_results = results.pop(task_ndx).get()
+            if error is not None:
+                raise error
+            stats.completed(running.pop(task_ndx))
+            for result in batch_results:
+                yield result
+
+    @classmethod
+    def _next_completed(cls, completed, results):
+        """
+        Wait for the next task to complete and return its index. The pool only calls back when a task succeeds: a
+        task whose arguments or result cannot be pickled fails without a callback, so the results of the running
+        tasks are polled while waiting, and the error of a failed task is raised.
+        """
+        while True:
+            try:
+                return completed.get(timeout=cls.POLL_INTERVAL)[0]
+            except Empty:
+                for result in results.values():
+                    if result.ready() and not result.successful():
+                        result.get()
+
+
+class _ThreadWorkers(object):
+    """Pool of threads that share the summarizer and the documents of each call."""
+
+    def __init__(self, summarizer, size):
+        self.size = size
+        self._summarizer = summarizer
+        self._pool = None
+
+    def load(self, texts, length, params):
+        """
+        Prepare the workers for a call. Returns the pool, the function that it runs on each task and the function
+        that makes the argument of a task from its list of documents.
+        """
+        if self._pool is None:
+            self._pool = ThreadPool(self.size)
+        summarizer = self._summarizer
+
+        def run_task(documents):
+            return _summarize_documents(summarizer, [(ndx, texts[ndx]) for ndx in documents], length, params)
+
+        return self._pool, run_task, list
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+
+
+class _ProcessWorkers(object):
+    """
+    Pool of worker processes that share an anonymous memory mapping holding the documents of the current call. The
+    mapping is created before the workers are forked, so that they inherit it, and each call writes its documents
+    to it: nothing is written to disk, and consecutive calls (such as the chunks of a stream) reuse the same
+    workers. When the documents of a call do not fit, the mapping is replaced by one at least twice as large, and
+    the workers with it.
+    """
+
+    MIN_CORPUS_BYTES = 2 ** 20
+
+    def __init__(self, summarizer, size):
+        self.size = size
+        self._summarizer = summarizer
+        self._pool = None
+        self._corpus = None
+
+    def load(self, texts, length, params):
+        """As _ThreadWorkers.load."""
+        # Documents are stored as the ASCII text that the summarizer sees, so that offsets are the same in the
+        # parent and in the workers
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(text) for text in texts])
+
+        if self._corpus is None or len(self._corpus) < offsets[-1]:
+            capacity = 2 * len(self._corpus) if self._corpus is not None else self.MIN_CORPUS_BYTES
+            capacity = max(capacity, int(offsets[-1]))
+            self.close()
+            self._corpus = mmap.mmap(-1, capacity)
+            self._pool = Pool(self.size, initializer=_init_worker, initargs=(self._corpus, self._summarizer))
+
+        self._corpus.seek(0)
+        for text in texts:
+            self._corpus.write(text)
+
+        def make_task(documents):
+            return [(ndx, int(offsets[ndx]), int(offsets[ndx + 1])) for ndx in documents], length, params
+
+        return self._pool, _summarize_task, make_task
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        self._release()
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+        self._release()
+
+    def _release(self):
+        if self._corpus is not None:
+            self._corpus.close()
+        self._pool = self._corpus = None
+
+
+def _call_task(function, arguments, task_ndx):
+    # Errors are returned rather than raised: Python 2 pools have no error callbacks
+    try:
+        return task_ndx, None, function(arguments)
+    except Exception as error:
+        return task_ndx, error, None
+
+
+def _init_worker(corpus, summarizer):
+    # The corpus is an anonymous mapping inherited from the parent when the pool forks the worker
+    _worker['corpus'] = corpus
+    _worker['summarizer'] = summarizer
+
+
+def _summarize_task(task):
+    documents, length, params = task
+    corpus = _worker['corpus']
+    documents = [(ndx, corpus[start:end]) for ndx, start, end in documents]
+    return _summarize_documents(_worker['summarizer'], documents, length, params)
+
+
+def _summarize_documents(summarizer, documents, length, params):
+    """Summarize a list of (document index, text) pairs and return the (document index, spans) pairs."""
+    texts = [text for _, text in documents]
+    if hasattr(summarizer, 'summarize_batch') and summarizer._batch_ranking:
+        summaries = summarizer.summarize_batch(texts, length=length, **params)
+    else:
+        summaries = [summarizer.summarize(text, length=length, **params) for text in texts]
+
+    results = []
+    for (ndx, _), summary in zip(documents, summaries):
+        if getattr(summary, 'spans', None) is None:
+            raise ValueError('{0} does not report the spans of its summary sentences'.format(
+                summarizer.__class__.__name__))
+        results.append((ndx, summary.spans.astype(np.int32)))
+    return results
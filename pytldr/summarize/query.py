@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from ..nlp import Tokenizer, parse_input
+from .baseclass import BaseSummarizer, Summary
+
+
+class QueryIndex(object):
+    """
+    Inverted index of the sentences of a document, for answering many query-focused summaries of the same
+    document. The document is parsed, split and sanitized once, when the index is built; every query is then
+    sanitized with the same tokenizer and scored against the postings of its terms only.
+
+    The weight of a term in a sentence is its tf-idf weight (with sentences as documents), and sentence vectors
+    are l2-normalized, so that the score of a sentence is the cosine similarity of its tf-idf vector to that of
+    the query. Sentences that share no term with the query are never scored.
+
+    Example:
+
+        index = QueryIndex(text)
+        index.summarize('bailout extension', length=3)
+        index.summarize('European Central Bank', length=3)
+        index.save('article.npz')
+        index = QueryIndex.load('article.npz')
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, text=None, tokenizer=None, word_threshold=5):
+        """
+        :param text: a string of text, path to a text file, or URL starting with http (None for an empty index, as
+        used by load)
+        :param tokenizer: Tokenizer used to sanitize both the sentences and the queries (English tokenizer by
+        default)
+        :param word_threshold: number of significant words that a sentence must contain to be indexed
+        """
+        self._tokenizer = tokenizer if tokenizer is not None else Tokenizer('english')
+        # Queries are split into terms exactly as the sentences are by the vectorizer
+        self._analyzer = CountVectorizer().build_analyzer()
+        self.sentences = []
+        self._terms = {}
+        self._idf = np.zeros(0)
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0)
+
+        if text is not None:
+            self._build(parse_input(text), word_threshold)
+
+    def _build(self, text, word_threshold):
+        sentences, self.sentences = self._tokenizer.tokenize_sentences(text, word_threshold=word_threshold)
+        if not sentences:
+            return
+
+        vectorizer = TfidfVectorizer(min_df=1, ngram_range=(1, 1), stop_words=None)
+        try:
+            matrix = vectorizer.fit_transform(sentences)
+        except ValueError:  # No sentence has a term that the vectorizer keeps
+            return
+
+        # The term-sentence matrix in CSR format holds the postings list of each term
+        postings = matrix.T.tocsr()
+        postings.sort_indices()
+        self._terms = vectorizer.vocabulary_
+        self._idf = vectorizer.idf_
+        self._indptr = postings.indptr.astype(np.int32)
+        self._postings = postings.indices.astype(np.int32)
+        self._weights = postings.data
+
+    def __len__(self):
+        return len(self.sentences)
+
+    @property
+    def num_terms(self):
+        return len(self._terms)
+
+    def query_vector(self, query):
+        """
+        Returns the term ids of a query and their weights: the tf-idf weights of the sanitized query, l2-normalized.
+        Terms that do not appear in the document are dropped.
+        """
+        counts = Counter(
+            self._terms[term] for term in self._analyzer(self._tokenizer.sanitize_text(query)) if term in self._terms
+        )
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        term_ids = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self._idf[term_ids]
+        return term_ids, weights / np.linalg.norm(weights)
+
+    def search(self, query, k=5):
+        """
+        Returns the indices of the (at most) k sentences that score highest for the query, from best to worst, and
+        their scores. Only sentences sharing at least one term with the query are returned.
+        """
+        sentence_ids, scores = self.scores(query)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+            sentence_ids, scores = sentence_ids[top], scores[top]
+
+        # Highest scores first; ties go to the earlier sentence
+        order = np.lexsort((sentence_ids, -scores))
+        return sentence_ids[order], scores[order]
+
+    def scores(self, query):
+        """
+        Returns the indices of the sentences that share at least one term with the query, in ascending order, and
+        their scores (the cosine similarity of their tf-idf vectors to the query's).
+        """
+        term_ids, weights = self.query_vector(query)
+        if not len(term_ids):
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        starts, ends = self._indptr[term_ids], self._indptr[term_ids + 1]
+        postings = np.concatenate([self._postings[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([
+            self._weights[start:end] * weight for start, end, weight in zip(starts, ends, weights)
+        ])
+
+        sentence_ids, inverse = np.unique(postings, return_inverse=True)
+        return sentence_ids, np.bincount(inverse, weights=contributions)
+
+    def summarize(self, query, length=5):
+        """
+        :param query: string of text; it is sanitized (stemmed, stopwords removed) like the sentences
+        :param length: the length of the summary; either a number of sentences (e.g. 5) or a percentage of the
+        document (e.g. 0.1)
+        :return: Summary of the top sentences for the query, in the order in which they appear in the document. It
+        is shorter than length if fewer sentences share a term with the query.
+        """
+        length = BaseSummarizer._parse_summary_length(length, len(self.sentences))
+        if not length:
+            return Summary([])
+
+        sentence_ids, _ = self.search(query, length)
+        return Summary([self.sentences[i] for i in np.sort(sentence_ids)])
+
+    def save(self, path):
+        """
+        Saves the index to a .npz file. The tokenizer is not saved: pass an equivalent tokenizer to load, such that
+        queries are sanitized in the same way as the sentences were.
+        """
+        terms = sorted(self._terms, key=self._terms.get)
+        with open(path, 'wb') as index_file:
+            np.savez(
+                index_file, version=np.array([self.FORMAT_VERSION]),
+                sentences=np.array(self.sentences, dtype=np.string_), terms=np.array(terms, dtype=np.string_),
+                idf=self._idf, indptr=self._indptr, postings=self._postings, weights=self._weights
+            )
+
+    @classmethod
+    def load(cls, path, tokenizer=None):
+        """
+        Loads an index saved with save.
+
+        :param path: path of the .npz file
+        :param tokenizer: Tokenizer used to sanitize queries (English tokenizer by default)
+        """
+        with np.load(path) as data:
+            if int(data['version'][0]) != cls.FORMAT_VERSION:
+                raise ValueError('Unsupported index format version {0}'.format(int(data['version'][0])))
+
+            index = cls(tokenizer=tokenizer)
+            index.sentences = [str(sentence) for sentence in data['sentences']]
+            index._terms = dict((str(term), ndx) for ndx, term in enumerate(data['terms']))
+            index._idf = data['idf']
+            index._indptr = data['indptr']
+            index._postings = data['postings']
+            index._weights = data['weights']
+        return index
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 from .baseclass import BaseSummarizer
+from .instrumentation import NULL_TIMINGS
+from .deadline import NO_DEADLINE
 
 
 class RelevanceSummarizer(BaseSummarizer):
@@ -16,7 +18,8 @@ class RelevanceSummarizer(BaseSummarizer):
         This method computes and ranks the cosine similarity between each sentence vector and the overall
         document.
 
-        :param text: a string of text to be summarized, path to a text file, or URL starting with http
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
         :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
         of the original document (e.g. 0.5)
         :param binary_matrix: boolean value indicating whether the matrix of word counts should be binary
@@ -24,30 +27,130 @@ class RelevanceSummarizer(BaseSummarizer):
         :return: list of sentences for the summary
         """
 
-        text = self._parse_input(text)
+        return self._summarize(text, length, binary_matrix=binary_matrix)
 
-        sentences, unprocessed_sentences = self._tokenizer.tokenize_sentences(text)
+    def summarize_batch(self, texts, length=5, binary_matrix=True):
+        """
+        Summarizes many (typically short) documents in one pass: the sentence matrices of all documents are
+        stacked into one block-diagonal matrix and each step of the greedy selection scores the sentences of all
+        documents at once. This amortizes the per-call overhead across the batch. When a memory budget, duplicate
+        collapsing or paragraph pruning is enabled, each document is summarized separately.
+
+        :param texts: list of documents; each is a string of text, path to a text file, URL starting with http,
+        or PreprocessedDocument
+        :param length: the length of each summary; either a number of sentences (e.g. 5) or a percentage of each
+        document (e.g. 0.5)
+        :param binary_matrix: boolean value indicating whether the matrix of word counts should be binary
+        (True by default)
+        :return: list of summaries, one per document
+        """
+
+        return self._summarize_batch(texts, length, binary_matrix=binary_matrix)
+
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        binary_matrix=True):
+        with timings.stage('compute_matrix'):
+            matrix = self._compute_matrix(sentences, weighting='frequency', dtype=self._dtype,
+                                          hash_features=self._hash_features, pruner=self._prune_vocabulary)
+        timings.record_matrix(matrix)
+
+        with timings.stage('select'):
+            return self._greedy_select(matrix, length, deadline=deadline, binary_matrix=binary_matrix,
+                                       weights=weights)
 
-        length = self._parse_summary_length(length, len(sentences))
-        if length == len(sentences):
-            return unprocessed_sentences
+    def _rank_batch(self, blocks, lengths, timings=NULL_TIMINGS, deadline=NO_DEADLINE, binary_matrix=True):
+        with timings.stage('compute_matrix'):
+            matrix, sizes = self._compute_block_matrix(blocks, weighting='frequency', dtype=self._dtype,
+                                                       hash_features=self._hash_features,
+                                                       pruner=self._prune_vocabulary)
+        timings.record_matrix(matrix)
 
-        matrix = self._compute_matrix(sentences, weighting='frequency')
+        with timings.stage('select'):
+            return self._batch_greedy_select(matrix, sizes, lengths, deadline=deadline, binary_matrix=binary_matrix)
 
+    @classmethod
+    def _batch_greedy_select(cls, matrix, sizes, lengths, deadline=NO_DEADLINE, binary_matrix=True):
+        """
+        Greedy selection (see _greedy_select) on each block of a block-diagonal sentence-term frequency matrix, with
+        blocks of the given sizes. Each step picks the next sentence of every block that still needs one, scoring
+        the sentences of all blocks with one pass over the non-zero elements of the matrix.
+        """
+        num_sentences = matrix.shape[0]
+        rows = np.repeat(np.arange(num_sentences), np.diff(matrix.indptr))
+
+        # Since blocks have their own columns, the column sums are the document frequencies of each block
+        doc_frequency = np.bincount(matrix.indices, weights=matrix.data, minlength=matrix.shape[1])
+        doc_frequency = doc_frequency.astype(matrix.dtype)
+        if binary_matrix:
+            values = np.sign(matrix.data)
+        else:
+            values = matrix.data.copy()
+
+        sizes = np.asarray(sizes)
+        lengths = np.asarray(lengths)
+        ends = np.cumsum(sizes)
+        block_ids = np.repeat(np.arange(len(sizes)), sizes)
+        selected = np.zeros(num_sentences, dtype=bool)
+        for step in range(lengths.max()):
+            sentence_scores = np.bincount(rows, weights=values * doc_frequency[matrix.indices],
+                                          minlength=num_sentences)
+            sentence_scores[selected] = -np.inf
+
+            if deadline.expired():
+                # Out of time: fill the rest of each summary using the current scores
+                deadline.truncate('relevance')
+                remaining = cls._segmented_top_k(sentence_scores, sizes, np.maximum(lengths - step, 0))
+                for start, top_sentences in zip(ends - sizes, remaining):
+                    selected[start + np.asarray(top_sentences, dtype=int)] = True
+                break
+
+            # Grab the top sentence of each block that needs more sentences (the last one in case of ties)
+            order = np.lexsort((np.arange(num_sentences), sentence_scores, block_ids))
+            top_sentences = order[ends[lengths > step] - 1]
+            selected[top_sentences] = True
+
+            # Remove all terms that appear in the top sentences from their documents, and the top sentences
+            # from consideration
+            in_top_sentence = np.zeros(num_sentences, dtype=bool)
+            in_top_sentence[top_sentences] = True
+            in_top_sentence = in_top_sentence[rows]
+            doc_frequency[matrix.indices[in_top_sentence]] = 0
+            values[in_top_sentence] = 0
+
+        return [list(np.flatnonzero(selected[end - size:end])) for size, end in zip(sizes, ends)]
+
+    @classmethod
+    def _greedy_select(cls, matrix, length, deadline=NO_DEADLINE, binary_matrix=True, weights=None):
+        """
+        Greedily select the "length" sentences (rows of a sentence-term frequency matrix) most relevant to the
+        document, removing the terms of each selected sentence from the document before the next pick. If given,
+        weights holds the number of times each row occurs in the document.
+        """
         # Sum occurrences of terms over all sentences to obtain document frequency
-        doc_frequency = matrix.sum(axis=0)
+        doc_frequency = np.asmatrix(cls._document_frequency(matrix, weights))
 
         if binary_matrix:
-            matrix = (matrix != 0).astype(int)
+            # Signs are kept, so that the terms of signed hashed columns count positively against the document
+            matrix = matrix.sign()
+        else:
+            matrix = matrix.copy()
 
         summary_sentences = []
         for _ in range(length):
             # Take the inner product of each sentence vector with the document vector
             sentence_scores = matrix.dot(doc_frequency.transpose())
             sentence_scores = np.array(sentence_scores.T)[0]
+            # Once the document runs out of terms, the selected sentences would score as much as the others
+            sentence_scores[summary_sentences] = -np.inf
+
+            if deadline.expired():
+                # Out of time: fill the rest of the summary using the current scores
+                deadline.truncate('relevance')
+                summary_sentences += list(sentence_scores.argsort()[::-1][:length - len(summary_sentences)])
+                break
 
-            # Grab the top sentence and add it to the summary
-            top_sentence = sentence_scores.argsort()[-1]
+            # Grab the top sentence (the last one in case of ties) and add it to the summary
+            top_sentence = len(sentence_scores) - 1 - sentence_scores[::-1].argmax()
             summary_sentences.append(top_sentence)
 
             # Remove all terms that appear in the top sentence from the document
@@ -61,4 +164,4 @@ class RelevanceSummarizer(BaseSummarizer):
 
         # Return the sentences in the order in which they appear in the document
         summary_sentences.sort()
-        return [unprocessed_sentences[i] for i in summary_sentences]
\ No newline at end of file
+        return summary_sentences
\ No newline at end of file
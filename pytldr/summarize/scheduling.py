@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from collections import deque
+from timeit import default_timer
+import numpy as np
+
+SCHEDULES = ('fifo', 'sjf', 'lanes')
+SMALL, LARGE = 0, 1
+
+
+def estimate_cost(text):
+    """
+    Relative cost of summarizing a document, from its size in bytes and its approximate number of sentences:
+    tokenization is linear in the size of the text, while ranking grows faster than linearly with the number of
+    sentences (e.g. the similarity graph of TextRank). Only the order of the costs matters to the scheduler.
+    """
+    sentences = text.count('. ') + text.count('? ') + text.count('! ') + text.count('\n') + 1
+    return len(text) * (1 + sentences / 1000)
+
+
+class Task(object):
+    """A batch of documents that is dispatched to a worker as a whole."""
+
+    def __init__(self, ndx, documents, cost, lane=SMALL):
+        self.ndx = ndx
+        self.documents = documents
+        self.cost = cost
+        self.lane = lane
+        # Position of the task in the input, for the fair share of shortest-job-first
+        self.order = min(documents)
+
+
+class Scheduler(object):
+    """
+    Decides which task a free worker runs next, given the documents of a batch and their estimated costs:
+
+    - 'fifo': documents are batched and dispatched in input order
+    - 'sjf': shortest job first. Documents are batched in order of cost and the cheapest batch runs first, except
+      that a fraction "fairness" of the dispatches goes to the batch that comes first in the input, so that the
+      most costly documents are not all left to the end.
+    - 'lanes': documents costing more than large_cost are large jobs, dispatched one by one and in input order to
+      at most large_workers workers at a time; the small jobs are batched in input order and run on the other
+      workers. Small jobs thus never queue behind large ones, while the large jobs keep making progress. Workers
+      are never left idle: large jobs use every worker once all small jobs are dispatched.
+    """
+
+    def __init__(self, costs, batch_size, schedule='fifo', fairness=0.0, large_cost=None, large_workers=1):
+        """
+        :param costs: estimated cost of each document (see estimate_cost)
+        :param batch_size: maximum number of documents per task
+        :param schedule: 'fifo', 'sjf' or 'lanes'
+        :param fairness: fraction of the dispatches of shortest-job-first that go to the oldest task, between 0
+        (strict shortest-job-first) and 1 (input order)
+        :param large_cost: cost above which a document is a large job ('lanes' only; 10 times the median cost of
+        the batch by default)
+        :param large_workers: number of workers that large jobs may occupy while there are small jobs to run
+        ('lanes' only)
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError('Parameter "schedule" must take one of the values "fifo", "sjf" or "lanes"')
+        if not 0 <= fairness <= 1:
+            raise ValueError('Parameter "fairness" must take a value between 0 and 1')
+        if large_workers < 1:
+            raise ValueError('Parameter "large_workers" must be a positive integer')
+
+        costs = np.asarray(costs, dtype=np.float64)
+        self.schedule = schedule
+        self.costs = costs
+        self.lanes = np.zeros(len(costs), dtype=np.int8)
+        self._fairness = fairness
+        self._large_workers = large_workers
+        self._credit = 0.0
+
+        if schedule == 'fifo':
+            self.tasks = self._batch(np.arange(len(costs)), batch_size)
+            self._queues = [deque(self.tasks)]
+        elif schedule == 'sjf':
+            self.tasks = self._batch(np.argsort(costs, kind='mergesort'), batch_size)
+            self._queues = [deque(self.tasks), deque(sorted(self.tasks, key=lambda task: task.order))]
+            self._done = set()
+        else:
+            if large_cost is None:
+                large_cost = 10 * np.median(costs) if len(costs) else 0
+            self.lanes[costs > large_cost] = LARGE
+            small_tasks = self._batch(np.flatnonzero(self.lanes == SMALL), batch_size)
+            large_tasks = self._batch(np.flatnonzero(self.lanes == LARGE), 1, len(small_tasks), LARGE)
+            self.tasks = small_tasks + large_tasks
+            self._queues = [deque(small_tasks), deque(large_tasks)]
+
+    def _batch(self, documents, batch_size, first_ndx=0, lane=SMALL):
+        return [
+            Task(first_ndx + ndx, [int(document) for document in documents[start:start + batch_size]],
+                 self.costs[documents[start:start + batch_size]].sum(), lane)
+            for ndx, start in enumerate(range(0, len(documents), batch_size))
+        ]
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def next_task(self, running):
+        """
+        Returns the task to dispatch next, or None if no task may be dispatched now.
+
+        :param running: list of the tasks that are running
+        """
+        if self.schedule == 'fifo':
+            return self._queues[0].popleft() if self._queues[0] else None
+        elif self.schedule == 'sjf':
+            return self._next_shortest()
+
+        small, large = self._queues
+        running_large = sum(1 for task in running if task.lane == LARGE)
+        if large and (running_large < self._large_workers or not small):
+            return large.popleft()
+        return small.popleft() if small else None
+
+    def _next_shortest(self):
+        self._credit += self._fairness
+        queue = self._queues[0]
+        if self._credit >= 1:
+            self._credit -= 1
+            queue = self._queues[1]
+
+        # Tasks are in both queues: skip those already dispatched from the other one
+        while queue and queue[0].ndx in self._done:
+            queue.popleft()
+        if not queue:
+            return None
+        task = queue.popleft()
+        self._done.add(task.ndx)
+        return task
+
+
+class QueueStats(object):
+    """
+    Queueing statistics of a call to ParallelSummarizer, per document:
+
+    costs: estimated cost (see estimate_cost)
+    lanes: 0 for small jobs and 1 for large jobs (all documents are small jobs unless the schedule is 'lanes')
+    waits: seconds from the start of the call until the task holding the document was dispatched to a worker
+    latencies: seconds from the start of the call until the summary of the document was received
+    """
+
+    def __init__(self, scheduler):
+        self.schedule = scheduler.schedule
+        self.costs = scheduler.costs
+        self.lanes = scheduler.lanes
+        self.tasks = len(scheduler)
+        self.waits = np.full(len(self.costs), np.nan)
+        self.latencies = np.full(len(self.costs), np.nan)
+        self._start = default_timer()
+
+    def dispatched(self, task):
+        self.waits[task.documents] = default_timer() - self._start
+
+    def completed(self, task):
+        self.latencies[task.documents] = default_timer() - self._start
+
+    @property
+    def makespan(self):
+        """Seconds until the last summary was received."""
+        return np.nanmax(self.latencies) if len(self.latencies) else 0.0
+
+    def summary(self):
+        """
+        Returns a dict of statistics over all documents ('all') and for each lane ('small' and 'large'): the number
+        of documents, and the median, 99th percentile and maximum of their waits and latencies.
+        """
+        lanes = [('all', np.ones(len(self.lanes), dtype=bool)), ('small', self.lanes == SMALL),
+                 ('large', self.lanes == LARGE)]
+        summary = {}
+        for name, members in lanes:
+            stats = {'documents': int(members.sum())}
+            for measure, values in (('wait', self.waits[members]), ('latency', self.latencies[members])):
+                values = values[~np.isnan(values)]
+                if len(values):
+                    stats[measure + '_p50'] = np.percentile(values, 50)
+                    stats[measure + '_p99'] = np.percentile(values, 99)
+                    stats[measure + '_max'] = values.max()
+            summary[name] = stats
+        return summary
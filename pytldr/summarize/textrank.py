@@ -1,17 +1,28 @@
 # -*- coding: utf-8 -*-
 from __future__ import division
-import networkx
+import numpy as np
+from scipy.sparse import diags, issparse
 from .baseclass import BaseSummarizer
+from .instrumentation import NULL_TIMINGS
+from .deadline import NO_DEADLINE
 
 
 class TextRankSummarizer(BaseSummarizer):
 
+    # Estimated fraction of pairs of sentences sharing a term above which the similarity graph of a document is
+    # built as a dense array (see _graph_density)
+    DENSE_GRAPH_DENSITY = 0.5
+
+    # Upper bound on the number of elements of the dense blocks of the sentence matrix used to build dense graphs
+    DENSE_BLOCK_ELEMENTS = 2 ** 20
+
     def summarize(self, text, length=5, weighting='frequency', norm=None):
         """
         Implements the TextRank summarization algorithm, which follows closely to the PageRank algorithm for ranking
         web pages.
 
-        :param text: a string of text to be summarized, path to a text file, or URL starting with http
+        :param text: a string of text to be summarized, path to a text file, URL starting with http, or
+        PreprocessedDocument
         :param length: the length of the output summary; either a number of sentences (e.g. 5) or a percentage
         of the original document (e.g. 0.5)
         :param weighting: 'frequency', 'binary' or 'tfidf' weighting of sentence terms ('frequency' by default)
@@ -20,30 +31,233 @@ class TextRankSummarizer(BaseSummarizer):
         :return: list of sentences for the summary
         """
 
-        text = self._parse_input(text)
+        return self._summarize(text, length, weighting=weighting, norm=norm)
+
+    def summarize_batch(self, texts, length=5, weighting='frequency', norm=None):
+        """
+        Summarizes many (typically short) documents in one pass: the sentence matrices of all documents are
+        stacked into one block-diagonal matrix, PageRank runs on all similarity graphs at once, and the top sentences
+        of each document are selected together. This amortizes the per-call overhead across the batch and gives the
+        same summaries as calling summarize on each document. When a memory budget, duplicate collapsing or
+        paragraph pruning is enabled, each document is summarized separately.
+
+        :param texts: list of documents; each is a string of text, path to a text file, URL starting with http,
+        or PreprocessedDocument
+        :param length: the length of each summary; either a number of sentences (e.g. 5) or a percentage of each
+        document (e.g. 0.5)
+        :param weighting: 'frequency', 'binary' or 'tfidf' weighting of sentence terms ('frequency' by default)
+        :param norm: None, 'l1' or 'l2' normalization of the term vectors of the sentences (None by default)
+        :return: list of summaries, one per document
+        """
+
+        return self._summarize_batch(texts, length, weighting=weighting, norm=norm)
 
-        sentences, unprocessed_sentences = self._tokenizer.tokenize_sentences(text)
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        weighting='frequency', norm=None):
+        scores = self._score_sentences(sentences, timings, deadline, weights, weighting=weighting, norm=norm)
 
-        length = self._parse_summary_length(length, len(sentences))
-        if length == len(sentences):
-            return unprocessed_sentences
+        with timings.stage('select'):
+            return self._select_top(scores, length)
 
+    def _score_sentences(self, sentences, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                         weighting='frequency', norm=None):
         # Compute the word frequency matrix. If norm is set to 'l1' or 'l2' then words are normalized
         # by the length of their associated sentences (such that each vector of sentence terms sums to 1).
-        word_matrix = self._compute_matrix(sentences, weighting=weighting, norm=norm)
+        with timings.stage('compute_matrix'):
+            word_matrix = self._compute_matrix(sentences, weighting=weighting, norm=norm, dtype=self._dtype,
+                                               hash_features=self._hash_features, pruner=self._prune_vocabulary)
+        timings.record_matrix(word_matrix)
 
         # Build the similarity graph by calculating the number of overlapping words between all
         # combinations of sentences.
-        similarity_matrix = (word_matrix * word_matrix.T)
+        with timings.stage('similarity'):
+            dense = self._graph_density(word_matrix) > self.DENSE_GRAPH_DENSITY
+            similarity_matrix = self._similarity_matrix(word_matrix, dense=dense)
+
+        if weights is None:
+            with timings.stage('pagerank'):
+                return self._pagerank(similarity_matrix, deadline=deadline)
+
+        # Each row stands for weights[i] identical sentences. Weighting the edges into each node and its teleport
+        # probability by its weight gives the total score of the sentences it stands for, i.e. the same scores
+        # per sentence as PageRank on the graph with the repeated sentences.
+        if dense:
+            similarity_matrix *= weights
+        else:
+            similarity_matrix = similarity_matrix.dot(diags(weights, format='csr'))
+        with timings.stage('pagerank'):
+            return self._pagerank(similarity_matrix, deadline=deadline, personalization=weights) / weights
 
-        similarity_graph = networkx.from_scipy_sparse_matrix(similarity_matrix)
-        scores = networkx.pagerank(similarity_graph)
+    def _rank_batch(self, blocks, lengths, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weighting='frequency',
+                    norm=None):
+        with timings.stage('compute_matrix'):
+            word_matrix, sizes = self._compute_block_matrix(blocks, weighting=weighting, norm=norm, dtype=self._dtype,
+                                                            hash_features=self._hash_features,
+                                                            pruner=self._prune_vocabulary)
+        timings.record_matrix(word_matrix)
 
+        # The similarity matrix is block-diagonal: there are no edges between the sentences of different documents
+        with timings.stage('similarity'):
+            similarity_matrix = self._similarity_matrix(word_matrix)
+
+        with timings.stage('pagerank'):
+            scores = self._block_pagerank(similarity_matrix, sizes, deadline=deadline)
+
+        with timings.stage('select'):
+            return self._segmented_top_k(scores, sizes, lengths)
+
+    def _similarity_matrix(self, word_matrix, dense=False):
+        """
+        The similarity graph of the sentences: the inner products of their term vectors, i.e. the number of terms
+        they share when weighting is binary. If dense, it is returned as a dense array instead of a sparse matrix.
+        """
+        if dense:
+            similarity_matrix = self._dense_similarity_matrix(word_matrix)
+            edge_weights = similarity_matrix
+        else:
+            similarity_matrix = self._compact_indices(word_matrix * word_matrix.T)
+            edge_weights = similarity_matrix.data
+        if self._hash_features is not None:
+            # With signed hashing, colliding terms can make similarities negative, and PageRank needs non-negative
+            # edge weights
+            np.maximum(edge_weights, 0, out=edge_weights)
+        return similarity_matrix
+
+    @classmethod
+    def _dense_similarity_matrix(cls, word_matrix):
+        """
+        Builds the similarity graph as a dense array, a block of columns at a time: each block is the product of the
+        sparse sentence matrix with the dense transpose of a block of its rows. This never holds the sparse product,
+        whose index array alone takes half the memory of the dense array when most sentences share a term.
+        """
+        num_sentences, num_terms = word_matrix.shape
+        similarity_matrix = np.empty((num_sentences, num_sentences), dtype=word_matrix.dtype)
+        block_size = max(1, cls.DENSE_BLOCK_ELEMENTS // max(num_terms, 1))
+        for start in range(0, num_sentences, block_size):
+            block = word_matrix[start:start + block_size].T.toarray()
+            similarity_matrix[:, start:start + block_size] = word_matrix.dot(block)
+        return similarity_matrix
+
+    @staticmethod
+    def _graph_density(word_matrix):
+        """
+        Estimated fraction of the pairs of sentences that share at least one term, i.e. of the non-zero elements of
+        their similarity graph, from the fraction of sentences that each term occurs in. Terms are assumed to occur
+        independently, which overestimates the density of real text, whose terms cluster in related sentences (e.g.
+        0.7 for a graph of density 0.5).
+        """
+        num_sentences = word_matrix.shape[0]
+        if num_sentences == 0:
+            return 0.0
+        occurrence = np.bincount(word_matrix.indices, minlength=word_matrix.shape[1]) / num_sentences
+        return 1.0 - np.prod(1.0 - occurrence * occurrence)
+
+    @staticmethod
+    def _select_top(scores, length):
+        """Returns the indices of the "length" highest scores, in the order in which they appear in the document."""
         ranked_sentences = sorted(
-            ((score, ndx) for ndx, score in scores.items()), reverse=True
+            ((score, ndx) for ndx, score in enumerate(scores)), reverse=True
         )
 
         top_sentences = [ranked_sentences[i][1] for i in range(length)]
         top_sentences.sort()
 
-        return [unprocessed_sentences[i] for i in top_sentences]
\ No newline at end of file
+        return top_sentences
+
+    @classmethod
+    def _pagerank(cls, matrix, alpha=0.85, max_iter=100, tol=1.0e-6, initial=None, deadline=NO_DEADLINE,
+                  personalization=None):
+        """
+        Compute the PageRank of each node in an undirected graph given its (symmetric) sparse or dense weighted
+        adjacency matrix, using power iteration. The computation is carried out in the precision of the matrix.
+
+        This gives the same result as networkx.pagerank(networkx.from_scipy_sparse_matrix(matrix)) but operates
+        directly on the sparse matrix: nodes without edges distribute their score uniformly, and iteration stops
+        once the l1 change in scores falls below num_nodes * tol. If the deadline expires first, the scores of the
+        last iteration are returned.
+
+        Iteration starts from the uniform distribution, or from "initial" if given (e.g. the scores of a previous,
+        similar graph), which speeds up convergence. If given, "personalization" replaces the uniform distribution
+        for teleports and for the scores of nodes without edges.
+        """
+        num_nodes = matrix.shape[0]
+        dtype = matrix.dtype if matrix.dtype in (np.float32, np.float64) else np.dtype(np.float64)
+
+        out_degree = np.asarray(matrix.sum(axis=1), dtype=dtype).ravel()
+        dangling = out_degree == 0
+        inverse_degree = np.zeros(num_nodes, dtype=dtype)
+        inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+
+        # Transpose once, so that each iteration is a single matrix-vector product. Dense arrays are transposed as a
+        # view, which BLAS multiplies without a copy.
+        if issparse(matrix):
+            transition = matrix.T.tocsr().astype(dtype)
+        else:
+            transition = np.asarray(matrix.T, dtype=dtype)
+        if personalization is None:
+            distribution = np.empty(num_nodes, dtype=dtype)
+            distribution.fill(1.0 / num_nodes)
+        else:
+            distribution = np.asarray(personalization, dtype=dtype) / np.sum(personalization)
+        teleport = (1.0 - alpha) * distribution
+
+        if initial is None:
+            scores = distribution.copy()
+        else:
+            scores = np.asarray(initial, dtype=dtype) / np.sum(initial)
+        for _ in range(max_iter):
+            last_scores = scores
+            dangling_sum = alpha * last_scores[dangling].sum()
+            scores = alpha * transition.dot(last_scores * inverse_degree)
+            scores += dangling_sum * distribution + teleport
+            if np.abs(scores - last_scores).sum() < num_nodes * tol:
+                break
+            if deadline.expired():
+                deadline.truncate('pagerank')
+                break
+
+        return scores
+
+    @classmethod
+    def _block_pagerank(cls, matrix, sizes, alpha=0.85, max_iter=100, tol=1.0e-6, deadline=NO_DEADLINE):
+        """
+        Compute the PageRank of the nodes of several graphs at once, given the block-diagonal adjacency matrix whose
+        blocks (of the given sizes) are the adjacency matrices of the graphs. Each power iteration is a single sparse
+        matrix-vector product over all graphs. Teleports and the scores of nodes without edges stay within each
+        graph, and each graph stops iterating once it converges, so the scores of each graph are exactly those
+        _pagerank computes for it alone.
+        """
+        num_nodes = matrix.shape[0]
+        dtype = matrix.dtype if matrix.dtype in (np.float32, np.float64) else np.dtype(np.float64)
+
+        out_degree = np.asarray(matrix.sum(axis=1), dtype=dtype).ravel()
+        dangling = out_degree == 0
+        inverse_degree = np.zeros(num_nodes, dtype=dtype)
+        inverse_degree[~dangling] = 1.0 / out_degree[~dangling]
+
+        transition = matrix.T.tocsr().astype(dtype)
+        sizes = np.asarray(sizes)
+        starts = np.cumsum(sizes) - sizes
+        graph_ids = np.repeat(np.arange(len(sizes)), sizes)
+        distribution = (1.0 / sizes)[graph_ids].astype(dtype)
+        teleport = (1.0 - alpha) * distribution
+
+        scores = distribution.copy()
+        converged = np.zeros(len(sizes), dtype=bool)
+        for _ in range(max_iter):
+            last_scores = scores
+            dangling_sums = alpha * np.add.reduceat(np.where(dangling, last_scores, 0), starts)
+            scores = alpha * transition.dot(last_scores * inverse_degree)
+            scores += dangling_sums[graph_ids] * distribution + teleport
+
+            # Graphs that have already converged keep their scores
+            frozen = converged[graph_ids]
+            scores[frozen] = last_scores[frozen]
+            converged |= np.add.reduceat(np.abs(scores - last_scores), starts) < sizes * tol
+            if converged.all():
+                break
+            if deadline.expired():
+                deadline.truncate('pagerank')
+                break
+
+        return scores
@@ -54,16 +54,16 @@ setup(
         'Programming Language :: Python'
     ],
     install_requires=[
-        'numpy==1.8.0',
-        'nltk==2.0.5',
-        'scipy==0.13.2',
-        'scikit-learn==0.15.2',
+        'numpy==1.16.6',
+        'nltk==3.4.5',
+        'scipy==1.2.3',
+        'scikit-learn==0.20.4',
         'goose-extractor==1.0.25',
-        'newspaper==0.0.9.8',
-        'networkx==1.9.1'
+        'newspaper==0.0.9.8'
     ],
     include_package_data=True,
     package_data={PACKAGE_NAME: ['stopwords/*.txt'],
+                  'pytldr.summarize': ['cost_model.json'],
                   '': ['README.md', 'ez_setup.py']},
     tests_require=[
         'nose',
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from pytldr.summarize import (
+    AutoSummarizer, CostModel, LsaOzsoy, MultiDocumentSummarizer, RelevanceSummarizer, TextRankSummarizer
+)
+from test_summarizers import LONG_TEXT
+
+
+class TestAutoSummarizer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_bundled_model(self):
+        summarizer = AutoSummarizer(latency_target=10)
+        self.assertEqual(summarizer.candidates, ['textrank', 'lsa_steinberger', 'lsa_ozsoy', 'relevance'])
+
+        # A generous target allows the preferred candidate
+        summary = summarizer.summarize(LONG_TEXT, length=3)
+        self.assertEqual(summary.algorithm, 'textrank')
+        self.assertEqual(summary, TextRankSummarizer().summarize(LONG_TEXT, length=3))
+
+        sentences, _ = summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        predictions = summarizer.predict(sentences, 3)
+        self.assertEqual([name for name, _ in predictions], summarizer.candidates)
+        self.assertTrue(all(0 < seconds < 1 for _, seconds in predictions))
+
+    def test_latency_target(self):
+        model = CostModel({
+            'textrank': ('textrank', [0.001, 0, 1e-4]),  # 0.001 + 1e-4 * sentences ** 2 seconds
+            'lsa_ozsoy': ('lsa', [0.5, 0, 0, 0]),
+            'relevance': ('relevance', [0.001, 0, 0])
+        })
+        candidates = [('textrank', TextRankSummarizer(), {}), ('lsa_ozsoy', LsaOzsoy(), {'topics': 2}),
+                      ('relevance', RelevanceSummarizer(), {})]
+
+        # 11 sentences: TextRank is predicted to take 0.0131 seconds
+        summarizer = AutoSummarizer(latency_target=0.2, cost_model=model, candidates=candidates)
+        self.assertEqual(summarizer.summarize(LONG_TEXT, length=3).algorithm, 'textrank')
+        summarizer = AutoSummarizer(latency_target=0.01, cost_model=model, candidates=candidates)
+        summary = summarizer.summarize(LONG_TEXT, length=3)
+        self.assertEqual(summary.algorithm, 'relevance')
+        self.assertEqual(summary, RelevanceSummarizer().summarize(LONG_TEXT, length=3))
+
+        # When no candidate meets the target, the fastest one is used
+        summarizer = AutoSummarizer(latency_target=1e-6, cost_model=model, candidates=candidates[:2])
+        self.assertEqual(summarizer.summarize(LONG_TEXT, length=3).algorithm, 'textrank')
+
+        # Nothing to rank
+        self.assertIsNone(summarizer.summarize(LONG_TEXT, length=100).algorithm)
+
+        self.assertRaises(ValueError, AutoSummarizer, latency_target=0)
+        self.assertRaises(ValueError, AutoSummarizer, cost_model=CostModel({}))
+
+    def test_calibrate(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        documents = [LONG_TEXT, '\n'.join(lines[:10]), '\n'.join(lines * 3)]
+        candidates = AutoSummarizer.default_candidates()
+        model = CostModel.calibrate(candidates, documents, length=2, repeat=1)
+        self.assertEqual(sorted(model.models), sorted(name for name, _, _ in candidates))
+        self.assertEqual(len(model.samples['textrank']), 3)
+
+        path = os.path.join(self.tmpdir, 'model.json')
+        model.save(path)
+        loaded = CostModel.load(path)
+        for name, samples in model.samples.items():
+            for features, _ in samples:
+                self.assertAlmostEqual(loaded.predict(name, features), model.predict(name, features))
+        self.assertEqual(loaded.machine, model.machine)
+
+        summary = AutoSummarizer(cost_model=path).summarize(LONG_TEXT, length=3)
+        self.assertEqual(len(summary), 3)
+
+    def test_multidoc(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        texts = ['\n'.join(lines[:9]), '\n'.join(lines[6:])]
+        summary = MultiDocumentSummarizer(AutoSummarizer(latency_target=10)).summarize(texts, length=3)
+        self.assertEqual(summary, MultiDocumentSummarizer(TextRankSummarizer()).summarize(texts, length=3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pytldr.nlp import PreprocessedDocument, Tokenizer
+from pytldr.summarize import LsaOzsoy, LsaSteinberger, RelevanceSummarizer, TextRankSummarizer
+from pytldr.summarize.baseclass import BaseSummarizer
+from test_summarizers import LONG_TEXT
+
+
+class TestPreprocessedDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.document = PreprocessedDocument.build(LONG_TEXT)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build(self):
+        sentences, unprocessed = Tokenizer('english').tokenize_sentences(LONG_TEXT)
+        self.assertEqual(list(self.document.sentences), sentences)
+        self.assertEqual(list(self.document.unprocessed_sentences), unprocessed)
+        self.assertEqual(self.document.unprocessed_sentences[-1], unprocessed[-1])
+        self.assertEqual(len(self.document), len(sentences))
+
+    def test_matrices(self):
+        sentences = list(self.document.sentences)
+        for weighting in ('binary', 'frequency', 'tfidf'):
+            for norm in (None, 'l1', 'l2'):
+                for dtype in (np.float32, np.float64):
+                    expected = BaseSummarizer._compute_matrix(sentences, weighting, norm, dtype)
+                    matrix = BaseSummarizer._compute_matrix(self.document.sentences, weighting, norm, dtype)
+                    self.assertEqual(matrix.dtype, expected.dtype)
+                    self.assertTrue(np.allclose(matrix.toarray(), expected.toarray()))
+
+    def test_save_and_load(self):
+        self.document.save(self.directory)
+        document = PreprocessedDocument.load(self.directory)
+        self.assertTrue(isinstance(document.sentences.data, np.memmap))
+        self.assertEqual(list(document.sentences), list(self.document.sentences))
+        self.assertEqual(list(document.terms), list(self.document.terms))
+        self.assertEqual((document.counts != self.document.counts).nnz, 0)
+
+        empty = PreprocessedDocument.build('')
+        empty.save(self.directory + '/empty')
+        self.assertEqual(len(PreprocessedDocument.load(self.directory + '/empty')), 0)
+
+    def test_summarizers_accept_documents(self):
+        self.document.save(self.directory)
+        document = PreprocessedDocument.load(self.directory)
+        for summarizer in (LsaOzsoy(), LsaSteinberger(), RelevanceSummarizer()):
+            self.assertEqual(summarizer.summarize(document, length=3), summarizer.summarize(LONG_TEXT, length=3))
+
+        summarizer = TextRankSummarizer()
+        for weighting in ('binary', 'frequency', 'tfidf'):
+            self.assertEqual(summarizer.summarize(document, length=4, weighting=weighting),
+                             summarizer.summarize(LONG_TEXT, length=4, weighting=weighting))
+        self.assertEqual(summarizer.summarize_batch([document, LONG_TEXT], length=2),
+                         [summarizer.summarize(LONG_TEXT, length=2)] * 2)
+
+    def test_paragraph_pruning(self):
+        summarizer = TextRankSummarizer(prune_paragraphs=0.5)
+        self.assertRaises(ValueError, summarizer.summarize, self.document)
+
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        text = '\n'.join(' '.join(lines[i:i + 3]) for i in range(0, len(lines), 3))
+        document = PreprocessedDocument.build(text, paragraphs=True)
+        self.assertEqual(list(document.paragraphs), [0, 0, 0, 1, 1, 2, 2, 2, 3, 3, 3])
+        self.assertEqual(summarizer.summarize(document, length=3), summarizer.summarize(text, length=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
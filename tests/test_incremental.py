@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import unittest
+import numpy as np
+from pytldr.summarize import (
+    IncrementalSummarizer, LsaOzsoy, LsaSteinberger, RelevanceSummarizer, TextRankSummarizer
+)
+from test_summarizers import LONG_TEXT
+
+
+class TestIncrementalSummarizer(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+
+    def feed(self, session, lines):
+        # Append each sentence in two halves, as if it arrived mid-sentence
+        for line in lines:
+            half = len(line) // 2
+            session.append(line[:half])
+            session.append(line[half:] + '\n')
+
+    def test_matches_batch(self):
+        for summarizer in (TextRankSummarizer(), RelevanceSummarizer(), LsaSteinberger()):
+            session = IncrementalSummarizer(summarizer)
+            self.feed(session, self.lines[:6])
+            self.assertEqual(session.summary(length=3), summarizer.summarize('\n'.join(self.lines[:6]), length=3))
+
+            self.feed(session, self.lines[6:])
+            self.assertEqual(session.summary(length=3), summarizer.summarize('\n'.join(self.lines), length=3))
+
+    def test_counts(self):
+        summarizer = RelevanceSummarizer()
+        session = IncrementalSummarizer(summarizer, binary_matrix=False)
+        for end in range(4, len(self.lines) + 1, 4):
+            self.feed(session, self.lines[end - 4:end])
+            self.assertEqual(session.summary(length=3),
+                             summarizer.summarize('\n'.join(self.lines[:end]), length=3, binary_matrix=False))
+
+    def test_graph_reused(self):
+        # The similarity graph is extended with the new sentences instead of being rebuilt
+        session = IncrementalSummarizer(TextRankSummarizer())
+        self.feed(session, self.lines[:6])
+        session.summary(length=3)
+        graph = session._graph
+        session.summary(length=3)
+        self.assertIs(session._graph, graph)
+
+        self.feed(session, self.lines[6:])
+        session.summary(length=3)
+        self.assertEqual(len(session._graph_rows), 0)
+        rebuilt = IncrementalSummarizer(TextRankSummarizer())
+        self.feed(rebuilt, self.lines)
+        rebuilt.summary(length=3)
+        self.assertEqual(abs(session._graph - rebuilt._graph).max(), 0)
+
+    def test_lsa_update(self):
+        session = IncrementalSummarizer(LsaOzsoy(), topics=3)
+        for line in self.lines:
+            summary = session.update(line + '\n', length=2)
+            self.assertEqual(len(summary), min(2, session.num_sentences))
+        self.assertEqual(len(session.summary(length=0.5)), int(round(session.num_sentences * 0.5)))
+
+    def test_lsa_update_small_vocabulary(self):
+        # An update can add more sentences than there are terms; without truncation the update is exact
+        words = ['budget', 'creditors', 'ministers', 'greece', 'lenders', 'reform', 'pensions']
+        sentences = [' '.join(words[:i] + words[i + 1:]) + '.' for i in range(len(words))]
+        session = IncrementalSummarizer(LsaOzsoy(), topics=10)
+        session.update('\n'.join(sentences[:3]) + '\n', length=2)
+        summary = session.update('\n'.join((sentences * 5)[:30]) + '\n', length=2)
+        self.assertEqual((session.num_sentences, len(summary)), (3 + 30, 2))
+
+        expected = np.linalg.svd(session._get_matrix().toarray(), compute_uv=False)
+        self.assertTrue(np.allclose(session._sigma, expected[:len(session._sigma)]))
+        self.assertTrue(np.allclose(expected[len(session._sigma):], 0))
+
+    def test_pending_sentence(self):
+        session = IncrementalSummarizer()
+        self.assertEqual(session.append(self.lines[0] + ' ' + self.lines[1][:20]), 1)
+        self.assertEqual(session.num_sentences, 1)
+        self.assertEqual(session.append(self.lines[1][20:]), 1)
+        self.assertEqual(session.sentences, self.lines[:2])
+
+        self.assertEqual(session.append('Ministers discussed an incomplete sentence about emergency lending to Greek banks'), 0)
+        self.assertEqual(session.flush(), 1)
+        self.assertEqual(session.num_sentences, 3)
+
+    def test_weighting(self):
+        self.assertRaises(ValueError, IncrementalSummarizer, TextRankSummarizer(), weighting='tfidf')
+
+
+if __name__ == "__main__":
+    unittest.main()
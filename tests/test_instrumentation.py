@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import logging
+import unittest
+from pytldr.summarize import (
+    LsaOzsoy, RelevanceSummarizer, TextRankSummarizer, HistogramSink, LoggingSink, PrometheusExporter
+)
+from pytldr.summarize.instrumentation import StageTimings
+
+
+class ListSink(object):
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    text = """
+           Lorem ipsum dolor sit amet, consectetur adipiscing elit.
+           Ut interdum sed purus quis vehicula.
+           Aliquam nec congue mi, a commodo elit.
+           Praesent porta lacus velit, at consequat quam vestibulum in.
+           Nunc rutrum sapien volutpat augue porttitor vulputate ac sit amet metus.
+           """
+
+    def test_disabled(self):
+        summary = TextRankSummarizer().summarize(self.text, length=2)
+        self.assertEqual(len(summary), 2)
+        self.assertTrue(summary.timings is None)
+
+    def test_stage_record(self):
+        sink = ListSink()
+        summary = LsaOzsoy(hooks=[sink]).summarize(self.text, length=2)
+
+        self.assertEqual(len(sink.records), 1)
+        record = sink.records[0]
+        self.assertTrue(summary.timings is record)
+        self.assertEqual(
+            [name for name, _ in record.stages],
+            ['parse_input', 'split_sentences', 'sanitize_text', 'compute_matrix', 'svd', 'select']
+        )
+        self.assertEqual(record.num_sentences, 5)
+        self.assertEqual(record.matrix_shape[1], 5)
+        self.assertTrue(record.nnz > 0)
+        self.assertTrue(record.total >= sum(seconds for _, seconds in record.stages))
+
+    def test_histogram_sink(self):
+        sink = HistogramSink(buckets=(1.0, 0.1, 0.5))
+        for seconds in (0.05, 0.1, 0.3, 2.0):
+            record = StageTimings('Summarizer')
+            record.stages = [('select', seconds)]
+            record.total = 2 * seconds
+            sink.emit(record)
+
+        # Buckets are sorted and cumulative: each counts the observations up to its upper bound
+        self.assertEqual(sink.buckets, (0.1, 0.5, 1.0))
+        self.assertEqual(sink.histograms[('Summarizer', 'select')], {'buckets': [2, 3, 3], 'sum': 2.45, 'count': 4})
+        self.assertEqual(sink.histograms[('Summarizer', 'total')]['buckets'], [1, 2, 3])
+        self.assertAlmostEqual(sink.mean('Summarizer', 'total'), 1.225)
+        self.assertTrue(sink.mean('Summarizer', 'svd') is None)
+
+        # Records without a total only add their stages
+        record = StageTimings('Summarizer')
+        record.stages = [('select', 0.5)]
+        sink.emit(record)
+        self.assertEqual(sink.histograms[('Summarizer', 'select')]['buckets'], [2, 4, 4])
+        self.assertEqual(sink.histograms[('Summarizer', 'total')]['count'], 4)
+
+    def test_histogram_and_prometheus(self):
+        exporter = PrometheusExporter()
+        summarizer = RelevanceSummarizer(hooks=[exporter])
+        summarizer.summarize(self.text, length=2)
+        summarizer.summarize(self.text, length=3)
+
+        histogram = exporter.histograms[('RelevanceSummarizer', 'total')]
+        self.assertEqual(histogram['count'], 2)
+        self.assertTrue(exporter.mean('RelevanceSummarizer', 'select') > 0)
+
+        text = exporter.render()
+        self.assertTrue('# TYPE pytldr_stage_seconds histogram' in text)
+        self.assertTrue(
+            'pytldr_stage_seconds_count{summarizer="RelevanceSummarizer",stage="compute_matrix"} 2' in text
+        )
+
+    def test_logging_sink(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('pytldr.test')
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+        TextRankSummarizer(hooks=[LoggingSink(logger)]).summarize(self.text, length=2)
+        logger.removeHandler(handler)
+
+        self.assertEqual(len(records), 1)
+        self.assertTrue('pagerank=' in records[0].getMessage())
+
+
+if __name__ == "__main__":
+    unittest.main()
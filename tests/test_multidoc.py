@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import unittest
+from pytldr.nlp import MinHashLSH
+from pytldr.summarize import LsaOzsoy, MultiDocumentSummarizer, RelevanceSummarizer, TextRankSummarizer
+from test_summarizers import LONG_TEXT
+
+
+class TestMinHashLSH(unittest.TestCase):
+
+    def test_duplicates(self):
+        token_sets = [
+            'greec euro zone financ minist debt crisi broke monday'.split(),
+            'cyprus forc close bank two week introduc capit control'.split(),
+            'greec euro zone financ minist debt crisi broke tuesday'.split(),
+            'greec euro zone financ minist debt crisi broke monday'.split()
+        ]
+        self.assertEqual(MinHashLSH(threshold=0.6).duplicates(token_sets), [0, 1, 0, 0])
+        self.assertEqual(MinHashLSH(threshold=1).duplicates(token_sets), [0, 1, 2, 0])
+
+    def test_signature(self):
+        lsh = MinHashLSH(num_perm=32, bands=8)
+        self.assertEqual(list(lsh.signature(['a', 'b', 'b'])), list(lsh.signature(['b', 'a'])))
+        self.assertEqual(lsh.signature([]).shape, (32,))
+        self.assertRaises(ValueError, MinHashLSH, num_perm=10, bands=3)
+
+
+class TestMultiDocumentSummarizer(unittest.TestCase):
+
+    def setUp(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        # Two sources reporting overlapping parts of the same story. The sixth line is too short to be kept as a
+        # sentence, so the sources share three sentences.
+        self.texts = ['\n'.join(lines[:8]), '\n'.join(lines[4:])]
+
+    def test_removes_duplicates(self):
+        for summarizer in (TextRankSummarizer(), RelevanceSummarizer(), LsaOzsoy()):
+            summary = MultiDocumentSummarizer(summarizer).summarize(self.texts, length=6)
+            self.assertEqual(len(summary), 6)
+            self.assertEqual(len(set(summary)), 6)
+            self.assertEqual(summary.duplicates, 3)
+            self.assertEqual(summary.sources, sorted(summary.sources))
+            self.assertTrue(all(source[0] == 0 or source[1] >= 3 for source in summary.sources))
+
+    def test_whole_cluster(self):
+        summary = MultiDocumentSummarizer().summarize(self.texts, length=100)
+        self.assertEqual(len(summary), 11)
+        self.assertEqual(summary.sources[-1], (1, 6))
+
+    def test_diversity(self):
+        scores = [1.0, 0.9, 0.1]
+        summarizer = RelevanceSummarizer()
+        matrix = summarizer._compute_matrix(
+            ['greec bailout talk', 'greec bailout talk extens', 'cyprus bank'], norm='l2'
+        )
+        self.assertEqual(MultiDocumentSummarizer._mmr(matrix, scores, 2, 0), [0, 1])
+        self.assertEqual(MultiDocumentSummarizer._mmr(matrix, scores, 2, 0.7), [0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
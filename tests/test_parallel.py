@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import pickle
+import threading
+import unittest
+import warnings
+from multiprocessing import Pool
+import numpy as np
+from pytldr.nlp import Tokenizer
+from pytldr.summarize import (
+    DecompositionCache, HistogramSink, LsaEngine, LsaOzsoy, ParallelSummarizer, RelevanceSummarizer, TextRankSummarizer
+)
+from pytldr.summarize import parallel
+from pytldr.summarize.baseclass import BaseSummarizer
+from pytldr.summarize.deadline import NO_DEADLINE
+from pytldr.summarize.instrumentation import NULL_TIMINGS
+from pytldr.summarize.scheduling import LARGE, Scheduler, estimate_cost
+from test_summarizers import LONG_TEXT
+
+
+class TestParallelSummarizer(unittest.TestCase):
+
+    def setUp(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        self.texts = ['\n'.join(lines[i:i + 6]) for i in range(0, 7)] + [u'\n'.join(lines), '']
+
+    def test_matches_summarize(self):
+        for summarizer in (TextRankSummarizer(), LsaOzsoy()):
+            summaries = ParallelSummarizer(summarizer, processes=2, batch_size=3).summarize(self.texts, length=3)
+            self.assertEqual(summaries, [summarizer.summarize(text, length=3) for text in self.texts])
+            self.assertEqual(summaries[0].spans.shape, (3, 2))
+            self.assertEqual(summaries[-1], [])
+
+    def test_threads(self):
+        summarizer = LsaOzsoy(cache=DecompositionCache())
+        summaries = ParallelSummarizer(summarizer, processes=3, batch_size=2, backend='thread').summarize(
+            self.texts, length=3
+        )
+        self.assertEqual(summaries, [summarizer.summarize(text, length=3) for text in self.texts])
+        self.assertRaises(ValueError, ParallelSummarizer, summarizer, backend='fork')
+
+    def test_schedules(self):
+        summarizer = TextRankSummarizer()
+        expected = [summarizer.summarize(text, length=3) for text in self.texts]
+        for backend in ParallelSummarizer.BACKENDS:
+            for schedule, params in (('sjf', {'fairness': 0.5}), ('lanes', {'large_cost': 1000})):
+                runner = ParallelSummarizer(summarizer, processes=2, batch_size=2, backend=backend, schedule=schedule,
+                                            **params)
+                self.assertEqual(runner.summarize(self.texts, length=3), expected)
+                self.assertFalse(np.isnan(runner.stats.latencies).any())
+                self.assertEqual(runner.stats.summary()['all']['documents'], len(self.texts))
+        self.assertEqual(list(runner.stats.lanes).count(LARGE), 1)  # The whole of LONG_TEXT
+
+        # With a single worker, shortest-job-first completes documents in order of cost
+        runner = ParallelSummarizer(summarizer, processes=1, batch_size=1, backend='thread', schedule='sjf')
+        completed = list(runner.summarize_unordered(self.texts, length=3))
+        costs = [estimate_cost(text) for text in self.texts]
+        self.assertEqual([ndx for ndx, _ in completed], sorted(range(len(self.texts)), key=costs.__getitem__))
+        self.assertEqual([summary for _, summary in sorted(completed)], expected)
+        self.assertRaises(ValueError, ParallelSummarizer, summarizer, schedule='lifo')
+        self.assertRaises(ValueError, ParallelSummarizer, summarizer, schedule='sjf', fairness=2)
+
+    def test_stream(self):
+        summarizer = LsaOzsoy()
+        expected = ParallelSummarizer(summarizer, processes=2).summarize(self.texts, length=3)
+        for backend in ('process', 'thread'):
+            runner = ParallelSummarizer(summarizer, processes=2, backend=backend)
+            summaries = runner.summarize_stream(iter(self.texts), length=3, chunk_size=4)
+            self.assertEqual(list(summaries), expected)
+            self.assertEqual(runner.stats.summary()['all']['documents'], len(self.texts) % 4)
+        self.assertRaises(ValueError, list, runner.summarize_stream(self.texts, chunk_size=0))
+
+        # Every chunk is summarized by the same worker processes
+        pools = []
+
+        def make_pool(*args, **kwargs):
+            pools.append(Pool(*args, **kwargs))
+            return pools[-1]
+
+        parallel.Pool = make_pool
+        try:
+            runner = ParallelSummarizer(summarizer, processes=2)
+            self.assertEqual(list(runner.summarize_stream(iter(self.texts), length=3, chunk_size=2)), expected)
+        finally:
+            parallel.Pool = Pool
+        self.assertEqual(len(pools), 1)
+
+    def test_document_options(self):
+        # Options that reduce each document on its own are applied inside the workers
+        texts = self.texts + [LONG_TEXT * 5]
+        for summarizer in (TextRankSummarizer(collapse_duplicates=True, max_sentences=5),
+                           RelevanceSummarizer(collapse_duplicates=True, max_sentences=5)):
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter('always')
+                expected = [summarizer.summarize(text, length=3) for text in texts]
+                for backend in ParallelSummarizer.BACKENDS:
+                    runner = ParallelSummarizer(summarizer, processes=2, batch_size=3, backend=backend)
+                    self.assertEqual(runner.summarize(texts, length=3), expected)
+            self.assertEqual(len(set(expected[-1])), 3)
+
+    def test_unpicklable_task(self):
+        # Tasks that cannot be sent to the workers fail without a callback from the pool
+        runner = ParallelSummarizer(TextRankSummarizer(), processes=2)
+        self.assertRaises(TypeError, runner.summarize, self.texts, length=1, lock=threading.Lock())
+
+    def test_pickle(self):
+        # Summarizers can be sent to worker processes, and their locks are recreated
+        summarizer = pickle.loads(pickle.dumps(LsaEngine(hooks=[HistogramSink()])))
+        summarizer.add_hook(HistogramSink())
+        self.assertEqual(summarizer.summarize(self.texts[0], length=2), LsaEngine().summarize(self.texts[0], length=2))
+
+    def test_sentence_spans(self):
+        first = 'Greek ministers presented the revised budget proposal to skeptical European creditors.'
+        second = 'Eurozone finance officials rejected the revised budget proposal within hours.'
+        text = 'A title\n{0}  {1}'.format(first, second)
+        summaries = ParallelSummarizer(LastSentenceSummarizer(), processes=2).summarize([text, text], length=2)
+        self.assertEqual(summaries[0], [first, second])
+        self.assertEqual(summaries[0].spans.tolist(), [[8, 8 + len(first)], [len(text) - len(second), len(text)]])
+
+        # The text of the selected sentence also appears within an earlier sentence
+        sentence = 'The Greek government is completely bankrupt after years of austerity.'
+        text = 'Analysts warned that {0}  {0}'.format(sentence)
+        for splitter in Tokenizer.SPLITTERS:
+            summarizer = LastSentenceSummarizer(Tokenizer(splitter=splitter))
+            for backend in ParallelSummarizer.BACKENDS:
+                runner = ParallelSummarizer(summarizer, processes=2, backend=backend)
+                self.assertEqual(runner.summarize_spans([text], length=1)[0].tolist(),
+                                 [[len(text) - len(sentence), len(text)]])
+
+
+class LastSentenceSummarizer(BaseSummarizer):
+    """Selects the last sentences of a document."""
+
+    def summarize(self, text, length=5):
+        return self._summarize(text, length)
+
+    def _rank_sentences(self, sentences, length, timings=NULL_TIMINGS, deadline=NO_DEADLINE, weights=None,
+                        **params):
+        return range(len(sentences) - length, len(sentences))
+
+
+class TestScheduler(unittest.TestCase):
+
+    def dispatch_order(self, scheduler, workers):
+        order, running = [], []
+        while True:
+            task = scheduler.next_task(running)
+            if task is None:
+                if not running:
+                    return order
+                running.pop(0)  # The oldest running task completes
+                continue
+            order.append(task.documents)
+            running.append(task)
+            if len(running) == workers:
+                running.pop(0)
+
+    def test_fairness(self):
+        costs = [5, 4, 3, 2, 1]
+        self.assertEqual(self.dispatch_order(Scheduler(costs, 1, 'sjf'), 1), [[4], [3], [2], [1], [0]])
+        # Every other dispatch goes to the document that comes first in the input
+        self.assertEqual(self.dispatch_order(Scheduler(costs, 1, 'sjf', fairness=0.5), 1), [[4], [0], [3], [1], [2]])
+        self.assertEqual(self.dispatch_order(Scheduler(costs, 1, 'sjf', fairness=1), 1), [[0], [1], [2], [3], [4]])
+        self.assertEqual(self.dispatch_order(Scheduler(costs, 2, 'fifo'), 1), [[0, 1], [2, 3], [4]])
+
+    def test_lanes(self):
+        costs = [1, 100, 1, 1, 200, 1, 1]
+        scheduler = Scheduler(costs, 2, 'lanes', large_cost=10)
+        self.assertEqual(list(scheduler.lanes), [0, 1, 0, 0, 1, 0, 0])
+
+        # One large document runs at a time while small ones are waiting, and then large ones use every worker
+        large = scheduler.next_task([])
+        small = scheduler.next_task([large])
+        self.assertEqual((large.documents, small.documents), ([1], [0, 2]))
+        self.assertEqual(scheduler.next_task([large, small]).documents, [3, 5])
+        self.assertEqual(scheduler.next_task([large]).documents, [6])
+        second_large = scheduler.next_task([large])
+        self.assertEqual(second_large.documents, [4])
+        self.assertIsNone(scheduler.next_task([large, second_large]))
+
+
+class TestThreadSafety(unittest.TestCase):
+
+    def test_concurrent_summaries(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        texts = ['\n'.join(lines[i:] + lines[:i]) for i in range(len(lines))]
+        sink = HistogramSink()
+        summarizers = [
+            TextRankSummarizer(hooks=[sink]), RelevanceSummarizer(hooks=[sink]),
+            LsaOzsoy(hooks=[sink], cache=DecompositionCache(max_entries=4), collapse_duplicates=True)
+        ]
+        expected = [[summarizer.summarize(text, length=3) for text in texts] for summarizer in summarizers]
+        sink.reset()
+
+        # Every thread summarizes every text with every (shared) summarizer, while hooks are added and removed
+        errors = []
+        num_threads, rounds = 8, 3
+
+        def work(offset):
+            try:
+                for _ in range(rounds):
+                    for ndx in range(len(texts)):
+                        ndx = (ndx + offset) % len(texts)
+                        for summarizer, summaries in zip(summarizers, expected):
+                            if summarizer.summarize(texts[ndx], length=3) != summaries[ndx]:
+                                errors.append((summarizer, ndx))
+                    extra_sink = HistogramSink()
+                    summarizers[0].add_hook(extra_sink)
+                    summarizers[0].remove_hook(extra_sink)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(summarizers[0].hooks, [sink])
+        calls = num_threads * rounds * len(texts)
+        for summarizer in summarizers:
+            self.assertEqual(sink.histograms[(summarizer.__class__.__name__, 'total')]['count'], calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import bz2
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pytldr.nlp import iter_records, open_input, parse_input
+from pytldr.nlp.preprocess import detect_compression, unicode_to_ascii
+from test_summarizers import LONG_TEXT
+
+
+class TestCompressedInput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.text = LONG_TEXT.strip()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, data, opener=open):
+        path = os.path.join(self.tmpdir, name)
+        output_file = opener(path, 'wb')
+        output_file.write(data)
+        output_file.close()
+        return path
+
+    def test_parse_input(self):
+        expected = parse_input(self._write('article.txt', self.text))
+        self.assertEqual(parse_input(self._write('article.txt.gz', self.text, gzip.open)), expected)
+        self.assertEqual(parse_input(self._write('article.txt.bz2', self.text, bz2.BZ2File)), expected)
+
+        # Without an extension, the compression is detected from the leading bytes
+        path = self._write('article', self.text, gzip.open)
+        self.assertEqual(detect_compression(path), 'gzip')
+        self.assertEqual(detect_compression(self._write('plain', self.text)), None)
+        with open_input(path) as input_file:
+            self.assertEqual(input_file.read(), self.text)
+
+        self.assertRaises(ValueError, parse_input, self._write('articles.jsonl', '{}'))
+
+        # Only existing files are read: raw text that merely ends like a file name is returned as it is
+        for text in ('I put the data in records.jsonl', 'The notes are in draft.txt.gz', 'missing.txt',
+                     u'Caf\xe9 menu.txt', 'Null\x00byte.txt'):
+            self.assertEqual(parse_input(text), unicode_to_ascii(text))
+
+    def test_optional_compressions(self):
+        for compression, module in (('xz', 'lzma'), ('zstd', 'zstandard')):
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+            if compression == 'xz':
+                import lzma
+                data = lzma.compress(self.text)
+            else:
+                import zstandard
+                data = zstandard.ZstdCompressor().compress(self.text)
+            path = self._write('article', data)
+            self.assertEqual(detect_compression(path), compression)
+            with open_input(path) as input_file:
+                self.assertEqual(input_file.read(), self.text)
+
+    def test_iter_records(self):
+        lines = self.text.split('\n')
+        records = [json.dumps({'id': ndx, 'text': line}) for ndx, line in enumerate(lines)]
+        records[1] = json.dumps(lines[1])  # A bare string
+        data = '\n'.join(records[:5]) + '\n\n' + '\n'.join(records[5:]) + '\n'
+
+        path = self._write('articles.jsonl.gz', data, gzip.open)
+        self.assertEqual(list(iter_records(path)), lines)
+        self.assertEqual(list(iter_records(io.BytesIO(data))), lines)
+        self.assertEqual(list(iter_records(self._write('articles.txt.bz2', self.text, bz2.BZ2File))), [self.text])
+
+        records = iter_records(self._write('articles.jsonl', data), field='body')
+        self.assertRaises(ValueError, list, records)
+
+
+if __name__ == "__main__":
+    unittest.main()
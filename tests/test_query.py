@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from pytldr.summarize import QueryIndex
+from test_summarizers import LONG_TEXT
+
+
+class TestQueryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = QueryIndex(LONG_TEXT)
+
+    def test_summarize(self):
+        summary = self.index.summarize('Greek banks', length=2)
+        self.assertEqual(summary, [
+            'The European Central Bank will decide on Wednesday whether to maintain emergency lending to Greek banks.',
+            'Deposit outflows in Greece have picked up and Greek banks could run out of collateral to obtain funds.'
+        ])
+
+        # Only sentences sharing a term with the query are returned
+        self.assertEqual(len(self.index.summarize('Cyprus', length=3)), 1)
+        self.assertEqual(self.index.summarize('unrelated zebra', length=3), [])
+
+    def test_scores_match_cosine_similarity(self):
+        sentences = self.index._tokenizer.tokenize_sentences(LONG_TEXT)[0]
+        query = 'bailout extension for Greece'
+        vectorizer = TfidfVectorizer()
+        matrix = vectorizer.fit_transform(sentences)
+        expected = matrix.dot(vectorizer.transform([self.index._tokenizer.sanitize_text(query)]).T).toarray().ravel()
+
+        sentence_ids, scores = self.index.scores(query)
+        self.assertEqual(list(sentence_ids), list(np.flatnonzero(expected)))
+        self.assertTrue(np.allclose(scores, expected[sentence_ids]))
+
+        top, top_scores = self.index.search(query, k=3)
+        self.assertEqual(len(top), 3)
+        self.assertEqual(list(top_scores), sorted(scores, reverse=True)[:3])
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'index.npz')
+            self.index.save(path)
+            index = QueryIndex.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(index), len(self.index))
+        self.assertEqual(index.num_terms, self.index.num_terms)
+        for query in ('euro zone finance ministers', 'Germany', 'bailout'):
+            self.assertEqual(index.summarize(query, length=3), self.index.summarize(query, length=3))
+
+    def test_empty_document(self):
+        index = QueryIndex('')
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.summarize('Greece'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,30 @@
 import unittest
 import warnings
-from pytldr.summarize.baseclass import BaseSummarizer
-from pytldr.summarize import LsaOzsoy, LsaSteinberger, RelevanceSummarizer, TextRankSummarizer
+import numpy as np
+from scipy.sparse import diags
+from pytldr.summarize.baseclass import BaseSummarizer, BudgetWarning
+from pytldr.summarize.deadline import Deadline
+from pytldr.summarize.lsa import SvdRankException
+from pytldr.nlp import VocabularyPruner
+from pytldr.summarize import (
+    DecompositionCache, LsaEngine, LsaOzsoy, LsaSteinberger, RelevanceSummarizer, TextRankSummarizer
+)
+
+
+LONG_TEXT = """
+    Talks between Greece and euro zone finance ministers over the debt crisis broke down on Monday.
+    Athens rejected a proposal to request a six-month extension of its international bailout package.
+    The rapid collapse raised doubts about the future of Greece in the single currency area.
+    The new government vowed to scrap the bailout, reverse austerity policies and end cooperation with inspectors.
+    The finance minister who chaired the meeting said Athens had until Friday to request an extension.
+    How long Greece can keep itself afloat without foreign support is uncertain.
+    The euro fell against the dollar after the talks broke up but Wall Street was closed for a holiday.
+    The European Central Bank will decide on Wednesday whether to maintain emergency lending to Greek banks.
+    Deposit outflows in Greece have picked up and Greek banks could run out of collateral to obtain funds.
+    Euro zone member Cyprus was forced to close its banks for two weeks and introduce capital controls in 2013.
+    An opinion poll showed most Greeks want a fair compromise with euro zone partners over the bailout.
+    Germany, the main paymaster and biggest creditor of Greece, stuck to its hard line on the bailout.
+    """
 
 
 class TestSummarizer(unittest.TestCase):
@@ -42,6 +65,129 @@ class TestSummarizer(unittest.TestCase):
         summary = self.summarizer.summarize(self.text, length=5)
         self.assertEqual(summary, self.expected_summary)
 
+    def test_sentence_budget(self):
+        for strategy in ('truncate', 'sample', 'chunk'):
+            summarizer = self.summarizer.__class__(max_sentences=3, budget_strategy=strategy)
+            with warnings.catch_warnings(record=True) as warning_list:
+                warnings.simplefilter('always')
+                summary = summarizer.summarize(self.text, length=2)
+
+            self.assertEqual(len(summary), 2)
+            self.assertTrue(all(sentence in self.expected_summary for sentence in summary))
+            self.assertEqual(summary.degraded[0]['budget'], 'max_sentences')
+            self.assertTrue(2 <= summary.degraded[0]['kept_sentences'] <= 3)
+            self.assertTrue(any(item.category == BudgetWarning for item in warning_list))
+
+        summary = self.summarizer.summarize(self.text, length=2)
+        self.assertEqual(summary.degraded, [])
+
+    def test_byte_budget(self):
+        summarizer = self.summarizer.__class__(max_bytes=200, budget_strategy='truncate')
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            summary = summarizer.summarize(self.text, length=5)
+
+        self.assertEqual(summary.degraded[0]['budget'], 'max_bytes')
+        self.assertTrue(summary.degraded[0]['kept_bytes'] <= 200)
+        self.assertEqual(summary, self.expected_summary[:len(summary)])
+
+    def test_float32_ranking(self):
+        # Single precision should not change which sentences are selected
+        summarizer = self.summarizer.__class__(dtype=np.float32)
+        for length in (2, 4, 6):
+            self.assertEqual(summarizer.summarize(LONG_TEXT, length=length),
+                             self.summarizer.summarize(LONG_TEXT, length=length))
+
+        matrix = summarizer._compute_matrix(["bunch long words", "more long words"], dtype=np.float32)
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertEqual(matrix.indices.dtype, np.int32)
+
+    def test_timeout(self):
+        summary = self.summarizer.summarize(LONG_TEXT, length=3)
+        self.assertFalse(summary.truncated)
+        self.assertTrue(summary.fallback is None)
+
+        # The deadline passes during tokenization, so the cheap fallback is used
+        summary = self.summarizer.__class__(timeout=1e-9).summarize(LONG_TEXT, length=3)
+        self.assertEqual(len(summary), 3)
+        self.assertTrue(summary.truncated)
+        self.assertEqual(summary.fallback, 'relevance_score')
+
+    def test_rank_with_expired_deadline(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        deadline = Deadline(1e-9)
+        top_sentences = self.summarizer._rank_sentences(sentences, 3, deadline=deadline)
+        self.assertEqual(len(set(top_sentences)), 3)
+        self.assertEqual(list(top_sentences), sorted(top_sentences))
+
+    def test_collapse_duplicates(self):
+        boilerplate = 'Subscribe to our newsletter for the latest news about the euro zone and Greece.\n'
+        text = boilerplate + LONG_TEXT + boilerplate * 5
+        summary = self.summarizer.__class__(collapse_duplicates=True).summarize(text, length=8)
+        self.assertEqual(len(summary), 8)
+        self.assertEqual(len(set(summary)), 8)
+
+        # Weighted rows give the repeated sentences the scores they have in the full matrices (up to the
+        # convergence tolerance of PageRank)
+        sentences, unprocessed, _ = self.summarizer._tokenize(text)
+        unique_sentences, unique_unprocessed, weights = self.summarizer._collapse_sentences(sentences, unprocessed)
+        self.assertEqual(len(unique_sentences), len(sentences) - 5)
+        self.assertEqual(list(weights), [6] + [1] * (len(unique_sentences) - 1))
+
+        kept = [sentences.index(sentence) for sentence in unique_sentences]
+        scores = self.summarizer._score_sentences(sentences)
+        weighted_scores = self.summarizer._score_sentences(unique_sentences, weights=weights)
+        self.assertTrue(np.allclose(np.asarray(scores)[kept], weighted_scores, atol=1e-5))
+
+        # Near duplicates are collapsed into their first occurrence
+        near_duplicate = boilerplate.replace('latest', 'recent')
+        summarizer = self.summarizer.__class__(collapse_duplicates=0.7)
+        self.assertEqual(len(summarizer._collapse_sentences(*summarizer._tokenize(text + near_duplicate)[:2])[0]),
+                         len(unique_sentences))
+        self.assertRaises(ValueError, self.summarizer.__class__, collapse_duplicates=1.5)
+
+    def test_prune_paragraphs(self):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        paragraphs = [' '.join(lines[:4]), ' '.join(lines[4:8]), ' '.join(self.expected_summary), ' '.join(lines[8:])]
+        text = '\n'.join(paragraphs)
+
+        # The off-topic paragraph is the least salient, so it is the one pruned
+        summarizer = self.summarizer.__class__(prune_paragraphs=0.5)
+        sentences, unprocessed, paragraph_ids, _ = summarizer._tokenize_paragraphs(text)
+        self.assertEqual(paragraph_ids, [0] * 4 + [1] * 3 + [2] * 5 + [3] * 4)  # One sentence is too short
+        kept = summarizer._select_paragraphs(sentences, paragraph_ids, 3)
+        self.assertTrue(len(kept) >= len(sentences) * 0.5)
+        self.assertFalse(set(kept) & set(range(7, 12)))
+
+        summary = summarizer.summarize(text, length=3)
+        self.assertEqual(len(summary), 3)
+        self.assertFalse(set(summary) & set(self.expected_summary))
+
+        # Keeping every paragraph ranks every sentence
+        self.assertEqual(self.summarizer.__class__(prune_paragraphs=1).summarize(text, length=3),
+                         self.summarizer.summarize(text, length=3))
+        self.assertRaises(ValueError, self.summarizer.__class__, prune_paragraphs=0)
+
+    def assertBatchMatches(self, **params):
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        texts = [self.text, '\n'.join(lines[:7]), '\n'.join(lines[3:]), lines[0], '', '\n'.join(lines[::2]),
+                 LONG_TEXT * 5]
+        for length in (2, 0.5):
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter('always')
+                summaries = self.summarizer.summarize_batch(texts, length=length, **params)
+                expected = [self.summarizer.summarize(text, length=length, **params) for text in texts]
+            self.assertEqual(summaries, expected)
+            self.assertEqual([summary.degraded for summary in summaries], [summary.degraded for summary in expected])
+
+    def assertBatchOptionsMatch(self):
+        # Options that reduce each document on its own apply in batch mode too
+        options = [{'collapse_duplicates': True}, {'max_sentences': 5}, {'max_bytes': 500}, {'prune_paragraphs': 0.5},
+                   {'max_sentences': 5, 'budget_strategy': 'chunk'}]
+        for kwargs in options:
+            self.summarizer = self.summarizer.__class__(**kwargs)
+            self.assertBatchMatches()
+
     def test_matrix_shape(self):
         sentences = ["bunch long words", "more long words", "hello dude"]
         unique_terms = 6
@@ -49,6 +195,44 @@ class TestSummarizer(unittest.TestCase):
         matrix = self.summarizer._compute_matrix(sentences)
         self.assertEqual(matrix.shape, (num_sentences, unique_terms))
 
+    def test_hash_features(self):
+        # Without collisions, signed hashing preserves inner products between sentences, so summaries are the same
+        summarizer = self.summarizer.__class__(hash_features=2 ** 20)
+        self.assertEqual(summarizer.summarize(self.text, length=3), self.summarizer.summarize(self.text, length=3))
+
+        matrix = summarizer._compute_matrix(["bunch long words", "more long words", "hello dude"],
+                                            hash_features=2 ** 20)
+        self.assertEqual(matrix.shape, (3, 2 ** 20))
+        self.assertEqual(matrix.nnz, 8)
+        self.assertTrue(np.allclose((matrix * matrix.T).toarray(), [[3, 2, 0], [2, 3, 0], [0, 0, 2]]))
+
+        # Columns do not depend on the other sentences
+        other = summarizer._compute_matrix(["long words"], hash_features=2 ** 20)
+        self.assertTrue(set(other.indices) <= set(matrix[0].indices))
+        self.assertRaises(ValueError, self.summarizer.__class__, hash_features=0)
+
+    def test_prune_vocabulary(self):
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner())
+        self.assertEqual(summarizer.summarize(LONG_TEXT, length=3), self.summarizer.summarize(LONG_TEXT, length=3))
+
+        sentences = ["bunch long words", "more long words", "hello dude"]
+        for pruner, shape in ((VocabularyPruner(min_df=2), (3, 2)), (VocabularyPruner(max_df=1), (3, 4)),
+                              (VocabularyPruner(max_df=0.5), (3, 4)), (VocabularyPruner(max_features=3), (3, 3))):
+            for weighting in ('binary', 'frequency', 'tfidf'):
+                matrix = summarizer._compute_matrix(sentences, weighting=weighting, pruner=pruner)
+                self.assertEqual(matrix.shape, shape)
+                hashed = summarizer._compute_matrix(sentences, weighting=weighting, hash_features=2 ** 20,
+                                                    pruner=pruner)
+                self.assertEqual(len(np.unique(hashed.indices)), shape[1])
+
+        # Weights are computed on the pruned counts
+        matrix = summarizer._compute_matrix(sentences, weighting='tfidf', pruner=VocabularyPruner(min_df=2))
+        self.assertTrue(np.allclose(matrix.toarray(), [[np.sqrt(0.5), np.sqrt(0.5)]] * 2 + [[0, 0]]))
+
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner(min_df=2, max_df=0.5))
+        self.assertEqual(len(summarizer.summarize(LONG_TEXT, length=3)), 3)
+        self.assertRaises(ValueError, self.summarizer.__class__, prune_vocabulary={'min_df': 2})
+
     def assertWarns(self, warning, callable, *args, **kwds):
         """Catch any warnings"""
         with warnings.catch_warnings(record=True) as warning_list:
@@ -73,6 +257,34 @@ class TestLsaOzsoySummarizer(TestSummarizer):
         self.assertWarns(Warning, self.summarizer.summarize,
                          self.text, topics=topics, length=length)
 
+        # Pruning the vocabulary leaves fewer terms than distinct sentences
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner(max_features=3))
+        self.assertWarns(Warning, summarizer.summarize, LONG_TEXT, length=3)
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner(min_df=1000))
+        self.assertRaises(SvdRankException, summarizer.summarize, LONG_TEXT, length=3)
+
+
+    def test_randomized_svd(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        matrix = self.summarizer._compute_matrix(sentences, weighting='binary').T.tocsr()
+
+        _, expected_sigma, _ = self.summarizer._svd(matrix, num_concepts=4)
+        u, sigma, v = self.summarizer._svd(matrix, num_concepts=4, deadline=Deadline(60))
+        self.assertTrue(np.allclose(sorted(sigma), sorted(expected_sigma)))
+        self.assertEqual(u.shape, (matrix.shape[0], 4))
+        self.assertEqual(v.shape, (4, matrix.shape[1]))
+
+    def test_auto_topics(self):
+        # Singular values 10, 5, 1, 0.1, ...: the first two account for 99% of the energy
+        matrix = diags([10, 5, 1] + [0.1] * 17, shape=(20, 30), format='csr')
+        self.assertEqual(self.summarizer._estimate_num_topics(matrix, 10, energy=0.7), 1)
+        self.assertEqual(self.summarizer._estimate_num_topics(matrix, 10, energy=0.9), 2)
+        self.assertEqual(self.summarizer._estimate_num_topics(matrix, 10, energy=0.995), 3)
+        self.assertEqual(self.summarizer._estimate_num_topics(matrix, 10, energy=0.9, topic_sigma_threshold=0.6), 1)
+
+        summary = self.summarizer.summarize(LONG_TEXT, topics='auto', length=3)
+        self.assertEqual(len(summary), 3)
+
 
 class TestLsaSteinbergerSummarizer(TestSummarizer):
     __test__ = True
@@ -88,6 +300,53 @@ class TestLsaSteinbergerSummarizer(TestSummarizer):
         self.assertWarns(Warning, self.summarizer.summarize,
                          self.text, topics=topics, length=length)
 
+        # Pruning the vocabulary leaves fewer terms than distinct sentences
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner(max_features=3))
+        self.assertWarns(Warning, summarizer.summarize, LONG_TEXT, length=3)
+        summarizer = self.summarizer.__class__(prune_vocabulary=VocabularyPruner(min_df=1000))
+        self.assertRaises(SvdRankException, summarizer.summarize, LONG_TEXT, length=3)
+
+
+class TestLsaEngine(TestSummarizer):
+    __test__ = True
+
+    def setUp(self):
+        self.summarizer = LsaEngine()
+
+    def test_methods_share_decomposition(self):
+        for method, summarizer_class in (('ozsoy', LsaOzsoy), ('steinberger', LsaSteinberger)):
+            self.assertEqual(self.summarizer.summarize(LONG_TEXT, method=method, length=4),
+                             summarizer_class().summarize(LONG_TEXT, length=4))
+        self.assertEqual((self.summarizer.cache.misses, self.summarizer.cache.hits), (1, 1))
+        self.assertRaises(ValueError, self.summarizer.summarize, LONG_TEXT, method='gong')
+
+        # Summarizers sharing a cache compute the SVD once
+        cache = DecompositionCache()
+        LsaOzsoy(cache=cache).summarize(LONG_TEXT, length=3)
+        LsaSteinberger(cache=cache).summarize(LONG_TEXT, length=3)
+        self.assertEqual((cache.misses, cache.hits, len(cache)), (1, 1, 1))
+
+    def test_decompose(self):
+        decomposition = self.summarizer.decompose(LONG_TEXT, topics=3)
+        self.assertEqual(decomposition.v.shape, (3, len(decomposition.sentences)))
+        self.assertEqual(decomposition.u.shape[1], 3)
+
+        for threshold in (0.25, 0.5, 0.75):
+            for length in (2, 4):
+                self.assertEqual(
+                    decomposition.summarize(length, method='steinberger', topic_sigma_threshold=threshold),
+                    LsaSteinberger().summarize(LONG_TEXT, topics=3, length=length, topic_sigma_threshold=threshold)
+                )
+        self.assertEqual(self.summarizer.cache.misses, 1)
+
+    def test_cache_eviction(self):
+        cache = DecompositionCache(max_entries=2)
+        for topics in (2, 3, 4):
+            LsaOzsoy(cache=cache).summarize(LONG_TEXT, topics=topics, length=3)
+        self.assertEqual(len(cache), 2)
+        LsaOzsoy(cache=cache).summarize(LONG_TEXT, topics=2, length=3)
+        self.assertEqual((cache.misses, cache.hits), (4, 0))
+
 
 class TestRelevanceSummarizer(TestSummarizer):
     __test__ = True
@@ -95,6 +354,23 @@ class TestRelevanceSummarizer(TestSummarizer):
     def setUp(self):
         self.summarizer = RelevanceSummarizer()
 
+    def test_greedy_deadline(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        deadline = Deadline(1e-9)
+        self.summarizer._rank_sentences(sentences, 3, deadline=deadline)
+        self.assertEqual(deadline.truncated_stages, ['relevance'])
+
+    def test_summarize_batch(self):
+        self.assertBatchMatches()
+        self.assertBatchMatches(binary_matrix=False)
+
+        self.summarizer = RelevanceSummarizer(hash_features=2 ** 20)
+        self.assertBatchMatches()
+
+        self.summarizer = RelevanceSummarizer(prune_vocabulary=VocabularyPruner(min_df=2, max_features=10))
+        self.assertBatchMatches()
+        self.assertBatchOptionsMatch()
+
 
 class TestTextRankSummarizer(TestSummarizer):
     __test__ = True
@@ -102,6 +378,78 @@ class TestTextRankSummarizer(TestSummarizer):
     def setUp(self):
         self.summarizer = TextRankSummarizer()
 
+    def test_pagerank_deadline(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        matrix = self.summarizer._compute_matrix(sentences)
+        similarity_matrix = matrix * matrix.T
+
+        deadline = Deadline(1e-9)
+        scores = self.summarizer._pagerank(similarity_matrix, deadline=deadline)
+        self.assertEqual(deadline.truncated_stages, ['pagerank'])
+        self.assertAlmostEqual(scores.sum(), 1.0)
+
+        deadline = Deadline(60)
+        converged_scores = self.summarizer._pagerank(similarity_matrix, deadline=deadline)
+        self.assertFalse(deadline.truncated)
+        self.assertTrue(np.allclose(converged_scores, self.summarizer._pagerank(similarity_matrix)))
+
+    def test_summarize_batch(self):
+        self.assertBatchMatches()
+        self.assertBatchMatches(weighting='tfidf')
+        self.assertBatchMatches(weighting='binary', norm='l2')
+
+        self.summarizer = TextRankSummarizer(hash_features=2 ** 20)
+        self.assertBatchMatches(weighting='tfidf')
+
+        self.summarizer = TextRankSummarizer(prune_vocabulary=VocabularyPruner(max_df=0.3, max_features=10))
+        self.assertBatchMatches(weighting='tfidf')
+        self.summarizer = TextRankSummarizer(hash_features=2 ** 20, prune_vocabulary=VocabularyPruner(min_df=2))
+        self.assertBatchMatches()
+        self.assertBatchOptionsMatch()
+
+    def test_block_pagerank(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        blocks = [sentences[:5], sentences[5:6], sentences[6:]]
+        matrix, sizes = self.summarizer._compute_block_matrix(blocks)
+        self.assertEqual(list(sizes), [len(block) for block in blocks])
+        self.assertEqual(matrix.shape[0], len(sentences))
+
+        scores = self.summarizer._block_pagerank(matrix * matrix.T, sizes)
+        offset = 0
+        for block in blocks:
+            block_matrix = self.summarizer._compute_matrix(block)
+            expected = self.summarizer._pagerank(block_matrix * block_matrix.T)
+            self.assertTrue(np.allclose(scores[offset:offset + len(block)], expected))
+            offset += len(block)
+
+    def test_dense_graph(self):
+        sentences, _ = self.summarizer._tokenizer.tokenize_sentences(LONG_TEXT)
+        self.assertGreater(self.summarizer._graph_density(self.summarizer._compute_matrix(sentences)),
+                           TextRankSummarizer.DENSE_GRAPH_DENSITY)
+
+        block_elements = TextRankSummarizer.DENSE_BLOCK_ELEMENTS
+        TextRankSummarizer.DENSE_BLOCK_ELEMENTS = 300  # Several blocks of columns
+        try:
+            for summarizer, params in ((self.summarizer, {'weighting': 'binary'}),
+                                       (self.summarizer, {'weighting': 'tfidf', 'norm': 'l2'}),
+                                       (TextRankSummarizer(hash_features=16), {'weighting': 'binary'})):
+                matrix = summarizer._compute_matrix(sentences, hash_features=summarizer._hash_features, **params)
+                sparse = summarizer._similarity_matrix(matrix)
+                dense = summarizer._similarity_matrix(matrix, dense=True)
+                self.assertIsInstance(dense, np.ndarray)
+                self.assertTrue(np.allclose(dense, sparse.toarray()))
+                self.assertTrue(np.allclose(summarizer._pagerank(dense), summarizer._pagerank(sparse)))
+        finally:
+            TextRankSummarizer.DENSE_BLOCK_ELEMENTS = block_elements
+
+        sparse_summarizer = TextRankSummarizer()
+        sparse_summarizer.DENSE_GRAPH_DENSITY = 1.0
+        for params in ({}, {'weighting': 'binary'}, {'weighting': 'binary', 'norm': 'l1'}):
+            self.assertEqual(self.summarizer.summarize(LONG_TEXT, length=4, **params),
+                             sparse_summarizer.summarize(LONG_TEXT, length=4, **params))
+        repeated = LONG_TEXT + LONG_TEXT
+        self.assertEqual(self.summarizer.summarize(repeated, length=4), sparse_summarizer.summarize(repeated, length=4))
+
 
 class TestBaseSummarizer(unittest.TestCase):
 
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import pickle
 import unittest
-from pytldr.nlp import Tokenizer
+from pytldr.nlp import SentenceCache, Tokenizer
+from pytldr.summarize import TextRankSummarizer
+from test_summarizers import LONG_TEXT
 
 
 class TestTokenizer(unittest.TestCase):
@@ -27,6 +30,69 @@ class TestTokenizer(unittest.TestCase):
         self.assertEqual(expected_processed, processed_sentences)
         self.assertEqual(expected_unprocessed, unprocessed_sentences)
 
+    def test_tokenize_sentences_baseline(self):
+        # Outputs of the original implementation, which sanitizing in one pass must reproduce exactly
+        text = u"The caf\xe9's r\xe9sum\xe9 listed na\xefve ideas, and ﬁnancial plans. " \
+               u"Ministers “strongly” rejected it! Why? " \
+               u"Stupidity and pieces of the argument were discussed at length by officials.\n" \
+               u"A title"
+        unprocessed = [
+            "The cafe's resume listed naive ideas, and financial plans.",
+            "Ministers strongly rejected it!",
+            "Why?",
+            "Stupidity and pieces of the argument were discussed at length by officials.",
+            ".",
+            "A title"
+        ]
+        cases = [
+            (self.tokenizer, 0, [
+                "cafe resum list naiv idea financi plan", "minist strong reject", "",
+                "stupid piec argument discuss length offici", "", "titl"
+            ], [0, 1, 2, 3, 4, 5]),
+            (self.tokenizer, 1, [
+                "cafe resum list naiv idea financi plan", "minist strong reject",
+                "stupid piec argument discuss length offici"
+            ], [0, 1, 3]),
+            (self.tokenizer, 3, [
+                "cafe resum list naiv idea financi plan", "stupid piec argument discuss length offici"
+            ], [0, 3]),
+            (Tokenizer(stemming=False), 0, [
+                "cafe's resume listed naive ideas financial plans", "ministers strongly rejected", "",
+                "stupidity pieces argument discussed length officials", "", "title"
+            ], [0, 1, 2, 3, 4, 5]),
+            (Tokenizer(stemming=False), 3, [
+                "cafe's resume listed naive ideas financial plans",
+                "stupidity pieces argument discussed length officials"
+            ], [0, 3]),
+            (Tokenizer(stopwords=['the', 'and', 'of']), 0, [
+                "cafe resum list naiv idea financi plan", "minist strong reject it", "whi",
+                "stupid piec argument were discuss at length by offici", "", "a titl"
+            ], [0, 1, 2, 3, 4, 5]),
+            (Tokenizer(stopwords=['the', 'and', 'of']), 1, [
+                "cafe resum list naiv idea financi plan", "minist strong reject it",
+                "stupid piec argument were discuss at length by offici", "a titl"
+            ], [0, 1, 3, 5]),
+            (Tokenizer(stopwords=['the', 'and', 'of']), 5, [
+                "cafe resum list naiv idea financi plan", "stupid piec argument were discuss at length by offici"
+            ], [0, 3]),
+        ]
+        for tokenizer, word_threshold, processed, kept in cases:
+            self.assertEqual(tokenizer.tokenize_sentences(text, word_threshold=word_threshold),
+                             (processed, [unprocessed[i] for i in kept]))
+
+        text = "Ministers rejected the revised budget. Running runners ran quickly to the station.\n" \
+               "The end. Do you want to play a game?"
+        self.assertEqual(self.tokenizer.tokenize_sentences(text, word_threshold=0), (
+            ["minist reject revis budget", "run runner ran quick station", "", "", "play game"],
+            ["Ministers rejected the revised budget.", "Running runners ran quickly to the station.", ".",
+             "The end.", "Do you want to play a game?"]
+        ))
+        self.assertEqual(self.tokenizer.tokenize_sentences(text, word_threshold=2), (
+            ["minist reject revis budget", "run runner ran quick station"],
+            ["Ministers rejected the revised budget.", "Running runners ran quickly to the station."]
+        ))
+        self.assertEqual(self.tokenizer.tokenize_sentences(text, word_threshold=5), ([], []))
+
     def test_tokenize_words(self):
         text = "This is a sentence. Word."
         expected = ["This", "is", "a", "sentence", "Word"]
@@ -82,5 +148,90 @@ class TestTokenizer(unittest.TestCase):
     def test_language(self):
         self.assertRaises(ValueError, Tokenizer, "nonexistent language")
 
+    def test_regex_splitter(self):
+        text = 'Dr. Smith met Mr. J. R. Jones on Monday. "Is it done?" he asked. It was... not.\n' \
+               'A title without a full stop\n' \
+               'It cost 3.5 million. Revenue grew 4.2 percent in 2014. There is no Plan B. "\n' \
+               '"\n' \
+               'Prices rose (e.g. fuel). Done!'
+        expected = [
+            'Dr. Smith met Mr. J. R. Jones on Monday.',
+            '"Is it done?"',
+            'he asked.',
+            'It was... not.',
+            'A title without a full stop',
+            'It cost 3.5 million.',
+            'Revenue grew 4.2 percent in 2014.',
+            'There is no Plan B. "',
+            'Prices rose (e.g. fuel).',
+            'Done!'
+        ]
+        self.assertEqual(expected, Tokenizer(splitter='regex').split_sentences(text))
+
+    def test_regex_splitter_agrees_with_punkt(self):
+        text = "This is a sentence. Lorem ipsum dolor sit amet...\nFinal sentence. Prof. Brown's talk ended at 3. " \
+               "Questions followed!"
+        self.assertEqual(self.tokenizer.split_sentences(text), Tokenizer(splitter='regex').split_sentences(text))
+
+    def test_splitter(self):
+        self.assertRaises(ValueError, Tokenizer, splitter='nonexistent splitter')
+
+    def test_split_sentence_spans(self):
+        text = 'A title\n  He asked "Is it done?" and left.  It was\nThe end. "'
+        expected = ['A title', 'He asked "Is it done?"', 'and left.', 'It was', 'The end. "']
+        for splitter in Tokenizer.SPLITTERS:
+            tokenizer = Tokenizer(splitter=splitter)
+            sentences, spans = tokenizer.split_sentence_spans(text)
+            self.assertEqual(sentences, tokenizer.split_sentences(text))
+            self.assertEqual([text[start:end] for start, end in spans], expected)
+
+        text = u'Caf\xe9 au lait.  It is \u201cgood\u201d.'
+        self.assertEqual([text[start:end] for start, end in self.tokenizer.split_sentence_spans(text)[1]],
+                         [u'Caf\xe9 au lait.', u'It is \u201cgood\u201d.'])
+
+        text = 'One.\n  Two    three\n\nfour'
+        self.assertEqual([text[start:end] for start, end in Tokenizer.paragraph_spans(text)],
+                         Tokenizer.tokenize_paragraphs(text))
+
+    def test_sentence_cache(self):
+        cache = SentenceCache()
+        tokenizer = Tokenizer('english', cache=cache)
+        expected = self.tokenizer.tokenize_sentences(LONG_TEXT)
+        self.assertEqual(tokenizer.tokenize_sentences(LONG_TEXT), expected)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(tokenizer.tokenize_sentences(LONG_TEXT), expected)
+        self.assertEqual(cache.hits, cache.misses)
+        self.assertEqual(cache.stats()['hit_rate'], 0.5)
+
+        # Sentences dropped for a threshold are sanitized again for a lower one, and unicode is cached apart
+        for word_threshold in (0, 1, 8):
+            self.assertEqual(tokenizer.tokenize_sentences(LONG_TEXT, word_threshold),
+                             self.tokenizer.tokenize_sentences(LONG_TEXT, word_threshold))
+        self.assertEqual(tokenizer.tokenize_sentences(unicode(LONG_TEXT)), expected)
+
+        # Tokenizers with other settings share the cache without sharing its entries
+        unstemmed = Tokenizer('english', stemming=False, cache=cache)
+        self.assertEqual(unstemmed.tokenize_sentences(LONG_TEXT),
+                         Tokenizer(stemming=False).tokenize_sentences(LONG_TEXT))
+
+        summarizer = TextRankSummarizer(pickle.loads(pickle.dumps(tokenizer)))
+        self.assertEqual(summarizer.summarize(LONG_TEXT, length=3), TextRankSummarizer().summarize(LONG_TEXT, length=3))
+
+    def test_sentence_cache_bounds(self):
+        cache = SentenceCache(max_entries=3)
+        tokenizer = Tokenizer('english', cache=cache)
+        tokenizer.tokenize_sentences(LONG_TEXT, word_threshold=0)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evictions, cache.misses - 3)
+
+        cache = SentenceCache(max_bytes=1000)
+        Tokenizer('english', cache=cache).tokenize_sentences(LONG_TEXT, word_threshold=0)
+        self.assertTrue(0 < cache.nbytes <= 1000)
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+        self.assertRaises(ValueError, SentenceCache, max_entries=0)
+        self.assertRaises(ValueError, SentenceCache, max_bytes=0)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
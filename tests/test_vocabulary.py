@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pytldr.nlp import DocumentFrequencies, PreprocessedDocument, VocabularyPruner
+from pytldr.summarize import LsaOzsoy, ParallelSummarizer, TextRankSummarizer
+from test_summarizers import LONG_TEXT
+
+
+class TestVocabularyPruner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        lines = [line.strip() for line in LONG_TEXT.strip().split('\n')]
+        self.corpus = ['\n'.join(lines[i:i + 4]) for i in range(0, len(lines), 2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_select(self):
+        frequencies = np.array([1, 5, 2, 10, 3])
+        self.assertEqual(list(VocabularyPruner(min_df=2, max_df=0.5).select(frequencies, 10)),
+                         [False, True, True, False, True])
+        self.assertEqual(list(VocabularyPruner(max_df=4).select(frequencies, 10)), [True, False, True, False, True])
+
+        # max_features applies to each group, ties going to the earlier column
+        pruner = VocabularyPruner(max_features=2)
+        self.assertEqual(list(pruner.select(frequencies, 10)), [False, True, False, True, False])
+        self.assertEqual(list(pruner.select([1, 2, 2, 3, 1, 1], [4, 4, 4, 4, 2, 2], groups=[0, 0, 0, 0, 1, 1])),
+                         [False, True, False, True, True, True])
+
+        for params in ({'min_df': -1}, {'max_df': 1.5}, {'max_df': '2'}, {'max_features': 0}):
+            self.assertRaises(ValueError, VocabularyPruner, **params)
+
+    def test_document_frequencies(self):
+        frequencies = DocumentFrequencies.fit(self.corpus)
+        self.assertEqual(frequencies.num_documents, len(self.corpus))
+        self.assertEqual(list(frequencies.lookup(['greec', 'unknown'])), [frequencies.frequencies['greec'], -1])
+        self.assertTrue(all(0 < frequency <= len(self.corpus) for frequency in frequencies.frequencies.values()))
+
+        path = os.path.join(self.tmpdir, 'frequencies.json')
+        frequencies.save(path)
+        loaded = DocumentFrequencies.load(path)
+        self.assertEqual(loaded.frequencies, frequencies.frequencies)
+        self.assertEqual(loaded.fingerprint, frequencies.fingerprint)
+
+        loaded.add(self.corpus[0])
+        self.assertNotEqual(loaded.fingerprint, frequencies.fingerprint)
+        self.assertEqual(pickle.loads(pickle.dumps(loaded)).frequencies, loaded.frequencies)
+
+    def test_corpus_pruning(self):
+        frequencies = DocumentFrequencies.fit(self.corpus)
+        path = os.path.join(self.tmpdir, 'frequencies.json')
+        frequencies.save(path)
+
+        # Terms missing from the corpus are kept
+        pruner = VocabularyPruner(max_df=1, corpus=path)
+        terms = ['greec', 'unknown'] + [term for term, frequency in frequencies.frequencies.items() if frequency == 1]
+        self.assertEqual(list(pruner.select(np.ones(len(terms)), 10, terms)), [False, True] + [True] * (len(terms) - 2))
+        self.assertRaises(ValueError, pruner.select, np.ones(2), 10)
+        self.assertRaises(ValueError, TextRankSummarizer, hash_features=2 ** 10, prune_vocabulary=pruner)
+
+        # Preprocessed documents carry their vocabulary
+        summarizer = LsaOzsoy(prune_vocabulary=VocabularyPruner(max_df=0.5, corpus=frequencies))
+        summary = summarizer.summarize(LONG_TEXT, length=3)
+        self.assertEqual(summarizer.summarize(PreprocessedDocument.build(LONG_TEXT), length=3), summary)
+        self.assertEqual(ParallelSummarizer(summarizer, processes=2).summarize([LONG_TEXT], length=3), [summary])
+
+
+if __name__ == "__main__":
+    unittest.main()